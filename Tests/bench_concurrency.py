@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark N simultaneous requests against blocking work on one event loop.
+
+I/O-bound (a sleep standing in for Google recognition or a web search) and
+CPU-bound work (a pure-Python loop standing in for a Whisper/YOLO forward
+pass) is run three ways:
+
+    inline   called on the event loop, as before the execution layer
+    io pool  run_io(): bounded thread pool
+    cpu pool run_cpu(): spawned worker processes
+
+and once end to end through an in-memory MCP server, with the tool as a
+plain sync function vs wrapped with offload(). Inline work serializes: N
+requests take N times as long as one, and the loop answers nothing else
+meanwhile (max stall). Threads overlap I/O; CPU work only overlaps across
+processes, so its speedup is bounded by the number of cores.
+
+Usage:
+    python Tests/bench_concurrency.py [requests] [seconds per request]
+"""
+import os
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import shared.executors as executors
+from shared.executors import offload, run_cpu, run_io, shutdown_executors, warm_cpu_pool
+
+WORK_SECONDS = 0.2
+
+
+def blocking_io(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def spin(iterations: int) -> int:
+    total = 0
+    for i in range(iterations):
+        total += i * i
+    return total
+
+
+def calibrate(seconds: float) -> int:
+    """Iterations of spin() that take `seconds` on one core."""
+    start = time.perf_counter()
+    spin(1_000_000)
+    return int(1_000_000 * seconds / (time.perf_counter() - start))
+
+
+async def inline(fn, arg):
+    return fn(arg)
+
+
+def report(label: str, elapsed: float, stall: float, requests: int, seconds: float):
+    serial = requests * seconds
+    print(f"{label:<26} n={requests:<3} wall={elapsed * 1000:8.1f} ms  speedup={serial / elapsed:5.2f}x  "
+          f"max loop stall={stall * 1000:7.1f} ms")
+
+
+async def timed(calls):
+    """(wall seconds, longest gap between event-loop ticks) for running `calls` together."""
+    stall = 0.0
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            stall = max(stall, now - last)
+            last = now
+
+    ticking = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*calls)
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.01)
+    ticking.cancel()
+    return elapsed, stall
+
+
+async def bench_pools(requests: int, seconds: float):
+    iterations = calibrate(seconds)
+    for kind, fn, arg in (("io", blocking_io, seconds), ("cpu", spin, iterations)):
+        for label, runner in (("inline", inline), ("io pool", run_io), ("cpu pool", run_cpu)):
+            elapsed, stall = await timed(runner(fn, arg) for _ in range(requests))
+            report(f"{kind}-bound, {label}", elapsed, stall, requests, seconds)
+        print()
+
+
+def slow_tool(seconds: float) -> float:
+    """Blocking tool."""
+    return blocking_io(seconds)
+
+
+async def bench_mcp(requests: int, seconds: float):
+    from mcp.server.fastmcp import FastMCP
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    for label, tool in (("sync tool", slow_tool), ("offloaded tool", offload(slow_tool, "io"))):
+        server = FastMCP("bench")
+        server.tool()(tool)
+        async with create_connected_server_and_client_session(server._mcp_server) as session:
+            elapsed, stall = await timed(session.call_tool("slow_tool", {"seconds": seconds})
+                                         for _ in range(requests))
+        report(f"MCP, {label}", elapsed, stall, requests, seconds)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else WORK_SECONDS
+    executors.IO_POOL_WORKERS = max(executors.IO_POOL_WORKERS, requests)
+    executors.CPU_POOL_WORKERS = max(executors.CPU_POOL_WORKERS, min(requests, os.cpu_count() or 1))
+    print(f"{os.cpu_count()} cores, I/O pool: {executors.IO_POOL_WORKERS} threads, "
+          f"CPU pool: {warm_cpu_pool()} processes\n")
+
+    try:
+        asyncio.run(bench_pools(requests, seconds))
+        asyncio.run(bench_mcp(requests, seconds))
+    finally:
+        shutdown_executors()
+
+
+if __name__ == "__main__":
+    main()
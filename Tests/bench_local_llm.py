@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local llama.cpp backend on a tiny GGUF model.
+
+Sends decide()-style requests (the real static system prompt plus a growing
+history), each followed by an unrelated short request as the summarizer or
+phrasing calls would be, and reports prefill and generation tokens/sec with
+and without the saved prompt-prefix KV states; then throughput of concurrent
+requests through the worker queue.
+
+Usage:
+    python Tests/bench_local_llm.py <model.gguf> [requests] [concurrency]
+
+Any small instruct GGUF works, e.g. qwen2.5-0.5b-instruct-q4_k_m.gguf.
+"""
+import sys
+import time
+import asyncio
+import statistics
+from pathlib import Path
+
+from mcp import types
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agent.api_llm import APIError, build_system_prompt
+from agent.local_llm import LocalLLMClient
+
+TOOLS = [
+    types.Tool(name="VisionDetect", description="Detect objects in front of the user with the camera.",
+               inputSchema={"type": "object", "properties": {}}),
+    types.Tool(name="search_web", description="Search the web for current information.",
+               inputSchema={"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]}),
+    types.Tool(name="get_time", description="Current local date and time.",
+               inputSchema={"type": "object", "properties": {}}),
+    types.Tool(name="NavigateAStar", description="Walking directions between two places in the building.",
+               inputSchema={"type": "object", "properties": {"start": {"type": "string"}, "goal": {"type": "string"}},
+                            "required": ["start", "goal"]}),
+]
+STATIC_PROMPT = build_system_prompt(TOOLS, "thinking")
+OTHER_REQUEST = [{"role": "user", "content": "Summarize in one line: the user asked for the time."}]
+QUESTIONS = ["what is in front of me", "what time is it", "how do I get to the library from the entrance",
+             "what's the weather in Cairo", "is the cafeteria open"]
+
+
+def decide_messages(i: int) -> list:
+    history = "\n".join(f"User: {q}\nAnswer: ..." for q in QUESTIONS[:i % len(QUESTIONS)]) or "None"
+    context = f"\nConversation history:\n{history}\n"
+    return [{"role": "system", "content": STATIC_PROMPT + context},
+            {"role": "user", "content": QUESTIONS[i % len(QUESTIONS)]}]
+
+
+def report(label: str, samples: list, summary: dict):
+    samples = sorted(samples)
+    p90 = samples[int(0.9 * (len(samples) - 1))]
+    print(f"{label:<24} n={len(samples):<3} mean={statistics.mean(samples) * 1000:8.1f} ms  "
+          f"p90={p90 * 1000:8.1f} ms  prefill={summary['prefill_tokens_per_s']:7.1f} tok/s  "
+          f"generation={summary['generation_tokens_per_s']:6.1f} tok/s  prefix reuse={summary['prefix_reuse']:.0%}")
+
+
+async def bench_sequential(model_path: str, requests: int, prefix_cache: int):
+    async with LocalLLMClient(model_path, workers=1, prefix_cache=prefix_cache) as client:
+        samples = []
+        for i in range(requests):
+            start = time.perf_counter()
+            await client.chat_completion(decide_messages(i), max_tokens=48, temperature=0.0)
+            samples.append(time.perf_counter() - start)
+            # Replaces the context, so without a saved state the next decide prompt is evaluated in full
+            await client.chat_completion(OTHER_REQUEST, max_tokens=8, temperature=0.0)
+        report(f"prefix cache {prefix_cache}", samples, client.summary())
+
+
+async def bench_concurrent(model_path: str, requests: int, concurrency: int):
+    async with LocalLLMClient(model_path, workers=concurrency, max_queue=requests) as client:
+        async def one(i):
+            start = time.perf_counter()
+            try:
+                await client.chat_completion(decide_messages(i), max_tokens=48, temperature=0.0)
+            except APIError as e:
+                print(f"  request {i}: {e}")
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        samples = await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+        summary = client.summary()
+        report(f"{concurrency} worker(s), {requests} at once", samples, summary)
+        print(f"{'':<24} {summary['completion_tokens'] / elapsed:.1f} generated tok/s overall, "
+              f"{summary['queue_seconds']:.1f}s spent queueing")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or not Path(sys.argv[1]).exists():
+        print(__doc__)
+        sys.exit(1)
+    model_path = sys.argv[1]
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    asyncio.run(bench_sequential(model_path, requests, prefix_cache=0))
+    asyncio.run(bench_sequential(model_path, requests, prefix_cache=4))
+    asyncio.run(bench_concurrent(model_path, requests, 1))
+    asyncio.run(bench_concurrent(model_path, requests, concurrency))
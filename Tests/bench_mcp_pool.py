@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Load test for the MCP session pool: tool-call throughput vs pool size.
+
+A stub server with one CPU-bound sync tool (a pure-Python loop standing in
+for a YOLO forward pass or HTML parsing) is started MCP_POOL_SIZE times;
+`concurrency` clients call it in a closed loop for a fixed duration. With
+one worker every call waits for the previous one; throughput should grow
+with the pool size up to the number of cores.
+
+Usage:
+    python Tests/bench_mcp_pool.py [seconds] [concurrency] [work ms]
+"""
+import os
+import sys
+import time
+import asyncio
+import statistics
+import tempfile
+from pathlib import Path
+
+from mcp import StdioServerParameters
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agent.mcp_pool import MCPSessionPool
+
+STUB_SERVER = '''
+import time
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("load")
+
+
+@mcp.tool()
+def spin(ms: float) -> int:
+    end = time.process_time() + ms / 1000
+    n = 0
+    while time.process_time() < end:
+        n += 1
+    return n
+
+
+if __name__ == "__main__":
+    mcp.run()
+'''
+
+
+def report(label: str, calls: int, seconds: float, latencies: list):
+    latencies = sorted(latencies)
+    p90 = latencies[int(0.9 * (len(latencies) - 1))] if latencies else 0.0
+    print(f"{label:<10} calls={calls:<5} throughput={calls / seconds:7.1f}/s  "
+          f"p50={statistics.median(latencies) * 1000 if latencies else 0:8.1f} ms  p90={p90 * 1000:8.1f} ms")
+
+
+async def load(pool: MCPSessionPool, seconds: float, concurrency: int, work_ms: float):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await pool.call_tool("spin", {"ms": work_ms})
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return len(latencies), time.perf_counter() - start, latencies
+
+
+async def bench(params: StdioServerParameters, sizes, seconds: float, concurrency: int, work_ms: float):
+    baseline = None
+    for size in sizes:
+        async with MCPSessionPool(params, size=size, standby=0, affinity={}) as pool:
+            await load(pool, 0.5, concurrency, work_ms)  # warm-up
+            calls, elapsed, latencies = await load(pool, seconds, concurrency, work_ms)
+        report(f"{size} worker{'s' if size > 1 else ''}", calls, elapsed, latencies)
+        baseline = baseline or calls / elapsed
+        print(f"{'':<10} scaling={calls / elapsed / baseline:5.2f}x")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    work_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 20.0
+    cores = os.cpu_count() or 1
+    sizes = sorted({1, 2, max(1, cores // 2), cores})
+    print(f"{cores} cores, {concurrency} concurrent clients, {work_ms:.0f} ms CPU per call\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "load_server.py"
+        path.write_text(STUB_SERVER)
+        params = StdioServerParameters(command=sys.executable, args=[str(path)], env=dict(os.environ))
+        asyncio.run(bench(params, sizes, seconds, concurrency, work_ms))
+
+
+if __name__ == "__main__":
+    main()
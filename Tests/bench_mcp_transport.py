@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Per-call overhead of the MCP transports (MCP_TRANSPORT): a stdio server
+subprocess, the same FastMCP object in-process over memory streams, and its
+request handlers called directly.
+
+The stub tools do no work, so the latency is all transport: a small echo
+and a search_web-sized result (a few 16 KB documents as JSON). The stub
+module is written to a temp file, started as a subprocess for "stdio" and
+imported for the in-process transports. echo returns a str, so it has an
+output schema and every call also pays for the server's jsonschema check of
+the result, whatever the transport.
+
+Usage:
+    python Tests/bench_mcp_transport.py [calls] [payload KB]
+"""
+import os
+import sys
+import time
+import asyncio
+import importlib.util
+import statistics
+import tempfile
+from pathlib import Path
+
+from mcp import StdioServerParameters
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agent.mcp_transport import TRANSPORTS, connect_mcp
+
+STUB_SERVER = '''
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("overhead")
+
+
+@mcp.tool()
+def echo(text: str) -> str:
+    return text
+
+
+@mcp.tool()
+def documents(kb: int) -> dict:
+    return {"query": "overhead", "documents": [{"url": f"https://example.com/{i}", "text": "x" * 16384}
+                                              for i in range(max(1, kb // 16))]}
+
+
+if __name__ == "__main__":
+    mcp.run()
+'''
+
+
+def report(label: str, latencies: list):
+    latencies = sorted(latencies)
+    p90 = latencies[int(0.9 * (len(latencies) - 1))]
+    print(f"{label:<18} mean={statistics.mean(latencies) * 1e6:9.1f} us  "
+          f"p50={statistics.median(latencies) * 1e6:9.1f} us  p90={p90 * 1e6:9.1f} us")
+
+
+async def measure(client, calls: int, tool: str, arguments: dict) -> list:
+    for _ in range(min(calls, 20)):  # warm-up
+        await client.call_tool(tool, arguments)
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        result = await client.call_tool(tool, arguments)
+        latencies.append(time.perf_counter() - start)
+        assert not result.isError, result
+    return latencies
+
+
+async def bench(params: StdioServerParameters, server, calls: int, kb: int):
+    for transport in TRANSPORTS:
+        if transport == "stdio":
+            from agent.mcp_pool import MCPSessionPool
+            context = MCPSessionPool(params, size=1, standby=0, affinity={})
+        else:
+            context = connect_mcp(params, transport, server=server)
+        async with context as client:
+            report(f"{transport} echo", await measure(client, calls, "echo", {"text": "ping"}))
+            report(f"{transport} {kb} KB", await measure(client, calls, "documents", {"kb": kb}))
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    kb = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    print(f"{calls} sequential calls per transport and tool\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "overhead_server.py"
+        path.write_text(STUB_SERVER)
+        spec = importlib.util.spec_from_file_location("overhead_server", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        params = StdioServerParameters(command=sys.executable, args=[str(path)], env=dict(os.environ))
+        asyncio.run(bench(params, module.mcp, calls, kb))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Single-frame CPU latency of each vision backend on the coco8 sample images.
+
+Backends without an export on disk are skipped (see tools/vision/export.py).
+
+Usage:
+    python Tests/bench_vision_backends.py [rounds]
+"""
+import sys
+import time
+import statistics
+from pathlib import Path
+
+import cv2
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import VISION_CONF, VISION_IOU
+from tools.vision.backends import artifact_path, load_backend
+from tools.vision.yolo import MODEL_PATH
+
+COCO8_DIR = project_root / "src" / "MCP_Server" / "tools" / "computer_vision" / "coco8" / "images"
+VARIANTS = [("torch", False), ("onnx", False), ("onnx", True), ("openvino", False), ("openvino", True)]
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    frames = [cv2.imread(str(p)) for p in sorted(COCO8_DIR.glob("*/*.jpg"))]
+
+    print(f"{'backend':<14} {'load s':>7} {'mean ms':>8} {'p50 ms':>8} {'p90 ms':>8}")
+    for backend, int8 in VARIANTS:
+        label = backend + (" int8" if int8 else "")
+        if not artifact_path(MODEL_PATH, backend, int8).exists():
+            print(f"{label:<14} (not exported, skipped)")
+            continue
+
+        start = time.perf_counter()
+        model = load_backend(MODEL_PATH, backend, int8)
+        model.detect(frames[:1], VISION_CONF, VISION_IOU)  # warm-up
+        load_seconds = time.perf_counter() - start
+
+        samples = []
+        for _ in range(rounds):
+            for frame in frames:
+                start = time.perf_counter()
+                model.detect([frame], VISION_CONF, VISION_IOU)
+                samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        print(f"{label:<14} {load_seconds:>7.2f} {statistics.mean(samples):>8.1f} "
+              f"{statistics.median(samples):>8.1f} {samples[int(0.9 * (len(samples) - 1))]:>8.1f}")
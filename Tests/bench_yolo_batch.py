@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Throughput of batched YOLO inference on CPU (frames/sec at batch sizes 1/4/8/16).
+
+Each batch size is compared against running the same frames one at a time.
+
+Usage:
+    python Tests/bench_yolo_batch.py [rounds]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import VISION_CONF, VISION_IOU
+from tools.vision.yolo import MODEL_PATH
+from tools.vision.model_pool import get_model_pool
+from tools.vision.batch import detect_batch
+
+BATCH_SIZES = [1, 4, 8, 16]
+
+
+def synthetic_frames(count: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def fps_batched(frames: list, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        detect_batch(frames)
+    return len(frames) * rounds / (time.perf_counter() - start)
+
+
+def fps_sequential(frames: list, rounds: int) -> float:
+    pool = get_model_pool(MODEL_PATH)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            with pool.acquire() as model:
+                model.detect([frame], VISION_CONF, VISION_IOU)
+    return len(frames) * rounds / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    if not MODEL_PATH.exists():
+        print(f"Model not found at {MODEL_PATH}")
+        sys.exit(1)
+
+    get_model_pool(MODEL_PATH).load()
+    print(f"{'batch':>5}  {'batched fps':>12}  {'sequential fps':>15}  {'speedup':>8}")
+    for size in BATCH_SIZES:
+        frames = synthetic_frames(size, seed=size)
+        detect_batch(frames)  # warm the batch shape
+        batched = fps_batched(frames, rounds)
+        sequential = fps_sequential(frames, rounds)
+        print(f"{size:>5}  {batched:>12.1f}  {sequential:>15.1f}  {batched / sequential:>7.2f}x")
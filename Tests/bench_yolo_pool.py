@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold vs warm YOLO latency on synthetic frames.
+
+Cold: build a fresh YOLO instance and run one inference (the old per-call path).
+Warm: borrow a preloaded instance from the shared model pool.
+
+Usage:
+    python Tests/bench_yolo_pool.py [iterations] [threads]
+"""
+import sys
+import time
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import VISION_CONF, VISION_IOU
+from tools.vision.backends import load_backend
+from tools.vision.yolo import MODEL_PATH
+from tools.vision.model_pool import get_model_pool
+
+
+def synthetic_frame(seed: int) -> np.ndarray:
+    """640x480 BGR noise frame."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+
+
+def report(label: str, samples: list):
+    samples = sorted(samples)
+    p90 = samples[int(0.9 * (len(samples) - 1))]
+    print(f"{label:<22} n={len(samples):<3} mean={statistics.mean(samples) * 1000:8.1f} ms  "
+          f"p50={statistics.median(samples) * 1000:8.1f} ms  p90={p90 * 1000:8.1f} ms")
+
+
+def bench_cold(iterations: int) -> list:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        model = load_backend(MODEL_PATH)
+        model.detect([synthetic_frame(i)], VISION_CONF, VISION_IOU)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_warm(iterations: int) -> list:
+    pool = get_model_pool(MODEL_PATH)
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        with pool.acquire() as model:
+            model.detect([synthetic_frame(i)], VISION_CONF, VISION_IOU)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_concurrent(iterations: int, threads: int) -> list:
+    pool = get_model_pool(MODEL_PATH)
+
+    def one(i):
+        start = time.perf_counter()
+        with pool.acquire() as model:
+            model.detect([synthetic_frame(i)], VISION_CONF, VISION_IOU)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(one, range(iterations)))
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    if not MODEL_PATH.exists():
+        print(f"Model not found at {MODEL_PATH}")
+        sys.exit(1)
+
+    report("cold (load + infer)", bench_cold(iterations))
+
+    pool = get_model_pool(MODEL_PATH)
+    pool.load()
+    print(f"Pool startup: {pool.size} instance(s) loaded and warmed in {pool.load_seconds:.2f}s")
+
+    report("warm (pooled)", bench_warm(iterations * 4))
+    report(f"warm x{threads} threads", bench_concurrent(iterations * 4, threads))
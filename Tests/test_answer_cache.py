@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the semantic answer cache: near-duplicate matching, per-intent
+freshness (time and vision never cached) and index bounds.
+
+Usage:
+    python Tests/test_answer_cache.py [entries]
+"""
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import agent.answer_cache as answer_cache
+from agent.answer_cache import AnswerCache, embed, cosine, needs_context, query_intent
+from agent.tool_cache import file_version
+
+TTLS = {"time": 0, "vision": 0, "live": 0.05, "navigation": None, "general": 60}
+
+
+def test_intents():
+    assert query_intent("what time is it in dubai right now?") == "time"
+    assert query_intent("what am i seeing?") == "vision"
+    assert query_intent("how can i fix this?") == "vision"
+    assert query_intent("How do I get from Entrance to Dean Office?") == "navigation"
+    assert query_intent("how much is an iphone 13?") == "live"
+    assert query_intent("what is the integration of velocity?") == "general"
+    assert needs_context("tell me more about it") and not needs_context("what should i have for dinner?")
+    print("PASS: intents from cue words")
+
+
+def test_near_duplicates():
+    cache = AnswerCache(threshold=0.9, ttls=TTLS)
+    cache.store("What should I have for dinner?", "Try a lentil soup.")
+    cache.store("How do I get from Entrance to Dean Office?", "Take the elevator to Floor 1, then right.")
+    cache.store("recommend me 10 things i can have for dinner.", "1. Soup ...")
+
+    hit = cache.lookup("what should i have for dinner")
+    assert hit and hit["answer"] == "Try a lentil soup." and hit["similarity"] >= 0.9
+    assert cache.lookup("how do i get from the entrance to the dean office?")["answer"].startswith("Take")
+
+    # Close wording, different question
+    assert cache.lookup("How do I get from Entrance to Elevator G?") is None
+    assert cache.lookup("recommend me 5 things i can have for dinner.") is None
+    assert cache.lookup("what is the derivative of velocity?") is None
+    cache.store("what is the capital of Nigeria?", "Abuja.")
+    assert cosine(embed("what is the capital of niger"), embed("what is the capital of nigeria")) >= 0.9
+    assert cache.lookup("what is the capital of Niger?") is None  # same n-grams, different country
+    assert cache.lookup("What is the capital of nigeria")["answer"] == "Abuja."
+    assert cosine(embed("weather in cairo"), embed("weather in paris")) < 0.9
+    print(f"PASS: near duplicates served, different questions missed ({cache.summary()})")
+
+
+def test_freshness():
+    cache = AnswerCache(ttls=TTLS)
+    for query in ["what time is it right now?", "what is infront of me?"]:
+        cache.store(query, "stale")
+        assert cache.lookup(query) is None, f"{query!r} must never be cached"
+    assert cache.stats["stored"] == 0
+
+    cache.store("what's the weather in cairo today?", "Sunny, 31C")
+    assert cache.lookup("whats the weather in cairo today")["answer"] == "Sunny, 31C"
+    time.sleep(0.1)
+    assert cache.lookup("whats the weather in cairo today") is None and cache.stats["expired"] == 1
+
+    # No live cue word, but the answer came from a web search: it expires like live data
+    cache.store("who is the ceo of twitter?", "Linda Yaccarino.", tools=["search_web"])
+    cache.store("what is the boiling point of ethanol?", "78.4 C.", tools=[])
+    assert cache.lookup("who is the ceo of twitter")["answer"] == "Linda Yaccarino."
+    time.sleep(0.1)
+    assert cache.lookup("who is the ceo of twitter") is None
+    assert cache.lookup("what is the boiling point of ethanol")["answer"] == "78.4 C."
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = Path(tmp) / "graph.json"
+        graph.write_text("{}")
+        versions, answer_cache.DATA_VERSIONS = answer_cache.DATA_VERSIONS, {"navigation": lambda: file_version(graph)}
+        try:
+            cache.store("directions from Entrance to Floor 1", "Walk 20 steps, take the elevator.")
+            assert cache.lookup("directions from entrance to floor 1")
+            graph.write_text('{"Entrance": {}}')
+            assert cache.lookup("directions from entrance to floor 1") is None, "graph changed: answer is stale"
+        finally:
+            answer_cache.DATA_VERSIONS = versions
+    print("PASS: time/vision never cached, live and navigation answers expire")
+
+
+def test_bounds_and_speed(count: int = 2000):
+    cache = AnswerCache(max_entries=count // 2, ttls=TTLS)
+    for i in range(count):
+        cache.store(f"question number {i} about topic {i % 37}", f"answer {i}")
+    assert len(cache.entries) == len(cache.index) == count // 2
+    assert cache.stats["evicted"] == count - count // 2
+
+    start = time.perf_counter()
+    for i in range(100):
+        cache.lookup(f"question number {count - 1 - i} about topic {(count - 1 - i) % 37}")
+    per_lookup = (time.perf_counter() - start) / 100 * 1000
+    assert cache.stats["hits"] == 100
+    print(f"PASS: bounded to {count // 2} entries, {per_lookup:.2f}ms per lookup")
+
+
+if __name__ == "__main__":
+    test_intents()
+    test_near_duplicates()
+    test_freshness()
+    test_bounds_and_speed(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
+    print("\nSUCCESS: All answer cache tests passed!")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM API client against a local stub OpenAI-compatible server.
+
+Checks keep-alive connection reuse, retry on 429/5xx honoring Retry-After,
+SSE streaming, and prints latency percentiles over pooled requests.
+
+Usage:
+    python Tests/test_api_client.py [requests]
+"""
+import sys
+import json
+import time
+import asyncio
+import statistics
+from pathlib import Path
+
+from aiohttp import web
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agent.api_llm import APIError, CerebrasAPIClient
+from agent.decision_parser import StreamingDecisionParser
+
+STREAM_DECISION = '<json>{"reasoning": "", "tool": null, "args": {}, "ask_user": null, "is_satisfied": true, "answer": "It is sunny. Take \\"sunglasses\\"."}</json>'
+
+
+class StubServer:
+    """
+    Minimal /v1/chat/completions and /v1/models server.
+
+    `failures` is a queue of (status, headers) to return first; streamed
+    requests get STREAM_DECISION in small SSE chunks.
+    """
+
+    def __init__(self):
+        self.failures = []
+        self.calls = 0
+        self.url = None
+        self._runner = None
+
+    async def chat(self, request):
+        self.calls += 1
+        payload = await request.json()
+        if self.failures:
+            status, headers = self.failures.pop(0)
+            return web.Response(status=status, headers=headers, text="stub failure")
+        if payload.get("stream"):
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            for i in range(0, len(STREAM_DECISION), 7):
+                chunk = {"choices": [{"delta": {"content": STREAM_DECISION[i:i + 7]}}]}
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await response.write(b"data: [DONE]\n\n")
+            return response
+        return web.json_response({"choices": [{"message": {"role": "assistant", "content": "ok"}}]})
+
+    async def models(self, request):
+        return web.json_response({"data": []})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat)
+        app.router.add_get("/v1/models", self.models)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/v1"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+def client_for(server, **kwargs):
+    return CerebrasAPIClient(server.url, "test-key", "stub-model", **kwargs)
+
+
+async def check_connection_reuse(count: int):
+    async with StubServer() as server, client_for(server) as client:
+        await client.warmup()
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            assert await client.chat_completion([{"role": "user", "content": "hi"}]) == "ok"
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        stats = client.stats
+        assert stats["connections_created"] == 1, stats
+        assert stats["connections_reused"] == count, stats
+        latencies.sort()
+        print(f"  {count} requests on 1 connection: p50={statistics.median(latencies):.2f}ms "
+              f"p99={latencies[int(0.99 * (len(latencies) - 1))]:.2f}ms")
+
+
+async def check_retry_after():
+    async with StubServer() as server, client_for(server, backoff_base=0.01) as client:
+        server.failures = [(429, {"Retry-After": "0.3"}), (503, {})]
+        start = time.perf_counter()
+        assert await client.chat_completion([{"role": "user", "content": "hi"}]) == "ok"
+        elapsed = time.perf_counter() - start
+
+        assert server.calls == 3
+        assert client.stats["retries"] == 2
+        assert elapsed >= 0.3, f"Retry-After not honored ({elapsed:.3f}s)"
+
+
+async def check_gives_up():
+    async with StubServer() as server, client_for(server, retries=2, backoff_base=0.01) as client:
+        server.failures = [(500, {})] * 5
+        try:
+            await client.chat_completion([{"role": "user", "content": "hi"}])
+            raise AssertionError("expected APIError")
+        except APIError as e:
+            assert e.status == 500
+        assert server.calls == 3
+
+        # Client errors are not retried
+        server.failures = [(400, {})]
+        server.calls = 0
+        try:
+            await client.chat_completion([{"role": "user", "content": "hi"}])
+            raise AssertionError("expected APIError")
+        except APIError as e:
+            assert e.status == 400
+        assert server.calls == 1
+
+    # A Retry-After longer than the largest backoff fails at once, for the router or local model
+    async with StubServer() as server, client_for(server, backoff_base=0.01, backoff_max=1.0) as client:
+        server.failures = [(429, {"Retry-After": "120"})]
+        start = time.perf_counter()
+        try:
+            await client.chat_completion([{"role": "user", "content": "hi"}])
+            raise AssertionError("expected APIError")
+        except APIError as e:
+            assert e.status == 429
+        assert server.calls == 1 and time.perf_counter() - start < 1.0
+
+
+async def check_streaming():
+    async with StubServer() as server, client_for(server) as client:
+        answer = []
+        parser = StreamingDecisionParser(on_answer=answer.append)
+        deltas = 0
+        async for delta in client.chat_completion_stream([{"role": "user", "content": "weather?"}]):
+            parser.feed(delta)
+            deltas += 1
+
+        assert parser.buffer == STREAM_DECISION
+        assert deltas > 1
+        assert "".join(answer) == 'It is sunny. Take "sunglasses".'
+        assert len(answer) > 1, "answer should arrive in pieces"
+
+
+def test_connection_reuse(count: int = 50):
+    asyncio.run(check_connection_reuse(count))
+    print("PASS: requests reuse the warmed-up connection")
+
+
+def test_retry_after():
+    asyncio.run(check_retry_after())
+    print("PASS: 429/503 retried, Retry-After honored")
+
+
+def test_gives_up():
+    asyncio.run(check_gives_up())
+    print("PASS: retries bounded, 4xx and long Retry-After not retried")
+
+
+def test_streaming():
+    asyncio.run(check_streaming())
+    print("PASS: answer streamed incrementally from SSE deltas")
+
+
+if __name__ == "__main__":
+    test_connection_reuse(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
+    test_retry_after()
+    test_gives_up()
+    test_streaming()
+    print("\nSUCCESS: All API client tests passed!")
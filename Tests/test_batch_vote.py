@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for temporal label voting across a batch of frames
+(tools/vision/batch.py). No model needed.
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from tools.vision.batch import stable_labels, summarize_batch, temporal_vote
+
+# Best confidence per label in each of four frames
+FRAMES = [
+    {"person": 0.9, "chair": 0.4},
+    {"person": 0.8},
+    {"person": 0.7, "chair": 0.6, "cup": 0.3},
+    {"person": 0.8},
+]
+
+
+def batch_result(per_frame, vote_ratio):
+    aggregate = temporal_vote(per_frame)
+    return {"frames": per_frame, "aggregate": aggregate, "stable": stable_labels(aggregate, vote_ratio)}
+
+
+def test_temporal_vote():
+    aggregate = temporal_vote(FRAMES)
+    assert aggregate["person"] == {"frames": 4, "ratio": 1.0, "max_conf": 0.9, "mean_conf": 0.8}
+    assert aggregate["chair"] == {"frames": 2, "ratio": 0.5, "max_conf": 0.6, "mean_conf": 0.5}
+    assert aggregate["cup"] == {"frames": 1, "ratio": 0.25, "max_conf": 0.3, "mean_conf": 0.3}
+    assert temporal_vote([]) == {}
+    assert temporal_vote([{}, {}]) == {}
+    print("PASS: per-label frame counts, ratios and confidences")
+
+
+def test_vote_threshold():
+    aggregate = temporal_vote(FRAMES)
+    assert stable_labels(aggregate, 0.5) == ["chair", "person"]  # a ratio equal to the threshold counts
+    assert stable_labels(aggregate, 0.51) == ["person"]
+    assert stable_labels(aggregate, 0.25) == ["chair", "cup", "person"]
+    assert stable_labels(aggregate, 1.0) == ["person"]
+    assert stable_labels({}, 0.5) == []
+    print("PASS: labels are stable from the vote ratio up")
+
+
+def test_summarize_batch():
+    assert summarize_batch({"frames": [], "aggregate": {}, "stable": []}) == "No frames available for detection."
+    assert summarize_batch(batch_result([{}, {"cup": 0.3}, {}], 0.5)) == \
+        "No objects consistently detected across 3 frames."
+    assert summarize_batch(batch_result(FRAMES, 0.5)) == "Detected: chair (2/4 frames), person (4/4 frames)"
+    assert summarize_batch(batch_result(FRAMES, 0.75)) == "Detected: person (4/4 frames)"
+    print("PASS: summary lists only the stable labels")
+
+
+if __name__ == "__main__":
+    test_temporal_vote()
+    test_vote_threshold()
+    test_summarize_batch()
+    print("\nSUCCESS: All batch vote tests passed!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Headless tests for the capture service using the synthetic frame source.
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from tools.vision.capture import CaptureService, SyntheticSource, FrameSource
+
+
+def test_ring_buffer_is_bounded():
+    """Buffer never grows past its size and keeps the newest frames."""
+    service = CaptureService(SyntheticSource(width=64, height=48, fps=200), buffer_size=4)
+    service.start()
+    try:
+        assert service.latest(timeout=2) is not None
+        time.sleep(0.2)
+        frames = service.recent(10)
+        assert len(frames) == 4, len(frames)
+        indices = [f.index for f in frames]
+        assert indices == sorted(indices)
+        timestamps = [f.timestamp for f in frames]
+        assert timestamps == sorted(timestamps)
+        assert service.latest().index >= indices[-1]
+    finally:
+        service.stop()
+    print("PASS: ring buffer bounded and ordered")
+
+
+def test_frames_are_shared_not_copied():
+    """Readers get the buffered array itself, protected against writes."""
+    service = CaptureService(SyntheticSource(width=64, height=48, fps=0), buffer_size=2)
+    service.start()
+    try:
+        service.latest(timeout=2)
+        service.stop()
+        a = service.latest()
+        b = service.recent(1)[0]
+        assert a.image is b.image
+        assert not a.image.flags.writeable
+    finally:
+        service.stop()
+    print("PASS: frames shared zero-copy and read-only")
+
+
+def test_stale_frames_are_ignored():
+    """max_age filters out frames from a stalled source."""
+    service = CaptureService(SyntheticSource(width=64, height=48, fps=0), buffer_size=2)
+    service.start()
+    service.latest(timeout=2)
+    service.stop()
+    time.sleep(0.1)
+    assert service.latest(max_age=0.05) is None
+    assert service.latest() is not None
+    print("PASS: stale frames ignored")
+
+
+def test_unavailable_source():
+    """A source that never opens yields no frame instead of hanging."""
+    class DeadSource(FrameSource):
+        def open(self):
+            return False
+
+    service = CaptureService(DeadSource(), reopen_delay=0.05)
+    service.start()
+    try:
+        assert service.latest(timeout=0.2) is None
+        assert service.stats()["error"]
+    finally:
+        service.stop()
+    print("PASS: unavailable source handled")
+
+
+if __name__ == "__main__":
+    test_ring_buffer_is_bounded()
+    test_frames_are_shared_not_copied()
+    test_stale_frames_are_ignored()
+    test_unavailable_source()
+    print("\nSUCCESS: All capture service tests passed!")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for the native (function calling / JSON schema) and prompt decision paths.
+
+A stub OpenAI-compatible server plays the LLM and an in-memory MCP session
+provides the tool catalog.
+"""
+import sys
+import json
+import asyncio
+from pathlib import Path
+
+from aiohttp import web
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import agent.api_llm as api_llm
+from agent.api_llm import CerebrasAPIClient, decide, decision_stats
+
+PROMPT_REPLY = '<json>{"tool": "search_web", "args": {"query": "time in Cairo"}, "is_satisfied": false,}</json>'
+
+
+class StubLLM:
+    """
+    Answers by request format; `reject_native` makes tools/response_format requests fail with 400,
+    `error` makes every request fail with that 400 message.
+    """
+
+    def __init__(self):
+        self.reject_native = False
+        self.error = None
+        self.payloads = []
+        self.url = None
+
+    async def chat(self, request):
+        payload = await request.json()
+        self.payloads.append(payload)
+        native = "tools" in payload or "response_format" in payload
+        if self.error:
+            return web.Response(status=400, text=self.error)
+        if native and self.reject_native:
+            return web.Response(status=400, text="tools not supported")
+
+        if "tools" in payload:
+            message = {"role": "assistant", "content": None, "tool_calls": [
+                {"id": "1", "type": "function", "function": {"name": "VisionDetect", "arguments": "{}"}},
+                {"id": "2", "type": "function",
+                 "function": {"name": "search_web", "arguments": json.dumps({"query": "mug price"})}},
+            ]}
+        elif "response_format" in payload:
+            content = json.dumps({"tool_calls": [], "reasoning": "", "ask_user": None,
+                                  "is_satisfied": True, "answer": "It is noon."})
+            message = {"role": "assistant", "content": content}
+        elif payload.get("stream"):
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            await response.write(f"data: {json.dumps({'choices': [{'delta': {'content': PROMPT_REPLY}}]})}\n\n".encode())
+            await response.write(b"data: [DONE]\n\n")
+            return response
+        else:
+            message = {"role": "assistant", "content": PROMPT_REPLY}
+        return web.json_response({"choices": [{"message": message}], "usage": {"prompt_tokens": 10}})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+def make_server() -> FastMCP:
+    server = FastMCP(name="decision-test")
+
+    @server.tool()
+    def VisionDetect() -> str:
+        """Detect objects in front of the user."""
+        return "Detected: mug"
+
+    @server.tool()
+    def search_web(query: str) -> str:
+        """Search the web."""
+        return query
+
+    return server
+
+
+async def check_backends():
+    async with StubLLM() as llm, CerebrasAPIClient(llm.url, "key", "stub") as client, \
+            create_connected_server_and_client_session(make_server()) as session:
+        api_llm._api_client = client
+        try:
+            # Function calling: MCP tools become function schemas, parallel calls come back natively
+            api_llm.DECISION_BACKEND = "tools"
+            decision = await decide("what is this and what does it cost", [], set(), session, "thinking")
+            assert [c["tool"] for c in decision["tool_calls"]] == ["VisionDetect", "search_web"]
+            functions = {f["function"]["name"]: f["function"] for f in llm.payloads[-1]["tools"]}
+            assert set(functions) == {"VisionDetect", "search_web", "ask_user"}
+            assert functions["search_web"]["parameters"]["required"] == ["query"]
+
+            # JSON schema output: tool names restricted to the catalog
+            api_llm.DECISION_BACKEND = "json_schema"
+            answer = []
+            decision = await decide("what time is it", [], set(), session, "quick", on_answer=answer.append)
+            assert decision["is_satisfied"] and answer == ["It is noon."]
+            schema = llm.payloads[-1]["response_format"]["json_schema"]["schema"]
+            assert schema["properties"]["tool_calls"]["items"]["properties"]["tool"]["enum"] == ["VisionDetect", "search_web"]
+
+            # A 400 about this request (not the format) doesn't turn native decisions off
+            llm.error = "This model's maximum context length is 8192 tokens"
+            decision = await decide("what time is it", [], set(), session, "quick")
+            assert decision.get("error") and decision_stats()["native_unsupported"] == {}
+            llm.error = None
+            native = dict(decision_stats()["native"])
+
+            # Unsupported by the endpoint: fall back to the prompt parser (which repairs the trailing comma)
+            llm.reject_native = True
+            decision = await decide("what time is it", [], set(), session, "quick")
+            assert decision["tool"] == "search_web" and decision["args"] == {"query": "time in Cairo"}
+            assert "tools" not in llm.payloads[-1] and "response_format" not in llm.payloads[-1]
+
+            stats = decision_stats()
+            assert api_llm.TIER_MODELS["small"] in stats["native_unsupported"]
+            assert stats["native_unsupported"][api_llm.TIER_MODELS["small"]] == llm.url
+            assert stats["native"]["fallbacks"] == native["fallbacks"] + 1
+            assert not api_llm.native_supported(api_llm.TIER_MODELS["small"])
+            print(f"  {stats}")
+        finally:
+            api_llm._api_client = None
+
+
+def test_decision_backends():
+    asyncio.run(check_backends())
+    print("PASS: native decisions with prompt-parser fallback")
+
+
+if __name__ == "__main__":
+    test_decision_backends()
+    print("\nSUCCESS: All decision backend tests passed!")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the scene-change-gated detection cache (no model needed).
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import VISION_CACHE_THRESHOLD
+from tools.vision.detection_cache import DetectionCache, frame_signature
+from tools.vision.detections import Detections
+
+NAMES = {0: "person", 1: "chair"}
+
+
+def scene(brightness: int, noise: int = 0, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    frame = np.full((480, 640, 3), brightness, dtype=np.int16)
+    if noise:
+        frame += rng.integers(-noise, noise + 1, size=frame.shape, dtype=np.int16)
+    return frame.clip(0, 255).astype(np.uint8)
+
+
+def test_same_scene_hits():
+    """Sensor noise on an unchanged scene still counts as a hit."""
+    cache = DetectionCache(threshold=0.03, ttl=10)
+    detections = Detections.empty(NAMES, (480, 640))
+    cache.store(frame_signature(scene(100, seed=1)), "k", detections)
+
+    assert cache.lookup(frame_signature(scene(100, noise=6, seed=2)), "k") is detections
+    assert cache.stats()["hits"] == 1
+    print("PASS: unchanged scene served from cache")
+
+
+def test_scene_change_misses():
+    """A real change in the scene, or different parameters, runs the model again."""
+    cache = DetectionCache(threshold=0.03, ttl=10)
+    cache.store(frame_signature(scene(100)), "k", Detections.empty(NAMES))
+
+    assert cache.lookup(frame_signature(scene(180)), "k") is None
+    assert cache.lookup(frame_signature(scene(100)), "other-params") is None
+    assert cache.stats()["misses"] == 2
+    print("PASS: changed scene or parameters miss")
+
+
+def test_small_object_misses():
+    """A small object entering a static scene is a change, even though the frame-wide mean barely moves."""
+    cache = DetectionCache(threshold=VISION_CACHE_THRESHOLD, ttl=10)
+    empty_room = scene(100, noise=6, seed=1)
+    cache.store(frame_signature(empty_room), "k", Detections.empty(NAMES))
+
+    assert cache.lookup(frame_signature(scene(100, noise=6, seed=2)), "k") is not None
+    with_cup = empty_room.copy()
+    with_cup[300:330, 417:447] = 30  # 30x30 pixels: 0.3% of the frame
+    assert cache.lookup(frame_signature(with_cup), "k") is None
+    print("PASS: small object entering the scene misses")
+
+
+def test_ttl_expires():
+    cache = DetectionCache(threshold=0.03, ttl=0.05)
+    cache.store(frame_signature(scene(100)), "k", Detections.empty(NAMES))
+    time.sleep(0.1)
+    assert cache.lookup(frame_signature(scene(100)), "k") is None
+    assert cache.stats()["entries"] == 0
+    print("PASS: entries expire after TTL")
+
+
+if __name__ == "__main__":
+    test_same_scene_hits()
+    test_scene_change_misses()
+    test_small_object_misses()
+    test_ttl_expires()
+    print("\nSUCCESS: All detection cache tests passed!")
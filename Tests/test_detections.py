@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for structured detection results and class filters
+(tools/vision/detections.py). No model needed.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from tools.vision.detections import Detections, resolve_classes
+
+NAMES = {0: "person", 1: "chair", 2: "dining table", 56: "Cup"}
+
+
+def detections(class_ids, confidences) -> Detections:
+    return Detections(
+        boxes=np.tile(np.array([[10, 20, 110, 220]], dtype=np.float32), (len(class_ids), 1)),
+        confidences=np.array(confidences, dtype=np.float32),
+        class_ids=np.array(class_ids, dtype=np.int32),
+        names=NAMES,
+        image_size=(480, 640),
+    )
+
+
+def test_resolve_by_name_and_id():
+    assert resolve_classes(NAMES, None) is None
+    assert resolve_classes(NAMES, []) is None
+    assert resolve_classes(NAMES, ["person"]) == [0]
+    assert resolve_classes(NAMES, [" Chair ", "CUP", "Dining Table"]) == [1, 2, 56]
+    assert resolve_classes(NAMES, [56, "1", 0]) == [0, 1, 56]
+    assert resolve_classes(NAMES, ["person", 0, "0"]) == [0]
+    print("PASS: class names (any case) and ids resolve to sorted unique ids")
+
+
+def test_resolve_unknown():
+    for classes, message in ((["giraffe"], "Unknown class: giraffe"),
+                             ([7], "Unknown class id: 7"),
+                             (["person", "99"], "Unknown class id: 99")):
+        try:
+            resolve_classes(NAMES, classes)
+            raise AssertionError(f"accepted {classes}")
+        except ValueError as e:
+            assert message in str(e), e
+    try:
+        resolve_classes(NAMES, ["table"])
+        raise AssertionError("accepted a partial name")
+    except ValueError as e:
+        assert "Known classes: chair, cup, dining table, person" in str(e), e
+    print("PASS: unknown classes raise ValueError listing the known ones")
+
+
+def test_best_confidences():
+    found = detections([0, 1, 0, 56], [0.41234, 0.9, 0.87654, 0.5])
+    assert found.labels() == ["person", "chair", "person", "Cup"]
+    assert found.best_confidences() == {"person": 0.877, "chair": 0.9, "Cup": 0.5}
+    assert Detections.empty(NAMES).best_confidences() == {}
+    print("PASS: best confidence per class")
+
+
+def test_summary_and_dict():
+    found = detections([1, 0, 1], [0.6, 0.7, 0.8])
+    assert len(found) == 3
+    assert found.summary() == "Detected: chair, person"
+    data = found.to_dict()
+    assert data["names"] == {"0": "person", "1": "chair"}
+    assert data["class_ids"] == [1, 0, 1]
+    assert data["image_size"] == [480, 640]
+    assert data["boxes"][0] == [10.0, 20.0, 110.0, 220.0]
+
+    empty = Detections.empty(NAMES, (480, 640))
+    assert len(empty) == 0
+    assert "no objects detected" in empty.summary()
+    assert empty.to_dict()["names"] == {}
+    print("PASS: summary and dict only list detected classes")
+
+
+if __name__ == "__main__":
+    test_resolve_by_name_and_id()
+    test_resolve_unknown()
+    test_best_confidences()
+    test_summary_and_dict()
+    print("\nSUCCESS: All detections tests passed!")
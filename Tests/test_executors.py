@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for the execution layer (shared/executors.py): tool declarations, the
+bounded I/O pool, the CPU process pool and its recovery after a worker dies,
+and offloaded tools served concurrently by an MCP server.
+"""
+import os
+import sys
+import time
+import asyncio
+import inspect
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import shared.executors as executors
+from shared.executors import cpu_call, executor_stats, offload, run_cpu, run_io, shutdown_executors
+
+
+def slow_lookup(query: str, limit: int = 3) -> dict:
+    """Blocking stand-in for search_web."""
+    time.sleep(0.2)
+    return {"query": query, "limit": limit}
+
+
+def worker_pid() -> int:
+    return os.getpid()
+
+
+def crash_worker():
+    os._exit(1)
+
+
+def test_declarations():
+    def undeclared(x: int) -> int:
+        return x
+
+    assert offload(undeclared) is undeclared  # no TOOL_POOLS entry: stays on the event loop
+
+    tool = offload(slow_lookup, "io")
+    assert inspect.iscoroutinefunction(tool) and tool.pool == "io"
+    assert list(inspect.signature(tool).parameters) == ["query", "limit"]
+    assert tool.__name__ == "slow_lookup" and tool.__doc__ == slow_lookup.__doc__
+
+    for pool in ("gpu", "cpu"):  # CPU work is handed on inside the tool with cpu_call()
+        try:
+            offload(slow_lookup, pool)
+            raise AssertionError(f"pool {pool!r} accepted")
+        except ValueError:
+            pass
+
+    def search_web(query: str) -> dict:
+        return {}
+    assert offload(search_web).pool == "io"  # declared in config.settings.TOOL_POOLS
+    print("PASS: tools are offloaded to the pool they declare")
+
+
+async def check_io_pool():
+    tool = offload(slow_lookup, "io")
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(tool(f"q{i}", limit=i) for i in range(4)))
+    elapsed = time.perf_counter() - start
+    ticking.cancel()
+
+    assert [r["limit"] for r in results] == [0, 1, 2, 3]
+    assert elapsed < 0.5, elapsed  # 4 x 0.2 s would take 0.8 s back to back
+    assert ticks >= 10, ticks  # the loop kept running meanwhile
+    assert executor_stats()["io"]["peak_active"] >= 4
+
+
+def test_io_pool():
+    asyncio.run(check_io_pool())
+    print("PASS: blocking calls run side by side without stalling the loop")
+
+
+async def check_cpu_pool():
+    pids = set(await asyncio.gather(*(run_cpu(worker_pid) for _ in range(4))))
+    assert os.getpid() not in pids
+
+    # A dead worker breaks the pool; the next call gets a fresh one
+    try:
+        await run_cpu(crash_worker)
+        raise AssertionError("crash not reported")
+    except BrokenProcessPool:
+        pass
+    assert await run_cpu(worker_pid) != os.getpid()
+    assert executor_stats()["cpu"]["restarts"] == 1
+
+    # cpu_call blocks an I/O thread instead of the loop
+    assert await run_io(cpu_call, worker_pid) != os.getpid()
+
+
+def test_cpu_pool():
+    executors.CPU_POOL_WORKERS = 2
+    try:
+        asyncio.run(check_cpu_pool())
+    finally:
+        shutdown_executors()
+
+    # Without a process pool the work runs in the calling thread
+    executors.CPU_POOL_WORKERS = 0
+    try:
+        assert cpu_call(worker_pid) == os.getpid()
+    finally:
+        executors.CPU_POOL_WORKERS = 2
+    print("PASS: CPU work runs in worker processes that are replaced when they die")
+
+
+async def check_mcp_tools():
+    from mcp.server.fastmcp import FastMCP
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    server = FastMCP("executors-test")
+    server.tool()(offload(slow_lookup, "io"))
+
+    async with create_connected_server_and_client_session(server._mcp_server) as session:
+        tools = (await session.list_tools()).tools
+        assert set(tools[0].inputSchema["properties"]) == {"query", "limit"}
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(session.call_tool("slow_lookup", {"query": f"q{i}"}) for i in range(4)))
+        elapsed = time.perf_counter() - start
+    assert all(not r.isError for r in results)
+    assert elapsed < 0.5, elapsed
+
+
+def test_mcp_tools():
+    asyncio.run(check_mcp_tools())
+    shutdown_executors()
+    print("PASS: an MCP server runs concurrent calls of an offloaded tool side by side")
+
+
+if __name__ == "__main__":
+    test_declarations()
+    test_io_pool()
+    test_cpu_pool()
+    test_mcp_tools()
+    print("\nSUCCESS: All executor tests passed!")
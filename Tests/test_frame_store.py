@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for handing frames between processes through shared memory
+(shared/frame_store.py).
+"""
+import sys
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from shared import frame_store
+from shared.frame_store import open_frame, parse_handle, publish_frame, release_frame
+
+
+def frame(height: int = 48, width: int = 64) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+
+def test_round_trip():
+    image = frame()
+    handle = publish_frame(image)
+    try:
+        name, shape, dtype = parse_handle(handle)
+        assert shape == image.shape and dtype == image.dtype
+
+        with open_frame(handle) as mapped:
+            assert np.array_equal(mapped, image)
+            assert not mapped.flags.writeable
+        # A frame can be opened again until it is released
+        with open_frame(handle) as mapped:
+            assert np.array_equal(mapped, image)
+    finally:
+        release_frame(handle)
+    print("PASS: published frame maps back unchanged and read-only")
+
+
+def test_non_contiguous():
+    image = frame()[:, ::2]
+    handle = publish_frame(image)
+    try:
+        with open_frame(handle) as mapped:
+            assert mapped.shape == image.shape
+            assert np.array_equal(mapped, image)
+    finally:
+        release_frame(handle)
+    print("PASS: non-contiguous frames are copied into place")
+
+
+def test_release():
+    handle = publish_frame(frame())
+    name, _, _ = parse_handle(handle)
+    release_frame(handle)
+    assert handle not in frame_store._published
+
+    try:
+        shared_memory.SharedMemory(name=name)
+        raise AssertionError("released block still exists")
+    except FileNotFoundError:
+        pass
+    try:
+        with open_frame(handle):
+            pass
+        raise AssertionError("released frame opened")
+    except FileNotFoundError:
+        pass
+
+    release_frame(handle)  # releasing twice is harmless
+    print("PASS: released frames are unlinked")
+
+
+def test_unknown_handles():
+    for handle in ("", "no-shape", "name:48xfoo:|u1", "name:48x64x3:not-a-dtype"):
+        try:
+            parse_handle(handle)
+            raise AssertionError(f"accepted {handle!r}")
+        except ValueError:
+            pass
+        try:
+            with open_frame(handle):
+                pass
+            raise AssertionError(f"opened {handle!r}")
+        except ValueError:
+            pass
+
+    try:
+        with open_frame("psm_never_published:48x64x3:|u1"):
+            pass
+        raise AssertionError("opened a block nobody published")
+    except FileNotFoundError:
+        pass
+
+    release_frame("psm_never_published:48x64x3:|u1")  # not ours: ignored
+    print("PASS: malformed and unknown handles are rejected")
+
+
+def test_deferred_close():
+    """A view kept past open_frame delays close() until a later open."""
+    image = frame()
+    handle = publish_frame(image)
+    try:
+        frame_store._close_deferred()  # blocks left open by earlier tests
+        with open_frame(handle) as mapped:
+            kept = mapped
+        assert len(frame_store._deferred_close) == 1
+        assert np.array_equal(kept, image)  # still readable while deferred
+
+        del kept, mapped
+        with open_frame(handle) as mapped:
+            assert frame_store._deferred_close == []
+            assert np.array_equal(mapped, image)
+    finally:
+        release_frame(handle)
+    print("PASS: blocks still in use are closed on a later open")
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_non_contiguous()
+    test_release()
+    test_unknown_handles()
+    test_deferred_close()
+    print("\nSUCCESS: All frame store tests passed!")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tests for the intent router: classification, navigation slots, and direct
+dispatch with 0 (template) or 1 (phrasing) LLM calls against a stub LLM.
+"""
+import sys
+import json
+import asyncio
+from pathlib import Path
+
+from aiohttp import web
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import agent.api_llm as api_llm
+from agent.agent_loop import run_tool
+from agent.api_llm import CerebrasAPIClient
+from agent.intent_router import dispatch, navigation_answer, route_intent
+from agent.sessions import Session
+
+tool_calls = []
+
+
+class StubLLM:
+    """Streams a fixed phrasing and counts requests."""
+
+    def __init__(self):
+        self.requests = 0
+        self.url = None
+
+    async def chat(self, request):
+        self.requests += 1
+        await request.json()
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for piece in ["I can see ", "a laptop ", "and a cup."]:
+            await response.write(f"data: {json.dumps({'choices': [{'delta': {'content': piece}}]})}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+def make_server() -> FastMCP:
+    server = FastMCP(name="router-test")
+
+    @server.tool()
+    def VisionDetect() -> str:
+        tool_calls.append("VisionDetect")
+        return "Detected: laptop, cup"
+
+    @server.tool()
+    def NavigateAStar(start: str, destination: str) -> str:
+        tool_calls.append("NavigateAStar")
+        return (f"Navigation from {start} to {destination}:\n\n1. Walk 20 steps forward (20 steps)\n"
+                "2. Take the elevator to Floor 1 (5 steps)\n\nTotal distance: 25 steps")
+
+    return server
+
+
+def test_routes():
+    cases = {
+        "what time is it right now?": ("time", True, None),
+        "what time is it in dubai right now?": ("time", True, "search_web"),
+        "what am i seeing?": ("vision", True, "VisionDetect"),
+        "How do I get from Entrance to Dean Office?": ("navigation", True, "NavigateAStar"),
+        "take me to the Dean Office from the Entrance": ("navigation", True, "NavigateAStar"),
+        "where is the dean office": ("navigation", False, "NavigateAStar"),  # start unknown
+        "is it raining in london": ("live", False, "search_web"),  # classifier only: hint, no dispatch
+        "what is the integration of velocity?": ("general", False, None),
+        "what is this?": ("vision", True, "VisionDetect"),
+        "what's the date today": ("time", True, None),
+        # A cue word alone doesn't dispatch: these mention time or seeing but aren't about the clock or scene
+        "what time does the museum open": ("time", False, None),
+        "how much time does it take to boil an egg": ("time", False, None),
+        "what is the date of the french revolution": ("time", False, None),
+        "can you see a doctor without insurance": ("vision", False, "VisionDetect"),
+        "what is this word in spanish: gato": ("vision", False, "VisionDetect"),
+    }
+    for query, (intent, direct, tool) in cases.items():
+        route = route_intent(query)
+        assert (route.intent, route.direct, route.tool) == (intent, direct, tool), (query, route.to_dict())
+
+    assert route_intent("How do I get from Entrance to Dean Office?").args == \
+        {"start": "Entrance", "destination": "Dean Office"}
+    assert route_intent("take me to the Dean Office from the Entrance").args == \
+        {"start": "Entrance", "destination": "Dean Office"}
+
+    explicit = route_intent("please use search_web to check the museum hours")
+    assert explicit.explicit and explicit.tool == "search_web" and "MUST use it" in explicit.hint
+    assert route_intent("tell me a joke").hint == ""
+    assert route_intent("how much time does it take to boil an egg").hint == ""  # not a real-time question
+    print("PASS: intents, confidence and navigation slots")
+
+
+async def check_dispatch():
+    async with StubLLM() as llm, CerebrasAPIClient(llm.url, "key", "stub") as client, \
+            create_connected_server_and_client_session(make_server()) as mcp:
+        api_llm._api_client = client
+        try:
+            # Local time: template, no tool, no LLM
+            pieces, metrics = [], {}
+            answer = await dispatch(mcp, route_intent("what time is it?"), "what time is it?", run_tool,
+                                    on_answer=pieces.append, metrics=metrics)
+            assert answer.startswith("It's ") and pieces == [answer]
+            assert metrics["llm_calls"] == 0 and llm.requests == 0 and tool_calls == []
+
+            # Navigation: tool + template
+            query = "How do I get from Entrance to Dean Office?"
+            session = Session("s")
+            answer = await dispatch(mcp, route_intent(query), query, run_tool, metrics=metrics, session=session)
+            assert "\n" not in answer and answer.endswith("Total distance: 25 steps.")
+            assert tool_calls == ["NavigateAStar"] and llm.requests == 0
+            assert session.tool_result("NavigateAStar", {"start": "Entrance", "destination": "Dean Office"})
+            assert [entry.split(":")[0] for entry, _ in session.memory.entries] == \
+                ["User", "Tool(NavigateAStar)", "Answer"]
+
+            # Vision: tool + one phrasing call, streamed
+            pieces, metrics = [], {}
+            answer = await dispatch(mcp, route_intent("what am i seeing?"), "what am i seeing?", run_tool,
+                                    on_answer=pieces.append, metrics=metrics)
+            assert answer == "I can see a laptop and a cup." and len(pieces) == 3
+            assert metrics["llm_calls"] == 1 and llm.requests == 1 and tool_calls[-1] == "VisionDetect"
+
+            # Detections from an uploaded image are used instead of the camera
+            await dispatch(mcp, route_intent("what am i seeing?"), "what am i seeing?", run_tool,
+                           detections="Detected: cup")
+            assert tool_calls.count("VisionDetect") == 1 and llm.requests == 2
+
+            # A failing tool hands the query back to the agent loop
+            async def failing(client, name, args):
+                return False, "Tool error: camera busy"
+            assert await dispatch(mcp, route_intent("what do you see"), "what do you see", failing) is None
+        finally:
+            api_llm._api_client = None
+
+
+def test_dispatch():
+    asyncio.run(check_dispatch())
+    print("PASS: direct routes answered with 0-1 LLM calls")
+
+
+def test_navigation_answer():
+    text = "Navigation from A to B:\n\n1. Go left (3 steps)\n2. Stop\n\nTotal distance: 3 steps"
+    assert navigation_answer(text) == "Navigation from A to B: 1. Go left (3 steps) 2. Stop. Total distance: 3 steps."
+    print("PASS: navigation steps joined into one paragraph")
+
+
+if __name__ == "__main__":
+    test_routes()
+    test_dispatch()
+    test_navigation_answer()
+    print("\nSUCCESS: All intent router tests passed!")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-provider LLM router: catalog limits, routing by latency
+EWMA and quota, hedged requests and failover, against local stub endpoints.
+"""
+import sys
+import json
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+from aiohttp import web
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agent.api_llm import APIError
+from agent.llm_router import LLMRouter, load_catalog, catalog_limits
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+CATALOG = """
+### [Fast](https://fast.example)
+
+<table><thead><tr><th>Model Name</th><th>Model Limits</th></tr></thead><tbody>
+<tr><td>Llama 3.3 70B</td><td>3 requests/minute<br>60,000 tokens/minute</td></tr>
+</tbody></table>
+
+### [Slow](https://slow.example)
+
+**Limits:** 100 requests/minute
+"""
+
+
+class StubProvider:
+    """OpenAI-compatible endpoint answering with its own name after `delay` seconds (or failing with `status`)."""
+
+    def __init__(self, name: str, delay: float):
+        self.name = name
+        self.delay = delay
+        self.status = 200
+        self.models = []
+        self.url = None
+
+    async def chat(self, request):
+        payload = await request.json()
+        self.models.append(payload["model"])
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.Response(status=self.status, text="unavailable")
+        if payload.get("stream"):
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            chunk = {"choices": [{"delta": {"content": self.name}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n".encode())
+            return response
+        return web.json_response({"choices": [{"message": {"role": "assistant", "content": self.name}}],
+                                  "usage": {"total_tokens": 20}})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+    def config(self, model: str) -> dict:
+        return {"name": self.name.capitalize(), "base_url": self.url, "api_key": "key",
+                "models": {"llama3.3-70b": model}}
+
+
+def test_catalog():
+    catalog = load_catalog()
+    assert catalog_limits(catalog, "Cerebras", "llama3.3-70b")["requests/day"] == 14400
+    assert catalog_limits(catalog, "Groq", "llama-3.3-70b-versatile") == {"requests/day": 1000, "tokens/minute": 12000}
+    assert catalog_limits(catalog, "OpenRouter", "meta-llama/llama-3.3-70b-instruct:free")["requests/day"] == 50
+    assert catalog_limits(catalog, "Unknown", "x") == {}
+    print("PASS: provider and model limits read from the catalog")
+
+
+async def make_router(slow, fast, catalog=None):
+    # Slow is listed first: the router has to find out which one is faster
+    router = LLMRouter([slow.config("slow-70b"), fast.config("llama-3.3-70b-fast")], catalog or {},
+                       default_model="llama3.3-70b")
+    return await router.__aenter__()
+
+
+async def check_routing():
+    async with StubProvider("slow", 0.15) as slow, StubProvider("fast", 0.01) as fast:
+        router = await make_router(slow, fast)
+        try:
+            served = [await router.chat_completion(MESSAGES) for _ in range(7)]
+            assert served[:2] == ["slow", "fast"]  # each unmeasured provider is tried once
+            assert served[2:] == ["fast"] * 5
+            assert fast.models[-1] == "llama-3.3-70b-fast"  # provider-specific model ID
+
+            # Primary stalls past its p90: the hedge to the other provider answers first
+            fast.delay = 1.0
+            start = time.perf_counter()
+            assert await router.chat_completion(MESSAGES) == "slow"
+            assert time.perf_counter() - start < 0.6
+            assert router.stats["hedged"] == 1 and router.stats["hedge_wins"] == 1
+
+            # Failover: a 500 puts the provider on cooldown and the next one answers
+            fast.delay = 0.01
+            fast.status = 500
+            endpoints = {e.provider: e for e in router.routes["llama3.3-70b"]}
+            endpoints["Fast"].ewma = 0.0
+            endpoints["Fast"].samples.clear()  # default hedge delay: the 500 comes back before any hedge
+            assert await router.chat_completion(MESSAGES) == "slow"
+            assert router.stats["failovers"] == 1 and not endpoints["Fast"].available(100)
+
+            # Streams fail over before the first delta
+            endpoints["Fast"].cooldown_until = 0.0
+            chunks = [delta async for delta in router.chat_completion_stream(MESSAGES)]
+            assert chunks == ["slow"]
+            print(f"  {router.summary()['endpoints']['Fast/llama-3.3-70b-fast']}")
+        finally:
+            await router.__aexit__(None, None, None)
+
+
+async def check_quota():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "README.md"
+        path.write_text(CATALOG)
+        catalog = load_catalog(path)
+    async with StubProvider("slow", 0.05) as slow, StubProvider("fast", 0.01) as fast:
+        router = await make_router(slow, fast, catalog)
+        try:
+            endpoints = {e.provider: e for e in router.routes["llama3.3-70b"]}
+            endpoints["Fast"].ewma, endpoints["Slow"].ewma = 0.01, 0.05
+            served = [await router.chat_completion(MESSAGES) for _ in range(5)]
+            assert served == ["fast"] * 3 + ["slow"] * 2  # 3 requests/minute at Fast
+            assert endpoints["Fast"].quota.remaining()["requests/minute"] == 0
+            assert endpoints["Fast"].quota.remaining()["tokens/minute"] == 60000 - 3 * 20  # actual usage counted
+
+            # 429: the provider is skipped until its cooldown ends; nothing left means 429 for the caller
+            slow.status = 429
+            try:
+                await router.chat_completion(MESSAGES)
+                assert False, "expected APIError"
+            except APIError as e:
+                assert e.status == 429
+            assert endpoints["Slow"].stats["rate_limited"] == 1
+            try:
+                await router.chat_completion(MESSAGES)
+                assert False, "expected APIError"
+            except APIError as e:
+                assert e.status == 429 and router.stats["no_quota"] == 1
+        finally:
+            await router.__aexit__(None, None, None)
+
+
+def test_routing():
+    asyncio.run(check_routing())
+    print("PASS: fastest provider by EWMA, hedge after p90, failover on errors")
+
+
+def test_quota():
+    asyncio.run(check_quota())
+    print("PASS: providers without quota are skipped")
+
+
+if __name__ == "__main__":
+    test_catalog()
+    test_routing()
+    test_quota()
+    print("\nSUCCESS: All LLM router tests passed!")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the local LLM backend: prompt-prefix cache bookkeeping and the API
+-> local fallback in generate_chat (a second stub endpoint stands in for the
+local client; the llama.cpp worker itself is covered by bench_local_llm.py).
+"""
+import sys
+import asyncio
+from pathlib import Path
+
+from aiohttp import web
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import agent.api_llm as api_llm
+from agent.api_llm import APIError, CerebrasAPIClient, api_unavailable, generate_chat
+from agent.local_llm_worker import PrefixCache, common_prefix
+
+
+def test_prefix_cache():
+    static = list(range(100))
+    first = static + [500, 501]
+    second = static + [600, 601, 602]
+
+    cache = PrefixCache(capacity=2, min_tokens=64)
+    assert cache.lookup(first) == (0, None)
+    assert cache.boundary(first, covered=0) == 0  # nothing to share with yet
+    assert cache.boundary(second, covered=0) == 100  # the static part
+    cache.store(second[:100], "state-100")
+
+    # A later prompt with the same static part restores it; a covered prefix isn't saved twice
+    third = static + [700]
+    assert cache.lookup(third) == (100, "state-100")
+    assert cache.boundary(third, covered=100) == 0
+    assert cache.boundary(list(range(30)) + [9], covered=0) == 0  # too short to be worth a state
+
+    # Least recently used state goes first
+    cache.store(list(range(200, 300)), "b")
+    cache.store(list(range(300, 400)), "c")
+    assert cache.lookup(third) == (0, None) and len(cache.entries) == 2
+    assert common_prefix([1, 2, 3], [1, 2, 4]) == 2
+    print("PASS: shared prompt prefixes saved once and restored by longest match")
+
+
+class StubAPI:
+    def __init__(self, status: int, content: str = ""):
+        self.status = status
+        self.content = content
+        self.calls = 0
+
+    async def chat(self, request):
+        self.calls += 1
+        if self.status != 200:
+            return web.Response(status=self.status, text="down")
+        return web.json_response({"choices": [{"message": {"role": "assistant", "content": self.content}}]})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+async def check_fallback():
+    messages = [{"role": "user", "content": "hi"}]
+    async with StubAPI(503) as api, StubAPI(200, "local answer") as local, \
+            CerebrasAPIClient(api.url, "key", "stub", retries=0) as api_client, \
+            CerebrasAPIClient(local.url, "key", "local") as local_client:
+        api_llm._api_client = api_client
+        try:
+            # No local model: the API error is raised as before
+            try:
+                await generate_chat(messages)
+                assert False, "expected APIError"
+            except APIError as e:
+                assert e.status == 503
+
+            api_llm._local_client = local_client
+            assert await generate_chat(messages) == "local answer"
+            assert await generate_chat(messages) == "local answer"
+            assert api.calls == 2  # the second call went straight to the local model
+
+            # After the retry window the API is tried again
+            api_llm._api_down_until = 0.0
+            api.status = 200
+            api.content = "api answer"
+            assert await generate_chat(messages) == "api answer"
+        finally:
+            api_llm._api_client = None
+            api_llm._local_client = None
+            api_llm._api_down_until = 0.0
+
+    assert api_unavailable(APIError("connection refused")) and api_unavailable(ValueError("no key"))
+    assert not api_unavailable(APIError("bad request", 400))
+
+
+def test_fallback():
+    asyncio.run(check_fallback())
+    print("PASS: unreachable API falls back to the local model for a while")
+
+
+if __name__ == "__main__":
+    test_prefix_cache()
+    test_fallback()
+    print("\nSUCCESS: All local LLM tests passed!")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for the MCP session pool (agent/mcp_pool.py) against stub server
+subprocesses: least-loaded dispatch, tool affinity, replacement of a worker
+killed mid-call by its warm standby, and respawn after a failed health check.
+"""
+import os
+import sys
+import time
+import signal
+import asyncio
+import tempfile
+from pathlib import Path
+
+from mcp import StdioServerParameters
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agent.mcp_pool import MCPSessionPool
+
+# Sync tools block the stub's event loop, like the real server's tools did before offloading
+STUB_SERVER = '''
+import os
+import time
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("stub")
+
+
+@mcp.tool()
+def work(seconds: float) -> str:
+    time.sleep(seconds)
+    return str(os.getpid())
+
+
+@mcp.tool()
+def whoami() -> str:
+    return f"{os.getpid()} {os.environ.get('MCP_WORKER')} {os.environ.get('VISION_PRELOAD')}"
+
+
+@mcp.tool()
+def camera() -> str:
+    return os.environ.get("MCP_WORKER", "")
+
+
+if __name__ == "__main__":
+    mcp.run()
+'''
+
+
+def stub_params(directory: str) -> StdioServerParameters:
+    path = Path(directory) / "stub_server.py"
+    path.write_text(STUB_SERVER)
+    return StdioServerParameters(command=sys.executable, args=[str(path)], env=dict(os.environ))
+
+
+def with_stub(check):
+    """Run check(params) against a stub server written to a temporary directory."""
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(check(stub_params(directory)))
+
+
+def text(result) -> str:
+    return result.content[0].text
+
+
+async def wait_until(condition, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.05)
+
+
+async def check_dispatch(params):
+    async with MCPSessionPool(params, size=3, standby=0, affinity={"camera": 0}) as pool:
+        start = time.perf_counter()
+        pids = [text(r) for r in await asyncio.gather(*(pool.call_tool("work", {"seconds": 0.3}) for _ in range(6)))]
+        elapsed = time.perf_counter() - start
+        assert len(set(pids)) == 3, pids  # spread over every worker
+        assert elapsed < 1.2, elapsed  # 6 x 0.3 s on one worker would take 1.8 s
+
+        # Equal load: one call each; only the slot with a pinned tool preloads the model
+        workers = dict([text(await pool.call_tool("whoami")).split()[1:] for _ in range(3)])
+        assert workers == {"0": "true", "1": "false", "2": "false"}, workers
+
+        assert {text(r) for r in await asyncio.gather(*(pool.call_tool("camera") for _ in range(5)))} == {"0"}
+
+        assert [t.name for t in (await pool.list_tools()).tools] == ["work", "whoami", "camera"]
+        await pool.send_ping()
+        summary = pool.summary()
+        assert summary["ready"] == 3 and summary["calls"] == 14 and summary["inflight"] == 0
+
+
+def test_dispatch():
+    with_stub(check_dispatch)
+    print("PASS: calls go to the least-loaded worker, pinned tools to their slot")
+
+
+async def check_standby(params):
+    # No health checks here, so it is the call that finds the dead worker
+    async with MCPSessionPool(params, size=2, standby=1, affinity={"whoami": 1}, health_interval=3600,
+                              health_timeout=2.0) as pool:
+        await wait_until(lambda: pool.standby and pool.standby[0].ready)
+        pid, slot, _ = text(await pool.call_tool("whoami")).split()
+        assert slot == "1"
+
+        # Killed between calls: the next call loses its connection and is retried on the standby
+        os.kill(int(pid), signal.SIGKILL)
+        await asyncio.sleep(0.1)
+        new_pid, _, preload = text(await pool.call_tool("whoami")).split()
+        assert new_pid != pid and preload == "true"  # the standby had its model loaded already
+        assert pool.stats["promoted"] == 1 and pool.stats["retries"] == 1
+        await wait_until(lambda: pool.standby and pool.standby[0].ready)  # a new standby is started
+
+    # Killed while idle: the health check notices and the slot is refilled
+    async with MCPSessionPool(params, size=2, standby=1, affinity={"whoami": 0}, health_interval=0.3,
+                              health_timeout=2.0) as pool:
+        await wait_until(lambda: pool.standby and pool.standby[0].ready)
+        pid = text(await pool.call_tool("whoami")).split()[0]
+        os.kill(int(pid), signal.SIGKILL)
+        await wait_until(lambda: pool.stats["promoted"] == 1)
+        assert pool.slots[0].ready, pool.summary()
+        assert text(await pool.call_tool("whoami")).split()[0] != pid
+
+
+def test_standby():
+    with_stub(check_standby)
+    print("PASS: dead workers are replaced by the warm standby, on call or by the health check")
+
+
+async def check_respawn(params):
+    async with MCPSessionPool(params, size=1, standby=0, health_interval=0.3, health_timeout=2.0) as pool:
+        pid = text(await pool.call_tool("whoami")).split()[0]
+        os.kill(int(pid), signal.SIGKILL)
+        await asyncio.sleep(0.1)
+        # No standby: the retried call waits for a freshly spawned worker
+        assert text(await pool.call_tool("whoami")).split()[0] != pid
+        assert pool.stats["respawned"] == 1 and pool.stats["retries"] == 1
+
+
+def test_respawn():
+    with_stub(check_respawn)
+    print("PASS: without a standby a dead worker is respawned")
+
+
+if __name__ == "__main__":
+    test_dispatch()
+    test_standby()
+    test_respawn()
+    print("\nSUCCESS: All MCP pool tests passed!")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process MCP transports (agent/mcp_transport.py): the
+"memory" session and the "direct" handler client return the same results
+as each other through the ClientSession interface the agent uses.
+"""
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp.server.fastmcp import FastMCP
+from agent.agent_loop import call_tool
+from agent.mcp_transport import connect_mcp
+from shared.executors import offload
+
+
+def stub_server() -> FastMCP:
+    server = FastMCP("stub")
+
+    @server.tool()
+    def echo(text: str) -> str:
+        return text
+
+    @server.tool()
+    def lookup(query: str) -> dict:
+        return {"query": query, "documents": ["x" * 1000] * 3}
+
+    @server.tool()
+    def fail() -> str:
+        raise ValueError("broken tool")
+
+    def slow(seconds: float) -> str:
+        time.sleep(seconds)
+        return "done"
+    server.tool()(offload(slow, "io"))
+
+    return server
+
+
+async def exchange(transport: str) -> dict:
+    async with connect_mcp(None, transport, server=stub_server()) as client:
+        await client.send_ping()
+        tools = (await client.list_tools()).tools
+        echo = await client.call_tool("echo", {"text": "hello"})
+        lookup = await client.call_tool("lookup", {"query": "q"})
+        failed = await client.call_tool("fail", {})
+        invalid = await client.call_tool("echo", {})
+        agent_result = await call_tool(client, "echo", {"text": "via agent"})
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client.call_tool("slow", {"seconds": 0.2}) for _ in range(4)))
+        elapsed = time.perf_counter() - start
+
+    assert not echo.isError and echo.content[0].text == "hello"
+    assert failed.isError and "broken tool" in failed.content[0].text
+    assert invalid.isError
+    assert agent_result == (True, "via agent")
+    assert elapsed < 0.5, elapsed  # offloaded tools don't block the (gateway's) loop
+    return {
+        "tools": [(t.name, t.inputSchema) for t in tools],
+        "lookup": (lookup.content[0].text, lookup.structuredContent),
+    }
+
+
+def test_same_results():
+    memory = asyncio.run(exchange("memory"))
+    direct = asyncio.run(exchange("direct"))
+    assert [name for name, _ in direct["tools"]] == ["echo", "lookup", "fail", "slow"]
+    assert memory == direct
+    assert '"query": "q"' in direct["lookup"][0] and "x" * 1000 in direct["lookup"][0]
+    print("PASS: memory and direct transports answer like a session")
+
+
+async def check_unknown_transport():
+    try:
+        async with connect_mcp(None, "tcp", server=stub_server()):
+            pass
+        raise AssertionError("unknown transport accepted")
+    except ValueError:
+        pass
+
+
+def test_unknown_transport():
+    asyncio.run(check_unknown_transport())
+    print("PASS: unknown transports are rejected")
+
+
+if __name__ == "__main__":
+    test_same_results()
+    test_unknown_transport()
+    print("\nSUCCESS: All MCP transport tests passed!")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the token-budgeted conversation memory.
+
+A recording summarizer checks that the rolling summary is updated
+incrementally: each call only sees the previous summary and the newly
+evicted entries.
+"""
+import sys
+import asyncio
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agent.memory import ConversationMemory, count_tokens, truncate_tokens
+
+DOCUMENT = "Cairo weather report. " * 400  # like a search_web result
+
+
+class RecordingSummarizer:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, summary, entries, max_tokens):
+        self.calls.append((summary, list(entries)))
+        return f"{summary} +{len(entries)}".strip()
+
+
+def test_token_helpers():
+    assert count_tokens("") == 0
+    assert 8 <= count_tokens("The time in Cairo is 12:30.") <= 11
+    text = truncate_tokens(DOCUMENT, 50)
+    assert text.endswith("[truncated]") and count_tokens(text) < 60
+    assert truncate_tokens("short", 50) == "short"
+    print("PASS: token counting and truncation")
+
+
+async def check_rolling_summary():
+    summarizer = RecordingSummarizer()
+    memory = ConversationMemory(budget=300, entry_max_tokens=100, summary_tokens=50, keep_recent=2,
+                                summarize=summarizer)
+    memory.add("User", "What's the weather in Cairo?")
+    memory.add("Tool(search_web)", DOCUMENT)
+    assert memory.stats["truncated"] == 1
+    assert memory.entries[1][1] <= 120, "long tool results must be cut per entry"
+
+    for i in range(10):
+        memory.add("Agent", f"Step {i}: " + "checking sources " * 20)
+        await memory.compact()
+        assert memory.tokens <= memory.budget, memory.tokens
+        assert len(memory) >= 2
+
+    assert summarizer.calls, "budget exceeded but nothing was summarized"
+    # Incremental: every call starts from the previous result and gets only new entries
+    previous = ""
+    seen = set()
+    for summary, entries in summarizer.calls:
+        assert summary == previous
+        assert not seen & set(entries), "an entry was summarized twice"
+        seen |= set(entries)
+        previous = f"{summary} +{len(entries)}".strip()
+    assert memory.stats["summarized_entries"] == len(seen)
+
+    rendered = memory.render()
+    assert rendered.startswith("Summary of earlier conversation:")
+    assert rendered.endswith(memory.entries[-1][0])
+    assert count_tokens(rendered) <= memory.budget + 10
+    # A smaller prompt budget keeps the summary and the newest entry
+    small = memory.render(budget=80)
+    assert memory.entries[-1][0] in small and memory.entries[0][0] not in small
+
+
+async def check_summary_fallback():
+    async def failing(summary, entries, max_tokens):
+        raise RuntimeError("API down")
+
+    memory = ConversationMemory(budget=120, entry_max_tokens=60, summary_tokens=40, keep_recent=1,
+                                summarize=failing)
+    for i in range(6):
+        memory.add("Tool(search_web)", f"Result {i}: " + "lorem ipsum " * 30)
+        await memory.compact()
+    assert memory.stats["summary_failures"] >= 1
+    assert memory.summary and count_tokens(memory.summary) <= 41
+    assert memory.tokens <= memory.budget
+
+
+def test_rolling_summary():
+    asyncio.run(check_rolling_summary())
+    print("PASS: history kept within budget, summary updated incrementally")
+
+
+def test_summary_fallback():
+    asyncio.run(check_summary_fallback())
+    print("PASS: extractive summary when the summarizer fails")
+
+
+if __name__ == "__main__":
+    test_token_helpers()
+    test_rolling_summary()
+    test_summary_fallback()
+    print("\nSUCCESS: All memory tests passed!")
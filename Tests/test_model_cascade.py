@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Tests for the small/large model cascade in decide().
+
+A stub OpenAI-compatible server answers per model: the small model's reply is
+set by each check, the large model always gives the final answer.
+"""
+import sys
+import json
+import time
+import asyncio
+from pathlib import Path
+
+from aiohttp import web
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import agent.api_llm as api_llm
+from agent.api_llm import CerebrasAPIClient, cascade_stats, decide, SMALL_MODEL_ID, MODEL_ID
+
+
+def tool_call(name: str, args: dict) -> dict:
+    return {"role": "assistant", "content": None, "tool_calls": [
+        {"id": "1", "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}]}
+
+
+SMALL_STREAM = ['<json>{"tool": null, "args": {}, "tool_calls": [], "reasoning": "I know this", ',
+                '"ask_user": null, "is_satisfied": true, "answer": "'] + ["Cairo is sunny today. "] * 40 + ['"}</json>']
+LARGE_STREAM = ['<json>{"reasoning": "", "is_satisfied": true, ', '"answer": "It is sunny ', 'in Cairo."}</json>']
+
+
+class StubLLM:
+    def __init__(self):
+        self.small_reply = None
+        self.small_logprobs = None
+        self.small_chunks_sent = 0
+        self.models = []
+        self.url = None
+
+    async def stream(self, request, chunks, counter: bool):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        try:
+            for piece in chunks:
+                await response.write(f"data: {json.dumps({'choices': [{'delta': {'content': piece}}]})}\n\n".encode())
+                if counter:
+                    self.small_chunks_sent += 1
+                await asyncio.sleep(0.02)
+            await response.write(b"data: [DONE]\n\n")
+        except (ConnectionResetError, RuntimeError):
+            pass  # the client stopped reading
+        return response
+
+    async def chat(self, request):
+        payload = await request.json()
+        self.models.append(payload["model"])
+        if payload.get("stream"):
+            small = payload["model"] == SMALL_MODEL_ID
+            return await self.stream(request, SMALL_STREAM if small else LARGE_STREAM, small)
+        choice = {"message": {"role": "assistant", "content": "It is sunny in Cairo."}}
+        usage = {"prompt_tokens": 200, "completion_tokens": 8}
+        if payload["model"] == SMALL_MODEL_ID:
+            choice = {"message": self.small_reply}
+            usage = {"prompt_tokens": 200, "completion_tokens": 12}
+            if self.small_logprobs is not None:
+                choice["logprobs"] = {"content": [{"token": "x", "logprob": lp} for lp in self.small_logprobs]}
+        return web.json_response({"choices": [choice], "usage": usage})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+def make_server() -> FastMCP:
+    server = FastMCP(name="cascade-test")
+
+    @server.tool()
+    def search_web(query: str) -> str:
+        """Search the web."""
+        return query
+
+    @server.tool()
+    def VisionDetect() -> str:
+        """Detect objects in front of the user."""
+        return "Detected: cup"
+
+    return server
+
+
+async def check_cascade():
+    async with StubLLM() as llm, CerebrasAPIClient(llm.url, "key", "stub") as client, \
+            create_connected_server_and_client_session(make_server()) as session:
+        api_llm._api_client = client
+        api_llm.DECISION_BACKEND = "tools"
+        api_llm.CASCADE_ENABLED = True
+        try:
+            async def run(**kwargs):
+                llm.models.clear()
+                answer = []
+                decision = await decide("weather in cairo", [], set(), session, "thinking",
+                                        on_answer=answer.append, **kwargs)
+                return decision, answer
+
+            # Tool selection stays on the small model
+            llm.small_reply = tool_call("search_web", {"query": "weather cairo"})
+            decision, answer = await run()
+            assert decision["tier"] == "small" and decision["escalation"] is None
+            assert decision["tool"] == "search_web" and llm.models == [SMALL_MODEL_ID]
+            assert decision["model_calls"][0]["completion_tokens"] == 12
+
+            # A final answer from the small model is rewritten by the large one; only that is streamed
+            llm.small_reply = {"role": "assistant", "content": "sunny"}
+            decision, answer = await run()
+            assert decision["escalation"] == "final_answer" and decision["tier"] == "large"
+            assert llm.models == [SMALL_MODEL_ID, MODEL_ID]
+            assert answer == ["It is sunny in Cairo."]
+
+            # Missing required arguments: low confidence
+            llm.small_reply = tool_call("search_web", {})
+            decision, _ = await run()
+            assert decision["escalation"] == "low_confidence"
+
+            # Arguments the schema doesn't know, or of the wrong type: low confidence
+            llm.small_reply = tool_call("search_web", {"query": "weather cairo", "region": "eg"})
+            decision, _ = await run()
+            assert decision["escalation"] == "low_confidence"
+            llm.small_reply = tool_call("search_web", {"query": 42})
+            decision, _ = await run()
+            assert decision["escalation"] == "low_confidence"
+
+            # Ignoring the tool the router's hint names: low confidence
+            llm.small_reply = tool_call("VisionDetect", {})
+            decision, _ = await run(hint="CRITICAL: You MUST use the search_web tool to get this information.")
+            assert decision["escalation"] == "low_confidence"
+            decision, _ = await run()
+            assert decision["tier"] == "small" and decision["tool"] == "VisionDetect"
+
+            # Unknown tool: parse failure, escalated without retrying the small model
+            llm.small_reply = tool_call("book_flight", {"to": "Cairo"})
+            decision, _ = await run()
+            assert decision["escalation"] == "parse_failure" and llm.models == [SMALL_MODEL_ID, MODEL_ID]
+
+            # Logprobs, when requested, give the confidence of an otherwise valid decision
+            api_llm.CASCADE_LOGPROBS = True
+            llm.small_reply = tool_call("search_web", {"query": "weather cairo"})
+            llm.small_logprobs = [-0.01, -2.5]
+            decision, _ = await run()
+            assert decision["escalation"] == "low_confidence"
+            llm.small_logprobs = [-0.01, -0.05]
+            decision, _ = await run()
+            assert decision["tier"] == "small" and decision["confidence"] > 0.9
+
+            api_llm.CASCADE_LOGPROBS = False
+
+            stats = cascade_stats()
+            assert stats["tiers"]["small"]["calls"] == 10 and stats["tiers"]["large"]["calls"] == 7
+            assert stats["tiers"]["small"]["completion_tokens"] == 120
+            assert stats["escalations"] == {"final_answer": 1, "low_confidence": 5, "parse_failure": 1}
+
+            # Prompt backend: the small model's stream is closed once it commits to answering,
+            # and only the large model's answer is spoken
+            api_llm.DECISION_BACKEND = "prompt"
+            decision, answer = await run()
+            assert decision["escalation"] == "final_answer" and llm.models == [SMALL_MODEL_ID, MODEL_ID]
+            assert "".join(answer) == "It is sunny in Cairo."
+            assert llm.small_chunks_sent < len(SMALL_STREAM) // 2, llm.small_chunks_sent
+            stats = cascade_stats()
+            assert stats["stopped_early"] == 1 and stats["discarded_seconds"] > 0
+
+            # While the local fallback serves both tiers, one (large) decision is made
+            api_llm._local_client, api_llm._api_down_until = client, time.monotonic() + 60
+            decision, answer = await run()
+            assert decision["tier"] == "large" and decision["escalation"] is None
+            assert llm.models == [MODEL_ID] and "".join(answer) == "It is sunny in Cairo."
+            stats = cascade_stats()
+            assert stats["skipped_local"] == 1 and stats["decisions"] == 11
+            print(f"  {stats}")
+        finally:
+            api_llm._api_client = api_llm._local_client = None
+            api_llm._api_down_until = 0.0
+            api_llm.CASCADE_LOGPROBS = False
+
+
+def test_model_cascade():
+    asyncio.run(check_cascade())
+    print("PASS: small model selects tools, large model answers and takes over on low confidence")
+
+
+if __name__ == "__main__":
+    test_model_cascade()
+    print("\nSUCCESS: All model cascade tests passed!")
@@ -2,14 +2,15 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(__file__, "..", "..")))
 
-from tools.navigation.nav import NavigateAStar
+from tools.navigation.nav import load_graph, astar
 
 
 def test():
     print(
-        NavigateAStar(
+        astar(
+            load_graph(),
             start="Entrance",
-            destination="Dean Office"
+            goal="Dean Office"
         )
     )
 
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Accuracy parity between the PyTorch and ONNX Runtime vision backends.
+
+Runs both backends on the coco8 sample images and checks that every PyTorch
+detection has an ONNX detection of the same class with IoU >= 0.5.
+Exports the ONNX model first if it is missing.
+
+Usage:
+    python Tests/test_onnx_parity.py [--int8]
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Optional vision backends: skip where they aren't installed
+pytest.importorskip("ultralytics")
+pytest.importorskip("onnxruntime")
+cv2 = pytest.importorskip("cv2")
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import VISION_CONF, VISION_IOU
+from tools.vision.backends import artifact_path, load_backend
+from tools.vision.export import export_onnx
+from tools.vision.yolo import MODEL_PATH
+
+COCO8_DIR = project_root / "src" / "MCP_Server" / "tools" / "computer_vision" / "coco8" / "images"
+
+# INT8 weights shift confidences near the threshold, so allow a looser recall
+MIN_RECALL = {False: 0.95, True: 0.8}
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of two (N, 4) / (M, 4) xyxy arrays."""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def matched(reference, candidate, min_iou: float = 0.5) -> int:
+    """Number of reference detections with a same-class candidate above min_iou."""
+    if not len(reference) or not len(candidate):
+        return 0
+    ious = box_iou(reference.boxes, candidate.boxes)
+    same_class = reference.class_ids[:, None] == candidate.class_ids[None, :]
+    return int(((ious >= min_iou) & same_class).any(axis=1).sum())
+
+
+def test_onnx_parity(int8: bool = False):
+    print(f"Testing ONNX{' INT8' if int8 else ''} parity on coco8...")
+    if not artifact_path(MODEL_PATH, "onnx", int8).exists():
+        export_onnx(MODEL_PATH, int8=int8)
+
+    torch_backend = load_backend(MODEL_PATH, "torch")
+    onnx_backend = load_backend(MODEL_PATH, "onnx", int8=int8)
+    assert torch_backend.names == onnx_backend.names, "class tables differ"
+
+    total = hits = 0
+    for image_path in sorted(COCO8_DIR.glob("*/*.jpg")):
+        frame = cv2.imread(str(image_path))
+        reference = torch_backend.detect([frame], VISION_CONF, VISION_IOU)[0]
+        candidate = onnx_backend.detect([frame], VISION_CONF, VISION_IOU)[0]
+        found = matched(reference, candidate)
+        total += len(reference)
+        hits += found
+        print(f"  {image_path.name}: torch={len(reference)} onnx={len(candidate)} matched={found}")
+
+    recall = hits / total if total else 1.0
+    print(f"Recall of PyTorch detections: {recall:.3f} ({hits}/{total})")
+    assert recall >= MIN_RECALL[int8], f"recall {recall:.3f} below {MIN_RECALL[int8]}"
+    print("PASS: ONNX backend matches PyTorch")
+
+
+if __name__ == "__main__":
+    if not MODEL_PATH.exists():
+        print(f"Model not found at {MODEL_PATH}")
+        sys.exit(1)
+    test_onnx_parity(int8="--int8" in sys.argv)
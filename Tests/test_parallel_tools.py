@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for multi-tool decisions: parsing, dedup and concurrent execution
+over an in-memory MCP session.
+"""
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agent.agent_loop import run_tool
+from agent.api_llm import normalize, tool_signature
+from config.settings import TOOL_TIMEOUTS
+
+TOOL_DELAY = 0.3
+
+
+def make_server() -> FastMCP:
+    server = FastMCP(name="parallel-test")
+
+    @server.tool()
+    async def look() -> str:
+        await asyncio.sleep(TOOL_DELAY)
+        return "Detected: cup"
+
+    @server.tool()
+    async def price(item: str) -> str:
+        await asyncio.sleep(TOOL_DELAY)
+        return f"{item}: $4"
+
+    @server.tool()
+    async def stuck() -> str:
+        await asyncio.sleep(10)
+        return "never"
+
+    return server
+
+
+def test_normalize_tool_calls():
+    decision = normalize({
+        "tool": "look",
+        "args": {},
+        "tool_calls": [{"tool": "look", "args": {}}, {"name": "price", "arguments": {"item": "cup"}}, "junk"],
+    })
+    assert decision["tool_calls"] == [{"tool": "look", "args": {}}, {"tool": "price", "args": {"item": "cup"}}]
+    assert (decision["tool"], decision["args"]) == ("look", {})
+
+    assert normalize({"answer": "hi", "is_satisfied": True})["tool_calls"] == []
+    assert tool_signature("price", {"b": 1, "a": 2}) == tool_signature("price", {"a": 2, "b": 1})
+    print("PASS: tool_calls parsed, single tool/args still accepted")
+
+
+async def check_concurrent():
+    TOOL_TIMEOUTS["stuck"] = 0.2
+    try:
+        async with create_connected_server_and_client_session(make_server()) as session:
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                run_tool(session, "look", {}),
+                run_tool(session, "price", {"item": "cup"}),
+                run_tool(session, "stuck", {}),
+            )
+            elapsed = time.perf_counter() - start
+    finally:
+        del TOOL_TIMEOUTS["stuck"]  # shared with the rest of the process
+
+    assert results[0] == (True, "Detected: cup")
+    assert results[1] == (True, "cup: $4")
+    assert results[2][0] is False and "timed out" in results[2][1]
+    # Serial execution would take 2 * TOOL_DELAY + the timeout
+    assert elapsed < 2 * TOOL_DELAY, f"tools did not run concurrently ({elapsed:.2f}s)"
+    print(f"  3 tools in {elapsed:.2f}s (serial would be >= {2 * TOOL_DELAY + 0.2:.2f}s)")
+
+
+def test_concurrent_tools():
+    asyncio.run(check_concurrent())
+    print("PASS: tools run concurrently with per-tool timeouts")
+
+
+if __name__ == "__main__":
+    test_normalize_tool_calls()
+    test_concurrent_tools()
+    print("\nSUCCESS: All parallel tool tests passed!")
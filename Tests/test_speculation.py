@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for speculative tool prefetch over an in-memory MCP session.
+
+The "LLM" is a sleep: the prefetched tool should overlap it on a hit and be
+cancelled on a miss.
+"""
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agent import agent_loop
+from agent.agent_loop import run_tool
+from agent.speculation import Speculation, args_compatible, predict_tool, speculation_stats
+
+TOOL_DELAY = 0.3
+DECIDE_DELAY = 0.2
+
+
+def make_server() -> FastMCP:
+    server = FastMCP(name="speculation-test")
+
+    @server.tool()
+    async def VisionDetect() -> str:
+        await asyncio.sleep(TOOL_DELAY)
+        return "Detected: laptop"
+
+    @server.tool()
+    async def price(item: str) -> str:
+        await asyncio.sleep(TOOL_DELAY)
+        return f"{item}: $4"
+
+    return server
+
+
+def test_prediction():
+    assert predict_tool("What is in front of me?") == ("VisionDetect", {})
+    assert predict_tool("what time is it in Cairo") == ("search_web", {"query": "what time is it in Cairo"})
+    assert predict_tool("tell me a joke") is None
+
+    assert args_compatible("search_web", {"query": "what time is it in Cairo"}, {"query": "time in Cairo"})
+    assert not args_compatible("search_web", {"query": "what time is it in Cairo"}, {"query": "bitcoin price"})
+    assert not args_compatible("VisionDetect", {}, {"frame": "abc"})
+    print("PASS: tool predicted from query cues")
+
+
+async def check_hit_and_miss():
+    async with create_connected_server_and_client_session(make_server()) as session:
+        # Hit: the decision picks the prefetched tool
+        start = time.perf_counter()
+        speculation = Speculation.start(session, "what am I looking at", set(), run_tool)
+        await asyncio.sleep(DECIDE_DELAY)
+        call = {"tool": "VisionDetect", "args": {}}
+        speculation.resolve([call])
+        assert await speculation.claim(call) == (True, "Detected: laptop")
+        elapsed = time.perf_counter() - start
+
+        assert speculation.report["hit"]
+        assert speculation.report["saved_ms"] >= DECIDE_DELAY * 1000 * 0.9, speculation.report
+        assert elapsed < DECIDE_DELAY + TOOL_DELAY, f"no overlap ({elapsed:.2f}s)"
+        print(f"  hit: {elapsed:.2f}s instead of {DECIDE_DELAY + TOOL_DELAY:.2f}s, report={speculation.report}")
+
+        # Miss: the decision answers directly, so the prefetch is cancelled
+        speculation = Speculation.start(session, "look around", set(), run_tool)
+        speculation.resolve([])
+        await asyncio.sleep(0)
+        assert speculation.task.cancelled() or speculation.task.done()
+        assert speculation.claim(call) is None
+        assert not speculation.report["hit"]
+
+        # Already ran (e.g. the gateway detected the uploaded image): nothing to prefetch
+        assert Speculation.start(session, "look", {("VisionDetect", "{}")}, run_tool) is None
+
+    stats = speculation_stats()
+    assert stats["speculated"] == 2 and stats["hits"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_hit_and_miss():
+    asyncio.run(check_hit_and_miss())
+    print("PASS: prefetch reused on hit, cancelled on miss")
+
+
+async def check_failed_decision():
+    tasks = []
+
+    async def tracked_run_tool(*args):
+        tasks.append(asyncio.current_task())
+        return await run_tool(*args)
+
+    async def failing_decide(*args, on_tool_call=None, **kwargs):
+        on_tool_call({"tool": "price", "args": {"item": "cup"}})  # streamed before the failure
+        await asyncio.sleep(0)
+        raise RuntimeError("model unavailable")
+
+    async with create_connected_server_and_client_session(make_server()) as session:
+        originals = agent_loop.run_tool, agent_loop.decide
+        agent_loop.run_tool, agent_loop.decide = tracked_run_tool, failing_decide
+        try:
+            await agent_loop.agent_loop(session, "what am I looking at")
+            raise AssertionError("decision error swallowed")
+        except RuntimeError:
+            pass
+        finally:
+            agent_loop.run_tool, agent_loop.decide = originals
+
+        assert len(tasks) == 2, tasks  # the prefetch and the early tool
+        await asyncio.wait(tasks, timeout=1)
+        assert all(task.cancelled() for task in tasks)
+
+
+def test_failed_decision():
+    asyncio.run(check_failed_decision())
+    print("PASS: prefetch and early tools cancelled when the decision fails")
+
+
+if __name__ == "__main__":
+    test_prediction()
+    test_hit_and_miss()
+    test_failed_decision()
+    print("\nSUCCESS: All speculation tests passed!")
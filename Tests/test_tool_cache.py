@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Tests for the tool-result cache in front of MCP call_tool: argument
+normalization, per-tool TTLs, data-version invalidation, coalescing of
+concurrent calls and bounded size.
+"""
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agent.agent_loop import run_tool, call_tool
+from agent.tool_cache import ToolResultCache, cache_key, file_version, get_tool_cache
+
+calls = {"search_web": 0, "VisionDetect": 0, "NavigateAStar": 0, "flaky": 0}
+
+
+def make_server() -> FastMCP:
+    server = FastMCP(name="cache-test")
+
+    @server.tool()
+    async def search_web(query: str) -> str:
+        calls["search_web"] += 1
+        await asyncio.sleep(0.1)
+        return f"results for {query}"
+
+    @server.tool()
+    def VisionDetect() -> str:
+        calls["VisionDetect"] += 1
+        return "Detected: cup"
+
+    @server.tool()
+    def NavigateAStar(start: str, destination: str) -> str:
+        calls["NavigateAStar"] += 1
+        return f"{start} -> {destination}"
+
+    @server.tool()
+    def flaky() -> str:
+        calls["flaky"] += 1
+        raise ValueError("boom")
+
+    return server
+
+
+def test_cache_key():
+    assert cache_key("search_web", {"query": "Weather   Cairo?"}) == cache_key("search_web", {"query": "weather cairo"})
+    assert cache_key("NavigateAStar", {"start": " Entrance", "destination": "Floor 1"}) == \
+        cache_key("NavigateAStar", {"destination": "Floor 1", "start": "Entrance"})
+    # Node names stay case-sensitive
+    assert cache_key("NavigateAStar", {"start": "entrance"}) != cache_key("NavigateAStar", {"start": "Entrance"})
+    assert cache_key("search_web", {"query": "x", "page": None}) == cache_key("search_web", {"query": "x"})
+    print("PASS: arguments normalized per tool")
+
+
+async def check_through_run_tool():
+    async with create_connected_server_and_client_session(make_server()) as session:
+        cache = get_tool_cache(session)
+        cache.ttls = {"search_web": 300, "VisionDetect": 0.05}
+
+        # Concurrent duplicates share one call
+        results = await asyncio.gather(*(run_tool(session, "search_web", {"query": q})
+                                         for q in ["weather cairo", "Weather Cairo?", "weather  cairo"]))
+        assert all(r == (True, "results for weather cairo") for r in results)
+        assert calls["search_web"] == 1 and cache.stats["coalesced"] == 2
+
+        assert await run_tool(session, "search_web", {"query": "WEATHER CAIRO"}) == results[0]
+        assert calls["search_web"] == 1 and cache.stats["hits"] == 1
+
+        # Vision expires within seconds
+        await run_tool(session, "VisionDetect", {})
+        await run_tool(session, "VisionDetect", {})
+        assert calls["VisionDetect"] == 1
+        await asyncio.sleep(0.1)
+        await run_tool(session, "VisionDetect", {})
+        assert calls["VisionDetect"] == 2 and cache.stats["expired"] == 1
+
+        # Tools without a policy, and failures, are never cached
+        ok, _ = await run_tool(session, "flaky", {})
+        ok2, _ = await run_tool(session, "flaky", {})
+        assert not ok and not ok2 and calls["flaky"] == 2
+
+        # A cancelled caller doesn't cancel the shared call
+        first = asyncio.create_task(run_tool(session, "search_web", {"query": "museum hours"}))
+        second = asyncio.create_task(run_tool(session, "search_web", {"query": "museum hours"}))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        assert await second == (True, "results for museum hours")
+
+        # ...but once every caller is cancelled, the call is cancelled too and nothing is cached
+        before = calls["search_web"]
+        callers = [asyncio.create_task(run_tool(session, "search_web", {"query": "bitcoin price"}))
+                   for _ in range(2)]
+        await asyncio.sleep(0.02)
+        assert calls["search_web"] == before + 1
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        assert not cache._inflight and not cache._waiters
+        await asyncio.sleep(0.15)  # past the tool's own duration
+        assert cache._lookup(cache_key("search_web", {"query": "bitcoin price"}), None) is None
+
+        summary = cache.summary()
+        print(f"  {summary}")
+        assert summary["per_tool"]["search_web"] == {"hits": 5, "misses": 3}
+
+
+async def check_versions_and_bounds():
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = Path(tmp) / "graph.json"
+        graph.write_text('{"A": {}}')
+        async with create_connected_server_and_client_session(make_server()) as session:
+            cache = ToolResultCache(ttls={"NavigateAStar": None}, versions={"NavigateAStar": lambda: file_version(graph)})
+            run = lambda: call_tool(session, "NavigateAStar", {"start": "A", "destination": "B"})
+            before = calls["NavigateAStar"]
+            for _ in range(3):
+                await cache.call("NavigateAStar", {"start": "A", "destination": "B"}, run)
+            assert calls["NavigateAStar"] == before + 1
+
+            graph.write_text('{"A": {}, "B": {}}')  # graph edited: cached routes are stale
+            await cache.call("NavigateAStar", {"start": "A", "destination": "B"}, run)
+            assert calls["NavigateAStar"] == before + 2 and cache.stats["invalidated"] == 1
+
+    async def result(text):
+        return True, text
+
+    cache = ToolResultCache(ttls={"search_web": 300}, max_entries=3, max_bytes=10_000)
+    for i in range(10):
+        await cache.call("search_web", {"query": str(i)}, lambda: result("x" * 100))
+    assert cache.summary()["entries"] == 3 and cache.stats["evicted"] == 7
+
+    cache = ToolResultCache(ttls={"search_web": 300}, max_entries=100, max_bytes=1000)
+    for i in range(10):
+        await cache.call("search_web", {"query": str(i)}, lambda: result("x" * 300))
+    assert cache.bytes <= 1000 and cache.summary()["entries"] == 3
+    await cache.call("search_web", {"query": "huge"}, lambda: result("x" * 5000))
+    assert cache.bytes <= 1000, "an entry larger than the cache must not be stored"
+
+
+def test_run_tool_cache():
+    asyncio.run(check_through_run_tool())
+    print("PASS: hits, coalescing, per-tool TTL; failures uncached")
+
+
+def test_versions_and_bounds():
+    asyncio.run(check_versions_and_bounds())
+    print("PASS: navigation invalidated by graph changes, size bounded")
+
+
+if __name__ == "__main__":
+    test_cache_key()
+    test_run_tool_cache()
+    test_versions_and_bounds()
+    print("\nSUCCESS: All tool cache tests passed!")
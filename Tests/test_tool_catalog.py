@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached MCP tool catalog over an in-memory MCP session.
+
+The server adds a tool at runtime and sends tools/list_changed; the catalog
+must re-fetch exactly then, and reuse the cached list otherwise.
+"""
+import sys
+import asyncio
+from pathlib import Path
+
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agent.tool_catalog import ToolCatalog, get_tool_catalog
+
+
+def make_server() -> FastMCP:
+    server = FastMCP(name="catalog-test")
+
+    @server.tool()
+    def echo(text: str) -> str:
+        """Echo text back."""
+        return text
+
+    @server.tool()
+    async def add_clock(ctx: Context) -> str:
+        """Register a new tool and tell clients the list changed."""
+        server.add_tool(lambda: "12:00", name="clock", description="Current time.")
+        await ctx.session.send_tool_list_changed()
+        return "added"
+
+    return server
+
+
+async def check_catalog():
+    catalog = ToolCatalog(ttl=60)
+    async with create_connected_server_and_client_session(
+        make_server(), message_handler=catalog.message_handler
+    ) as session:
+        catalog.bind(session)
+        assert get_tool_catalog(session) is catalog
+
+        for _ in range(5):
+            tools = await catalog.get()
+        assert [t.name for t in tools] == ["echo", "add_clock"]
+        assert catalog.stats["fetches"] == 1 and catalog.stats["hits"] == 4
+        assert catalog.version == 1
+
+        builds = []
+        prompt = catalog.derived("prompt", lambda tools: builds.append(1) or ",".join(t.name for t in tools))
+        catalog.derived("prompt", lambda tools: builds.append(1))
+        assert prompt == "echo,add_clock" and len(builds) == 1
+
+        await session.call_tool("add_clock", {})
+        for _ in range(50):  # the notification arrives asynchronously
+            if not catalog.is_fresh:
+                break
+            await asyncio.sleep(0.01)
+        assert not catalog.is_fresh, "tools/list_changed did not invalidate the catalog"
+
+        tools = await catalog.get()
+        assert "clock" in [t.name for t in tools]
+        assert catalog.version == 2 and catalog.stats["fetches"] == 2
+        assert catalog.derived("prompt", lambda tools: ",".join(t.name for t in tools)).endswith("clock")
+
+
+async def check_ttl():
+    async with create_connected_server_and_client_session(make_server()) as session:
+        catalog = ToolCatalog(session, ttl=0.05)
+        await catalog.get()
+        await asyncio.sleep(0.1)
+        await catalog.get()
+        assert catalog.stats["fetches"] == 2
+        assert catalog.version == 1, "unchanged tool list must not bump the version"
+
+
+def test_catalog_invalidation():
+    asyncio.run(check_catalog())
+    print("PASS: catalog cached, invalidated by tools/list_changed")
+
+
+def test_catalog_ttl():
+    asyncio.run(check_ttl())
+    print("PASS: catalog re-fetched after TTL, version stable")
+
+
+if __name__ == "__main__":
+    test_catalog_invalidation()
+    test_catalog_ttl()
+    print("\nSUCCESS: All tool catalog tests passed!")
@@ -1,13 +1,67 @@
 """Main agent reasoning loop."""
 import sys
-import json
-from typing import Set, Tuple
+import asyncio
+from typing import Callable, Optional, Set, Tuple
 from agent.llm import decide, log
+from agent.api_llm import add_model_call, tool_signature
 from agent.modes import get_mode_continuation_check
-from config.settings import MAX_LOOPS
+from agent.speculation import Speculation
+from agent.memory import ConversationMemory, truncate_tokens
+from agent.sessions import Session
+from agent.tool_cache import get_tool_cache
+from agent.intent_router import route_intent
+from config.settings import (
+    MAX_LOOPS, TOOL_TIMEOUT, TOOL_TIMEOUTS, SPECULATION_ENABLED, MEMORY_ENTRY_MAX_TOKENS, TOOL_CACHE_ENABLED
+)
 
 
-async def agent_loop(client, user_input: str, mode: str = "thinking", image: str = None):
+async def run_tool(client, name: str, args: dict) -> Tuple[bool, str]:
+    """
+    Call one MCP tool, through the session's result cache if enabled.
+
+    Returns:
+        (True, result text) or (False, error message)
+    """
+    if TOOL_CACHE_ENABLED:
+        return await get_tool_cache(client).call(name, args, lambda: call_tool(client, name, args))
+    return await call_tool(client, name, args)
+
+
+async def call_tool(client, name: str, args: dict) -> Tuple[bool, str]:
+    """Call one MCP tool with its per-tool timeout (uncached)."""
+    timeout = TOOL_TIMEOUTS.get(name, TOOL_TIMEOUT)
+    try:
+        result = await asyncio.wait_for(client.call_tool(name=name, arguments=args), timeout)
+    except asyncio.TimeoutError:
+        return False, f"Tool error: {name} timed out after {timeout:g}s"
+    except Exception as e:
+        return False, f"Tool error: {str(e)}"
+
+    # Extract text from result
+    result_text = str(result)
+    if hasattr(result, 'content') and result.content:
+        result_text = str(result.content[0].text)
+    if getattr(result, "isError", False):
+        # The tool raised on the server side; report it as an error (and never cache it)
+        return False, f"Tool error: {result_text}"
+    return True, result_text
+
+
+def reuse_session_result(session: Optional[Session], call: dict):
+    """An awaitable (True, text) if an earlier turn of the session already ran `call`, else None."""
+    text = session.tool_result(call["tool"], call["args"]) if session is not None else None
+    if text is None:
+        return None
+    log(f"Reusing session result for {call['tool']} {call['args']}")
+
+    async def cached():
+        return True, text
+    return cached()
+
+
+async def agent_loop(client, user_input: str, mode: str = "thinking", image: str = None, detections: str = None,
+                     on_answer: Optional[Callable[[str], None]] = None, metrics: Optional[dict] = None,
+                     session: Optional[Session] = None):
     """
     Main agent loop that processes user input and makes decisions.
     
@@ -16,68 +70,145 @@ async def agent_loop(client, user_input: str, mode: str = "thinking", image: str
         user_input: User query text
         mode: "quick" or "thinking"
         image: Optional base64 encoded image
+        detections: VisionDetect result for the image, if the gateway already ran it
+        on_answer: Called with pieces of the final answer while it is being generated
+        metrics: Filled with per-request measurements (e.g. "speculation", "prompt_tokens" per loop,
+            "outcome": "answer" only for a real answer from the model, "llm_calls", "tiers" with
+            calls/seconds/tokens per model tier, "escalations", "tools" called)
+        session: Earlier turns of the conversation; its memory is continued and its fresh
+            tool results are reused instead of calling the tool again
         
     Returns:
         Final answer string
     """
-    history = []
+    history = session.memory if session is not None else ConversationMemory()
     used_tools: Set[Tuple] = set()
     current_input = user_input
+
+    if detections:
+        # Treat the gateway's detection as an earlier tool call so it isn't repeated
+        history.add("Tool(VisionDetect)", detections)
+        if session is not None:
+            session.record_detections(detections)
+        used_tools.add(tool_signature("VisionDetect", {}))
     
     # Get the appropriate continuation check for the mode
     should_continue = get_mode_continuation_check(mode)
 
-    for i in range(1, MAX_LOOPS + 1):
-        log(f"--- {mode.upper()} LOOP {i} ---")
-
-        decision = await decide(current_input, history, used_tools, client, mode, image)
-        log("Thought:", decision["reasoning"])
-
-        history.append(f"User: {current_input}")
-        history.append(f"Agent: {decision['reasoning']}")
-
-        # Check if we should ask the user
-        if decision["ask_user"]:
-            return decision["ask_user"]
-
-        # Check if we're satisfied
-        if decision["is_satisfied"]:
-            answer = decision["answer"]
-            if not answer:
-                # If satisfied but no answer, try to construct one from reasoning
-                answer = decision["reasoning"] or "I've completed the task."
-            return answer
-
-        # Check if we should continue
-        if not should_continue(decision, i, MAX_LOOPS, history, used_tools):
-            # Return what we have or a default message
-            return decision["answer"] or decision["reasoning"] or "I need more information."
-
-        # Execute tool if needed
-        if decision["tool"]:
-            sig = (decision["tool"], json.dumps(decision["args"], sort_keys=True))
-            used_tools.add(sig)
-
-            try:
-                result = await client.call_tool(
-                    name=decision["tool"],
-                    arguments=decision["args"]
-                )
-                # Extract text from result
-                result_text = str(result)
-                if hasattr(result, 'content') and result.content:
-                    result_text = str(result.content[0].text) if result.content else str(result)
-                
-                history.append(f"Tool({decision['tool']}): {result_text}")
-                current_input = f"Tool result: {result_text}"
-                log(f"Tool {decision['tool']} result: {result_text[:100]}")
-            except Exception as e:
-                error_msg = f"Tool error: {str(e)}"
-                log(error_msg)
-                history.append(f"Error: {error_msg}")
-                current_input = f"Tool error occurred: {error_msg}"
-                # Continue loop to try again or provide answer
-
-    # Max loops reached
-    return decision.get("answer") or decision.get("reasoning") or "I need more information to complete this task."
+    # Hand-off from the intent router: a route too uncertain to dispatch still steers the first decision
+    hint = route_intent(user_input).hint
+
+    # Start the likely tool while the first decision is being generated
+    speculation = Speculation.start(client, user_input, used_tools, run_tool) if SPECULATION_ENABLED else None
+    if speculation is not None and metrics is not None:
+        metrics["speculation"] = speculation.report
+
+    early = {}
+    try:
+        for i in range(1, MAX_LOOPS + 1):
+            log(f"--- {mode.upper()} LOOP {i} ---")
+
+            # Tools the streaming parser saw before the decision finished, started right away
+            early = {}
+
+            def start_early(call, first=(i == 1)):
+                sig = tool_signature(call["tool"], call["args"])
+                if sig in used_tools or sig in early:
+                    return
+                if first and speculation is not None and speculation.covers(call):
+                    return  # already running as the speculative prefetch
+                if session is not None and session.tool_result(call["tool"], call["args"]) is not None:
+                    return  # answered from an earlier turn
+                early[sig] = asyncio.create_task(run_tool(client, call["tool"], call["args"]))
+
+            decision = await decide(current_input, history, used_tools, client, mode, image,
+                                    on_answer=on_answer, on_tool_call=start_early, hint=hint if i == 1 else "")
+            log("Thought:", decision["reasoning"])
+            log(f"Prompt tokens: {decision.get('prompt_tokens')} (history {history.tokens})")
+            if metrics is not None:
+                metrics.setdefault("prompt_tokens", []).append(decision.get("prompt_tokens"))
+                metrics["llm_calls"] = metrics.get("llm_calls", 0) + max(1, len(decision.get("model_calls", [])))
+                for call in decision.get("model_calls", []):
+                    add_model_call(metrics.setdefault("tiers", {}), call)
+                if decision.get("escalation"):
+                    metrics.setdefault("escalations", []).append(decision["escalation"])
+
+            if i == 1:
+                history.add("User", current_input)  # later inputs are tool results, recorded below
+            history.add("Agent", decision["reasoning"])
+
+            # Keep prefetched/early tools only if this decision is going to call them
+            finishing = decision["ask_user"] or decision["is_satisfied"]
+            wanted = set() if finishing else {tool_signature(c["tool"], c["args"]) for c in decision["tool_calls"]}
+            for sig in [sig for sig in early if sig not in wanted]:
+                early.pop(sig).cancel()
+            if speculation is not None and i == 1:
+                speculation.resolve([] if finishing else decision["tool_calls"])
+            if early and metrics is not None:
+                metrics["tools_started_early"] = metrics.get("tools_started_early", 0) + len(early)
+
+            # Check if we should ask the user
+            if decision["ask_user"]:
+                history.add("Question", decision["ask_user"])
+                return decision["ask_user"]
+
+            # Check if we're satisfied
+            if decision["is_satisfied"]:
+                answer = decision["answer"]
+                if not answer:
+                    # If satisfied but no answer, try to construct one from reasoning
+                    answer = decision["reasoning"] or "I've completed the task."
+                history.add("Answer", answer)  # follow-up questions refer to it
+                if metrics is not None:
+                    metrics["outcome"] = "error" if decision.get("error") or not decision["answer"] else "answer"
+                return answer
+
+            # Check if we should continue
+            if not should_continue(decision, i, MAX_LOOPS, history, used_tools):
+                # Return what we have or a default message
+                return decision["answer"] or decision["reasoning"] or "I need more information."
+
+            # Execute tools if needed; independent calls from one decision run concurrently
+            calls = decision["tool_calls"]
+            if calls:
+                for call in calls:
+                    used_tools.add(tool_signature(call["tool"], call["args"]))
+                if metrics is not None:
+                    metrics.setdefault("tools", []).extend(call["tool"] for call in calls)
+
+                results = await asyncio.gather(*(
+                    (speculation and speculation.claim(call))
+                    or early.pop(tool_signature(call["tool"], call["args"]), None)
+                    or reuse_session_result(session, call)
+                    or run_tool(client, call["tool"], call["args"])
+                    for call in calls
+                ))
+
+                # Merge results into history in the order the model listed the calls
+                inputs = []
+                for call, (ok, text) in zip(calls, results):
+                    label = f" ({call['tool']})" if len(calls) > 1 else ""
+                    if ok:
+                        history.add(f"Tool({call['tool']})", text)
+                        if session is not None:
+                            session.record_tool_result(call["tool"], call["args"], text)
+                        inputs.append(f"Tool result{label}: {truncate_tokens(text, MEMORY_ENTRY_MAX_TOKENS)}")
+                        log(f"Tool {call['tool']} result: {text[:100]}")
+                    else:
+                        log(text)
+                        history.add("Error", text)
+                        # Continue loop to try again or provide answer
+                        inputs.append(f"Tool error occurred{label}: {text}")
+                current_input = "\n".join(inputs)
+                # Fold the oldest entries into the rolling summary once over the token budget
+                await history.compact()
+
+        # Max loops reached
+        return decision.get("answer") or decision.get("reasoning") or "I need more information to complete this task."
+    finally:
+        # A failed or cancelled request leaves no prefetch or early tool running behind it
+        for task in early.values():
+            task.cancel()
+        if speculation is not None:
+            speculation.task.cancel()
 
@@ -0,0 +1,237 @@
+"""
+Semantic answer cache in front of the agent loop.
+
+Queries are normalized and embedded as hashed character n-gram vectors (no
+model download, microseconds per query). A small inverted-index vector search
+finds the nearest earlier question; above a cosine threshold, and with the
+same content words and numbers, its answer is returned without calling the
+LLM or any tool.
+
+Freshness depends on the intent of the question (ANSWER_CACHE_TTLS; intents
+from the router's cue words): time and vision questions are never cached, live
+data (weather, news, prices) expires after minutes, navigation answers last
+until the graph file changes. An answer built from a web search is live data
+whatever the question's cue words, so it never outlives the "live" TTL.
+"""
+import re
+import math
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from agent.tool_cache import file_version
+from agent.intent_router import query_intent
+from config.settings import (
+    ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_SIZE, ANSWER_CACHE_TTLS, NAV_GRAPH_PATH
+)
+
+DIMENSIONS = 2048  # hashed n-gram buckets
+NGRAMS = (3, 4)
+COMMON_POSTING = 32  # posting lists longer than this (and 1/8 of the index) are not used for candidates
+
+# Follow-ups that only make sense with the conversation so far
+CONTEXT_CUES = re.compile(r"\b(it|that|those|them|there|again|more|else|another|previous|last one|he|she|they)\b", re.I)
+
+FILLER_WORDS = {"the", "a", "an", "please"}
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+# Words that don't change what is asked; all other words (names, places, objects) must match exactly
+FUNCTION_WORDS = {
+    "what", "whats", "which", "who", "whos", "whom", "where", "wheres", "when", "why", "how", "hows",
+    "is", "are", "was", "were", "be", "been", "am", "do", "does", "did", "can", "could", "would", "should",
+    "will", "shall", "may", "might", "must", "i", "im", "me", "my", "you", "your", "we", "us", "our",
+    "of", "in", "on", "at", "to", "for", "from", "with", "about", "by", "and", "or", "tell", "know",
+    "give", "show", "some", "any", "this", "that", "these", "those",
+}
+DATA_VERSIONS = {
+    "navigation": lambda: file_version(NAV_GRAPH_PATH),
+}
+# Tools whose results are live data: answers built from them get the "live" TTL at most
+LIVE_TOOLS = {"search_web"}
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, punctuation to spaces (keeping arithmetic), articles dropped, single spaces."""
+    text = re.sub(r"['’]", "", text.lower())  # what's -> whats
+    text = re.sub(r"[^\w\s+\-*/=.]", " ", text)
+    text = re.sub(r"(?<!\d)\.|\.(?!\d)", " ", text)  # periods, but not decimal points
+    return " ".join(word for word in text.split() if word not in FILLER_WORDS)
+
+
+def embed(text: str) -> Dict[int, float]:
+    """Sparse unit vector of hashed character n-grams of the normalized text."""
+    padded = f" {normalize_query(text)} "
+    counts: Dict[int, int] = defaultdict(int)
+    for n in NGRAMS:
+        for i in range(len(padded) - n + 1):
+            counts[zlib.crc32(padded[i:i + n].encode()) % DIMENSIONS] += 1
+    weights = {bucket: 1 + math.log(count) for bucket, count in counts.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    return {bucket: w / norm for bucket, w in weights.items()}
+
+
+def content_words(text: str) -> frozenset:
+    """The words of the normalized query that carry its subject ("capital", "niger")."""
+    return frozenset(word for word in re.findall(r"\w+", normalize_query(text)) if word not in FUNCTION_WORDS)
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(bucket, 0.0) for bucket, w in a.items())
+
+
+class VectorIndex:
+    """Inverted index over sparse vectors: only entries sharing a bucket are scored."""
+
+    def __init__(self):
+        self.vectors: Dict[int, Dict[int, float]] = {}
+        self.postings: Dict[int, Set[int]] = defaultdict(set)
+
+    def add(self, key: int, vector: Dict[int, float]):
+        self.vectors[key] = vector
+        for bucket in vector:
+            self.postings[bucket].add(key)
+
+    def remove(self, key: int):
+        for bucket in self.vectors.pop(key, {}):
+            posting = self.postings[bucket]
+            posting.discard(key)
+            if not posting:
+                del self.postings[bucket]
+
+    def search(self, vector: Dict[int, float], k: int = 3) -> List[Tuple[float, int]]:
+        """The k most similar entries as (similarity, key), best first."""
+        # Buckets shared by a large part of the index (" wh", "is ") can't single out a near
+        # duplicate, which also shares the query's rarer n-grams; skip them to keep the candidate set small
+        common = max(COMMON_POSTING, len(self.vectors) // 8)
+        candidates = set()
+        for bucket in vector:
+            posting = self.postings.get(bucket)
+            if posting and len(posting) <= common:
+                candidates |= posting
+        scored = [(cosine(vector, self.vectors[key]), key) for key in candidates]
+        scored.sort(reverse=True)
+        return scored[:k]
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+
+class AnswerCache:
+    """
+    Answers to earlier questions, found by similarity of the question.
+
+    Usage:
+        hit = cache.lookup(query)           # None, or {"answer", "similarity", ...}
+        ...
+        cache.store(query, answer)          # ignored for time/vision questions
+    """
+
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD, max_entries: int = ANSWER_CACHE_SIZE,
+                 ttls: Optional[Dict[str, Optional[float]]] = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttls = ANSWER_CACHE_TTLS if ttls is None else ttls
+        self.index = VectorIndex()
+        self.entries: "OrderedDict[int, dict]" = OrderedDict()
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "uncacheable": 0, "stored": 0, "expired": 0,
+                      "evicted": 0}
+        self._next_id = 0
+
+    def cacheable(self, intent: str) -> bool:
+        return self.ttls.get(intent, 0) != 0
+
+    def _version(self, intent: str):
+        version = DATA_VERSIONS.get(intent)
+        return version() if version else None
+
+    def _fresh(self, entry: dict) -> bool:
+        if entry["expires_at"] is not None and time.monotonic() >= entry["expires_at"]:
+            return False
+        return entry["version"] == self._version(entry["intent"])
+
+    # ---------- lookup ----------
+    def lookup(self, query: str) -> Optional[dict]:
+        """The cached answer for a near-duplicate of `query`, if any is fresh."""
+        self.stats["lookups"] += 1
+        intent = query_intent(query)
+        if not self.cacheable(intent):
+            self.stats["uncacheable"] += 1
+            return None
+
+        numbers = NUMBER.findall(query)
+        words = content_words(query)
+        for similarity, key in self.index.search(embed(query)):
+            if similarity < self.threshold:
+                break
+            entry = self.entries[key]
+            if not self._fresh(entry):
+                self._drop(key, "expired")
+                continue
+            # "Hall 2-0-25" vs "Hall 2-0-16", "10 things" vs "5 things", "Niger" vs "Nigeria":
+            # close n-grams, different question
+            if entry["numbers"] != numbers or entry["words"] != words or entry["intent"] != intent:
+                continue
+            self.entries.move_to_end(key)
+            entry["hits"] += 1
+            self.stats["hits"] += 1
+            return {"answer": entry["answer"], "similarity": round(similarity, 3), "query": entry["query"],
+                    "intent": intent}
+        self.stats["misses"] += 1
+        return None
+
+    # ---------- storing ----------
+    def store(self, query: str, answer: str, tools: Iterable[str] = ()):
+        """Cache `answer`; `tools` are the tools it was built from."""
+        intent = query_intent(query)
+        if not answer or not self.cacheable(intent):
+            return
+        ttl = self.ttls[intent]
+        if LIVE_TOOLS & set(tools):
+            live = self.ttls.get("live", 0)
+            ttl = live if ttl is None or live is None else min(ttl, live)
+            if ttl == 0:
+                return
+        vector = embed(query)
+
+        # Replace an equivalent earlier entry instead of keeping both
+        numbers = NUMBER.findall(query)
+        words = content_words(query)
+        for similarity, key in self.index.search(vector, k=1):
+            entry = self.entries[key]
+            if similarity >= 0.999 and entry["numbers"] == numbers and entry["words"] == words:
+                self._drop(key)
+
+        key = self._next_id
+        self._next_id += 1
+        self.entries[key] = {
+            "query": query,
+            "answer": answer,
+            "intent": intent,
+            "numbers": numbers,
+            "words": words,
+            "expires_at": None if ttl is None else time.monotonic() + ttl,
+            "version": self._version(intent),
+            "hits": 0,
+        }
+        self.index.add(key, vector)
+        self.stats["stored"] += 1
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries)), "evicted")
+
+    def _drop(self, key: int, reason: Optional[str] = None):
+        self.entries.pop(key, None)
+        self.index.remove(key)
+        if reason:
+            self.stats[reason] += 1
+
+    def summary(self) -> dict:
+        served = self.stats["hits"] + self.stats["misses"]
+        return {**self.stats, "entries": len(self.entries),
+                "hit_rate": round(self.stats["hits"] / served, 3) if served else 0.0}
+
+
+def needs_context(query: str) -> bool:
+    """Whether the query refers back to the conversation (then a cached answer may not fit)."""
+    return bool(CONTEXT_CUES.search(query))
@@ -1,10 +1,43 @@
 """API-based LLM model handling using Cerebras API."""
+import re
 import sys
 import json
+import math
+import time
+import random
 import aiohttp
 import asyncio
-from typing import List, Dict, Any
-from config.settings import API_BASE_URL, API_KEY, MODEL_ID, MAX_RETRIES
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional
+from config.settings import (
+    API_BASE_URL,
+    API_KEY,
+    MODEL_ID,
+    SMALL_MODEL_ID,
+    CASCADE_ENABLED,
+    CASCADE_MIN_CONFIDENCE,
+    CASCADE_LOGPROBS,
+    LLM_ROUTER_ENABLED,
+    LOCAL_LLM_ENABLED,
+    LOCAL_LLM_MODEL_PATH,
+    LOCAL_LLM_API_RETRY,
+    MAX_RETRIES,
+    DECISION_BACKEND,
+    API_POOL_LIMIT,
+    API_KEEPALIVE,
+    API_DNS_TTL,
+    API_CONNECT_TIMEOUT,
+    API_READ_TIMEOUT,
+    API_TIMEOUT,
+    API_HTTP_RETRIES,
+    API_BACKOFF_BASE,
+    API_BACKOFF_MAX,
+)
+from agent.decision_parser import StreamingDecisionParser, extract_json
+from agent.tool_catalog import get_tool_catalog
+from agent.memory import ConversationMemory, count_message_tokens, count_tokens
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 
 # ================= MCP SAFETY =================
@@ -13,149 +46,440 @@ def log(*args, **kwargs):
 
 
 # ================= API CLIENT =================
+class APIError(RuntimeError):
+    """
+    Non-successful API response after retries; `status` is the HTTP status (None for connection
+    errors), `provider` the endpoint that returned it (base URL, or the router's provider/model).
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None, provider: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.provider = provider
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
 class CerebrasAPIClient:
-    """Client for Cerebras API."""
+    """
+    Client for Cerebras API (any OpenAI-compatible endpoint).
+
+    One aiohttp session with a pooled keep-alive connector is shared by all
+    requests, so after `warmup()` the TCP/TLS handshake is already paid for.
+    aiohttp speaks HTTP/1.1 only; reuse comes from keep-alive pooling.
+    """
 
-    def __init__(self, base_url: str, api_key: str, model_id: str):
+    def __init__(self, base_url: str, api_key: str, model_id: str,
+                 retries: int = API_HTTP_RETRIES, backoff_base: float = API_BACKOFF_BASE,
+                 backoff_max: float = API_BACKOFF_MAX):
+        """
+        Args:
+            base_url: API root, e.g. https://api.cerebras.ai/v1
+            api_key: Bearer token
+            model_id: Model sent with every completion request
+            retries: Extra attempts on 429/5xx and connection errors
+            backoff_base: First backoff ceiling in seconds (doubles per attempt, full jitter)
+            backoff_max: Largest backoff ceiling in seconds
+        """
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.model_id = model_id
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
         self.session = None
 
+        self.completions_url = f"{self.base_url}/chat/completions"
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+        }
+
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        connector = aiohttp.TCPConnector(
+            limit=API_POOL_LIMIT,
+            ttl_dns_cache=API_DNS_TTL,
+            keepalive_timeout=API_KEEPALIVE,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=API_TIMEOUT,
+            sock_connect=API_CONNECT_TIMEOUT,
+            sock_read=API_READ_TIMEOUT,
+        )
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._on_connection_created)
+        trace.on_connection_reuseconn.append(self._on_connection_reused)
+
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers=self.headers,
+            trace_configs=[trace],
+        )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+            self.session = None
 
-    async def chat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 512, temperature: float = 0.1) -> str:
-        """Make a chat completion request to Cerebras API."""
+    async def _on_connection_created(self, session, ctx, params):
+        self.stats["connections_created"] += 1
+
+    async def _on_connection_reused(self, session, ctx, params):
+        self.stats["connections_reused"] += 1
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> Optional[float]:
+        """Seconds to wait before the next attempt; None if the server asks for more than backoff_max."""
+        if retry_after is not None:
+            if retry_after > self.backoff_max:
+                return None  # another provider or the local model can answer sooner
+            # The server said when to come back; add a little jitter so clients don't stampede
+            return min(self.backoff_max, retry_after + random.uniform(0, self.backoff_base))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _post(self, url: str, payload: Dict[str, Any]) -> aiohttp.ClientResponse:
+        """
+        POST a JSON payload, retrying 429/5xx (honoring Retry-After) and connection errors.
+
+        Returns the successful response unread; the caller must release it.
+        """
         if not self.session:
             raise RuntimeError("Client not initialized. Use 'async with' context manager.")
 
-        url = f"{self.base_url}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        self.stats["requests"] += 1
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                response = await self.session.post(url, json=payload)
+                if response.status == 200:
+                    return response
+
+                async with response:
+                    error_text = await response.text()
+                error = APIError(f"API request failed with status {response.status}: {error_text}", response.status,
+                                 self.base_url)
+                if response.status not in RETRY_STATUSES:
+                    self.stats["failures"] += 1
+                    raise error
+                retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = APIError(f"API request failed: {type(e).__name__}: {e}", provider=self.base_url)
+
+            if attempt == self.retries:
+                break
+            delay = self._backoff(attempt, retry_after)
+            if delay is None:
+                log(f"API request failed ({error}); Retry-After {retry_after:.0f}s is too long to wait")
+                break
+            log(f"API request attempt {attempt + 1} failed ({error}); retrying in {delay:.2f}s")
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+        self.stats["failures"] += 1
+        raise error
+
+    async def post_json(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a JSON payload (with retries) and return the decoded response body."""
+        async with await self._post(url, payload) as response:
+            return await response.json()
+
+    async def chat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 512, temperature: float = 0.1,
+                              model: Optional[str] = None) -> str:
+        """Make a chat completion request to Cerebras API."""
+        result = await self.chat_completion_raw(messages, max_tokens, temperature, model=model)
+        return result["choices"][0]["message"]["content"]
+
+    async def chat_completion_raw(self, messages: List[Dict[str, Any]], max_tokens: int = 512,
+                                  temperature: float = 0.1, model: Optional[str] = None, **options) -> Dict[str, Any]:
+        """
+        Chat completion returning the whole response body (tool_calls, usage, ...).
 
+        `model` overrides the client's model for this request; `options` are extra
+        request fields such as tools, tool_choice or response_format.
+        """
         payload = {
-            "model": self.model_id,
+            "model": model or self.model_id,
             "messages": messages,
             "max_tokens": max_tokens,
-            "temperature": temperature
+            "temperature": temperature,
+            **options
         }
+        return await self.post_json(self.completions_url, payload)
 
-        log(f"Making API request to {url} with model {self.model_id}")
+    async def chat_completion_stream(self, messages: List[Dict[str, str]], max_tokens: int = 512,
+                                     temperature: float = 0.1, model: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive (SSE).
 
-        async with self.session.post(url, headers=headers, json=payload) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                raise RuntimeError(f"API request failed with status {response.status}: {error_text}")
-
-            result = await response.json()
-            return result["choices"][0]["message"]["content"]
+        Retries only happen before the first byte; a stream that breaks midway raises.
+        """
+        payload = {
+            "model": model or self.model_id,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        async with await self._post(self.completions_url, payload) as response:
+            async for line in response.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("choices"):
+                    delta = chunk["choices"][0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+
+    async def warmup(self) -> bool:
+        """
+        Open a pooled connection (DNS, TCP and TLS) ahead of the first real request.
+
+        Uses GET /models, which costs no tokens; any HTTP status means the
+        connection is up and stays in the pool for reuse.
+        """
+        if not self.session:
+            raise RuntimeError("Client not initialized. Use 'async with' context manager.")
+        try:
+            async with self.session.get(f"{self.base_url}/models") as response:
+                await response.read()
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log(f"API warm-up failed: {e}")
+            return False
 
 
-# Global API client instance
+# Global API client instance, and the local fallback model
 _api_client = None
+_local_client = None
+_api_down_until = 0.0
 
 
 async def get_api_client():
-    """Get or create the global API client."""
+    """
+    Get or create the global API client.
+
+    With keys for more than one of LLM_PROVIDERS this is an LLMRouter (same
+    interface) that picks a provider per call; otherwise a single Cerebras client.
+    """
     global _api_client
     if _api_client is None:
-        if not API_KEY:
-            raise ValueError("CEREBRAS_API_KEY environment variable is not set. Please set your Cerebras API key.")
-        _api_client = CerebrasAPIClient(API_BASE_URL, API_KEY, MODEL_ID)
-        await _api_client.__aenter__()
+        from agent.llm_router import build_router
+
+        client = build_router() if LLM_ROUTER_ENABLED else None
+        if client is None:
+            if not API_KEY:
+                raise ValueError("CEREBRAS_API_KEY environment variable is not set. Please set your Cerebras API key.")
+            client = CerebrasAPIClient(API_BASE_URL, API_KEY, MODEL_ID)
+        await client.__aenter__()
+        _api_client = client
     return _api_client
 
 
+async def get_local_client():
+    """The local llama.cpp client (started on first use), None if no GGUF model is configured."""
+    global _local_client
+    if _local_client is None and LOCAL_LLM_ENABLED and LOCAL_LLM_MODEL_PATH:
+        from agent.local_llm import LocalLLMClient
+
+        client = LocalLLMClient(LOCAL_LLM_MODEL_PATH)
+        await client.__aenter__()
+        _local_client = client
+    return _local_client
+
+
+def api_unavailable(error: Exception) -> bool:
+    """Whether an API failure calls for the local model: no key, no connection, overload or server error."""
+    if isinstance(error, ValueError):
+        return True
+    return isinstance(error, APIError) and (error.status is None or error.status == 429 or error.status >= 500)
+
+
+def local_fallback_active() -> bool:
+    """Whether calls currently go to the local model because the API was unavailable."""
+    return _local_client is not None and time.monotonic() < _api_down_until
+
+
+async def api_or_local():
+    """The client for the next call: the local model for a while after the API was unavailable."""
+    if local_fallback_active():
+        return _local_client
+    return await get_api_client()
+
+
+async def local_fallback(error: Exception, client):
+    """The local client to retry a failed call with, or None if the error should be raised."""
+    global _api_down_until
+    if (client is not None and client is _local_client) or not api_unavailable(error):
+        return None
+    try:
+        local = await get_local_client()
+    except APIError as e:
+        log(f"Local model unavailable: {e}")
+        return None
+    if local is not None:
+        log(f"API unavailable ({error}); using the local model for {LOCAL_LLM_API_RETRY:.0f}s")
+        _api_down_until = time.monotonic() + LOCAL_LLM_API_RETRY
+    return local
+
+
+def local_llm_stats() -> dict:
+    """Queue, prefix reuse and tokens/sec of the local fallback model (empty if it never started)."""
+    return _local_client.summary() if _local_client is not None else {}
+
+
+def provider_stats() -> dict:
+    """Latency, quota and hedging per provider when the client is an LLMRouter (empty otherwise)."""
+    summary = getattr(_api_client, "summary", None)
+    return summary() if summary else {}
+
+
+async def warm_up_api_client():
+    """Create the global client and pre-open its connection (called at gateway startup)."""
+    try:
+        client = await get_api_client()
+        start = time.perf_counter()
+        if await client.warmup():
+            log(f"API connection warmed up in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        log(f"API warm-up skipped: {e}")
+
+
+async def close_api_client():
+    """Close the global client's connection pool."""
+    global _api_client, _local_client
+    if _api_client is not None:
+        await _api_client.__aexit__(None, None, None)
+        _api_client = None
+    if _local_client is not None:
+        await _local_client.__aexit__(None, None, None)
+        _local_client = None
+
+
 # ================= LLM ====================
-async def generate_chat(messages, max_tokens=512, temperature=0.1):
+# Each helper falls back to the local llama.cpp model (if configured) when the API is unavailable
+async def generate_chat(messages, max_tokens=512, temperature=0.1, model=None):
     """Generate chat response from messages using Cerebras API."""
-    client = await get_api_client()
-    return await client.chat_completion(messages, max_tokens, temperature)
-
+    client = None
+    try:
+        client = await api_or_local()
+        return await client.chat_completion(messages, max_tokens, temperature, model=model)
+    except (APIError, ValueError) as e:
+        local = await local_fallback(e, client)
+        if local is None:
+            raise
+    return await local.chat_completion(messages, max_tokens, temperature)
+
+
+async def generate_chat_raw(messages, max_tokens=512, temperature=0.1, model=None, **options):
+    """
+    Chat completion with extra request fields (tools, response_format); returns the whole response.
 
-# ============== JSON HANDLING =============
-def extract_json(text: str) -> dict:
-    """Extract JSON from model output."""
-    import re
-    text = text.strip()
-    if "```" in text:
-        text = re.sub(r"```(?:json)?", "", text)
+    The local model rejects tools/response_format with APIError 501, so callers
+    move on to the prompt parser without marking native decisions unsupported.
+    """
+    client = None
+    try:
+        client = await api_or_local()
+        return await client.chat_completion_raw(messages, max_tokens, temperature, model=model, **options)
+    except (APIError, ValueError) as e:
+        local = await local_fallback(e, client)
+        if local is None:
+            raise
+    return await local.chat_completion_raw(messages, max_tokens, temperature, **options)
+
+
+async def generate_chat_stream(messages, max_tokens=512, temperature=0.1, model=None):
+    """Stream a chat response from messages using Cerebras API, yielding text deltas."""
+    client = None
+    started = False
+    try:
+        client = await api_or_local()
+        async for delta in client.chat_completion_stream(messages, max_tokens, temperature, model=model):
+            started = True
+            yield delta
+        return
+    except (APIError, ValueError) as e:
+        # Once text has been yielded the reply can't be restarted elsewhere
+        local = None if started else await local_fallback(e, client)
+        if local is None:
+            raise
+    async for delta in local.chat_completion_stream(messages, max_tokens, temperature):
+        yield delta
 
-    match = re.search(r"<json>([\s\S]*?)</json>", text)
-    if not match:
-        raise ValueError("No <json> block found")
 
-    raw = match.group(1)
-    raw = raw.replace(""", '"').replace(""", '"').replace("'", "'")
-    return json.loads(raw)
+# ============== JSON HANDLING =============
+def tool_signature(tool: str, args: dict) -> tuple:
+    """Key used to detect repeated tool calls (see used_tools)."""
+    return (tool, json.dumps(args, sort_keys=True))
+
+
+def normalize_tool_calls(data: dict) -> List[Dict[str, Any]]:
+    """All tool calls of a decision: the single "tool"/"args" pair first, then "tool_calls", without duplicates."""
+    raw_calls = data.get("tool_calls") if isinstance(data.get("tool_calls"), list) else []
+    if data.get("tool"):
+        raw_calls = [{"tool": data.get("tool"), "args": data.get("args")}] + raw_calls
+
+    calls = []
+    for call in raw_calls:
+        if not isinstance(call, dict):
+            continue
+        name = call.get("tool") or call.get("name")
+        args = call.get("args") or call.get("arguments") or {}
+        if isinstance(name, str) and name and isinstance(args, dict):
+            call = {"tool": name, "args": args}
+            if call not in calls:
+                calls.append(call)
+    return calls
 
 
 def normalize(data: dict) -> dict:
     """Normalize decision data."""
+    calls = normalize_tool_calls(data)
+    first = calls[0] if calls else {"tool": None, "args": {}}
     return {
         "reasoning": str(data.get("reasoning", "")),
-        "tool": data.get("tool"),
-        "args": data.get("args") or {},
+        "tool": first["tool"],
+        "args": first["args"],
+        "tool_calls": calls,
         "ask_user": data.get("ask_user") if isinstance(data.get("ask_user"), str) else None,
         "is_satisfied": bool(data.get("is_satisfied")),
         "answer": data.get("answer") if isinstance(data.get("answer"), str) else ""
     }
 
 
-# ============== DECISION ==================
-async def decide(query: str, history: list, used_tools: set, client, mode: str, image: str = None):
-    """
-    Make a decision based on query, history, and available tools.
-
-    Args:
-        query: User query text
-        history: Conversation history
-        used_tools: Set of (tool_name, args_json) tuples already used
-        client: MCP client
-        mode: "quick" or "thinking"
-        image: Optional base64 encoded image
-
-    Returns:
-        Decision dictionary
-    """
-    tools = await client.list_tools()
-    tools_list = "\n".join(f"- {t.name}: {t.description}" for t in tools.tools)
-    history_text = "\n".join(history[-6:]) if history else "None"
-    
-    log(f"Available tools: {[t.name for t in tools.tools]}")
-    log(f"Tools list: {tools_list}")
-
-    # Build user content with optional image
-    user_content = query
-    if image:
-        user_content += f"\n[Image provided: {image[:50]}...]"
-        # Note: For vision-capable models, you would include the image in the messages
-        # This is a placeholder - actual implementation depends on model capabilities
-
-    # Build explicit tool usage instructions
-    tool_usage_instructions = ""
-    if "search" in query.lower() or "time" in query.lower() or "current" in query.lower():
-        tool_usage_instructions = "\n\nCRITICAL: The user is asking for real-time information (time, current events, web search). You MUST use the search_web tool to get this information. Set tool='search_web' with args={'query': 'user question here'}."
-    if "use" in query.lower() and "tool" in query.lower():
-        tool_usage_instructions = "\n\nCRITICAL: The user explicitly asked you to use a tool. You MUST use the tool they mentioned. Do not say you don't have access to tools - you do!"
-    
-    system_prompt = f"""
+def build_system_prompt(tools: list, mode: str) -> str:
+    """Static part of the decision prompt; built once per tool catalog version and mode."""
+    tools_list = "\n".join(f"- {t.name}: {t.description}" for t in tools)
+    tool_names = [t.name for t in tools]
+    return f"""
 You are an intelligent agent running in {mode} mode with access to tools.
 
-Conversation history:
-{history_text}
-
 Available tools:
 {tools_list}
-{tool_usage_instructions}
 
 RULES:
 - ONLY output JSON inside <json>
@@ -163,16 +487,18 @@ RULES:
 - If the user asks you to use a tool (like "use search_web" or "use VisionDetect"), you MUST use that tool - DO NOT say you don't have it
 - If you need information that requires a tool (like current time, web search, vision), use the appropriate tool
 - If you have an answer, set "is_satisfied" to true and provide it in "answer"
-- If you need to use a tool, specify "tool" and "args" (tool name must match exactly: search_web or VisionDetect)
+- If you need to use a tool, specify "tool" and "args" (tool name must match exactly: {' or '.join(tool_names)})
+- If you need several independent tools (e.g. vision and a web search), list them all in "tool_calls" as [{{"tool": "...", "args": {{...}}}}, ...] instead; they run in parallel
 - In thinking mode, you can refine your approach based on tool results
 - ALWAYS use tools when explicitly requested or when you need real-time information
-- NEVER say you don't have access to tools - you have access to: {', '.join([t.name for t in tools.tools])}
+- NEVER say you don't have access to tools - you have access to: {', '.join(tool_names)}
 
 <json>
 {{
-  "reasoning": "",
   "tool": null,
   "args": {{}},
+  "tool_calls": [],
+  "reasoning": "",
   "ask_user": null,
   "is_satisfied": false,
   "answer": ""
@@ -180,38 +506,515 @@ RULES:
 </json>
 """
 
+
+# ============== NATIVE DECISIONS ==========
+ASK_USER_TOOL = "ask_user"
+
+# Retry rate of each decision path (a retry is any extra LLM call for one decision)
+_decision_stats = {
+    "native": {"decisions": 0, "retries": 0, "fallbacks": 0},
+    "prompt": {"decisions": 0, "retries": 0},
+}
+# Models whose endpoint rejected the native request format -> the provider that said so
+_native_unsupported: Dict[str, Optional[str]] = {}
+
+# A rejection of the request format itself, not of this request (context length, a bad argument value)
+NATIVE_REJECTED = re.compile(
+    r"\b(tools?|tool_choice|functions?|function[ _]call(ing|s)?|response_format|json_schema)\b.{0,80}"
+    r"\b(not supported|unsupported|not available|unknown|unrecognized|not allowed|not permitted)\b"
+    r"|\b(not support|unsupported|unknown|unrecognized)\b.{0,80}"
+    r"\b(tools?|tool_choice|functions?|function[ _]call(ing|s)?|response_format|json_schema)\b",
+    re.I | re.S)
+
+
+def native_format_rejected(error: "APIError") -> bool:
+    """Whether an API error says the endpoint doesn't support tools/response_format requests."""
+    return error.status in (400, 404, 422) and bool(NATIVE_REJECTED.search(str(error)))
+
+
+def native_supported(model: str) -> bool:
+    return model not in _native_unsupported
+
+
+def build_function_tools(tools: list) -> List[Dict[str, Any]]:
+    """MCP tools as OpenAI-style function schemas, plus ask_user; built once per catalog version."""
+    functions = [
+        {
+            "type": "function",
+            "function": {
+                "name": t.name,
+                "description": t.description or "",
+                "parameters": t.inputSchema or {"type": "object", "properties": {}},
+            },
+        }
+        for t in tools
+    ]
+    functions.append({
+        "type": "function",
+        "function": {
+            "name": ASK_USER_TOOL,
+            "description": "Ask the user a clarifying question when the request is ambiguous.",
+            "parameters": {
+                "type": "object",
+                "properties": {"question": {"type": "string"}},
+                "required": ["question"],
+            },
+        },
+    })
+    return functions
+
+
+def build_decision_schema(tools: list) -> Dict[str, Any]:
+    """response_format JSON schema of a decision, with tool names limited to the catalog."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "decision",
+            "strict": False,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "tool_calls": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "tool": {"type": "string", "enum": [t.name for t in tools]},
+                                "args": {"type": "object"},
+                            },
+                            "required": ["tool", "args"],
+                        },
+                    },
+                    "reasoning": {"type": "string"},
+                    "ask_user": {"type": ["string", "null"]},
+                    "is_satisfied": {"type": "boolean"},
+                    "answer": {"type": "string"},
+                },
+                "required": ["tool_calls", "reasoning", "ask_user", "is_satisfied", "answer"],
+            },
+        },
+    }
+
+
+def build_native_prompt(tools: list, mode: str, backend: str) -> str:
+    """Static system prompt for the native decision paths (no <json> format instructions)."""
+    tool_names = [t.name for t in tools]
+    if backend == "tools":
+        output_rules = f"""- To use tools, call them (tools: {', '.join(tool_names)}); call several at once if they are independent
+- If the request is ambiguous, call {ASK_USER_TOOL}
+- When you have the answer, reply with the answer itself as plain text"""
+    else:
+        tools_list = "\n".join(f"- {t.name}: {t.description}" for t in tools)
+        output_rules = f"""Available tools:
+{tools_list}
+
+- Reply with a decision object: "tool_calls" to run now (several if independent), "reasoning",
+  "ask_user" (a question, or null), "is_satisfied" and "answer\""""
+    return f"""
+You are an intelligent agent running in {mode} mode with access to tools.
+
+RULES:
+{output_rules}
+- If you need information that requires a tool (like current time, web search, vision), use the appropriate tool
+- In thinking mode, you can refine your approach based on tool results
+- NEVER say you don't have access to tools
+"""
+
+
+def decision_from_message(message: Dict[str, Any], tool_names: List[str]) -> dict:
+    """Decision from a function-calling reply: tool calls, an ask_user call, or a plain answer."""
+    content = (message.get("content") or "").strip()
+    calls = []
+    for call in message.get("tool_calls") or []:
+        function = call.get("function") or {}
+        name = function.get("name")
+        args = function.get("arguments") or {}
+        if isinstance(args, str):
+            args = json.loads(args or "{}")
+        if name == ASK_USER_TOOL:
+            return normalize({"reasoning": content, "ask_user": args.get("question")})
+        if name not in tool_names:
+            raise ValueError(f"Unknown tool: {name}")
+        calls.append({"tool": name, "args": args})
+
+    if calls:
+        return normalize({"reasoning": content, "tool_calls": calls})
+    if not content:
+        raise ValueError("Empty reply")
+    return normalize({"reasoning": "", "is_satisfied": True, "answer": content})
+
+
+async def decide_native(catalog, mode: str, context: str, user_content: str,
+                        on_answer: Optional[Callable[[str], None]] = None, tier: str = "large",
+                        calls: Optional[List[dict]] = None) -> Optional[dict]:
+    """
+    Decision through provider-native function calling or JSON-schema output.
+
+    Returns None when the prompt parser should be used instead: the API
+    rejected the request format, or the reply stayed invalid after retries.
+    Each model call is appended to `calls` (see record_model_call).
+    """
+    stats = _decision_stats["native"]
+    stats["decisions"] += 1
+
+    static_prompt = catalog.derived(("native_prompt", mode, DECISION_BACKEND),
+                                    lambda tools: build_native_prompt(tools, mode, DECISION_BACKEND))
+    if DECISION_BACKEND == "tools":
+        options = {"tools": catalog.derived("function_tools", build_function_tools), "tool_choice": "auto"}
+    else:
+        options = {"response_format": catalog.derived("decision_schema", build_decision_schema)}
+    if tier == "small" and CASCADE_LOGPROBS:
+        options["logprobs"] = True
     messages = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": static_prompt + context},
         {"role": "user", "content": user_content}
     ]
 
-    for attempt in range(MAX_RETRIES + 1):
+    for attempt in range(tier_retries(tier) + 1):
+        if attempt:
+            stats["retries"] += 1
         try:
-            raw = await generate_chat(messages)
-            log("RAW MODEL OUTPUT:", raw)
+            start = time.perf_counter()
+            result = await generate_chat_raw(messages, model=TIER_MODELS[tier], **options)
+            usage = result.get("usage") or {}
+            prompt_tokens = usage.get("prompt_tokens") or count_message_tokens(messages)
+            record_model_call(calls, tier, start, prompt_tokens,
+                              usage.get("completion_tokens") or count_tokens(json.dumps(result.get("choices") or [])))
+            message = result["choices"][0]["message"]
+            log("RAW MODEL OUTPUT:", message)
+            if DECISION_BACKEND == "tools":
+                decision = decision_from_message(message, catalog.names())
+            else:
+                decision = normalize(json.loads(message.get("content") or ""))
+                unknown = [c["tool"] for c in decision["tool_calls"] if c["tool"] not in catalog.names()]
+                if unknown:
+                    raise ValueError(f"Unknown tools: {unknown}")
+        except APIError as e:
+            if native_format_rejected(e):
+                # The endpoint doesn't support this request format; stop trying it for this model
+                log(f"Native decisions not supported for {TIER_MODELS[tier]} ({e}); using the prompt parser")
+                _native_unsupported[TIER_MODELS[tier]] = e.provider
+            else:
+                log(f"Native decision failed: {e}")
+            break
+        except (ValueError, KeyError, TypeError) as e:
+            log(f"Malformed native decision (attempt {attempt + 1}): {e}")
+            continue
+
+        if on_answer and decision["is_satisfied"] and decision["answer"]:
+            on_answer(decision["answer"])
+        decision["prompt_tokens"] = prompt_tokens
+        confidence = logprob_confidence(result)
+        if confidence is not None:
+            decision["confidence"] = confidence
+        return decision
+
+    stats["fallbacks"] += 1
+    return None
+
+
+def decision_stats() -> dict:
+    """Decisions, retries and retry rate of the native and prompt paths."""
+    report = {"backend": DECISION_BACKEND, "native_unsupported": dict(_native_unsupported)}
+    for path, stats in _decision_stats.items():
+        report[path] = {**stats, "retry_rate": round(stats["retries"] / stats["decisions"], 3) if stats["decisions"] else 0.0}
+    return report
+
+
+# ============== MODEL CASCADE =============
+# Tool selection runs on the small model; the large model writes final answers and
+# takes over when the small one fails to produce a valid or confident decision
+TIER_MODELS = {"small": SMALL_MODEL_ID, "large": MODEL_ID}
+
+_tier_stats = {tier: {"calls": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0} for tier in TIER_MODELS}
+_cascade_stats = {"decisions": 0, "escalations": {"final_answer": 0, "low_confidence": 0, "parse_failure": 0},
+                  "stopped_early": 0, "discarded_seconds": 0.0, "skipped_local": 0}
+
+# JSON schema types of tool arguments, for checking the small model's calls
+SCHEMA_TYPES = {"string": str, "integer": int, "number": (int, float), "boolean": bool, "array": list, "object": dict}
+
+
+def tier_retries(tier: str) -> int:
+    """Retries for a malformed reply: none on the small tier, which escalates instead."""
+    return MAX_RETRIES if tier == "large" else 0
+
+
+def add_model_call(totals: dict, call: dict):
+    """Add one model call to per-tier totals ({tier: {"calls", "seconds", "prompt_tokens", "completion_tokens"}})."""
+    tier = totals.setdefault(call["tier"], {"calls": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0})
+    tier["calls"] += 1
+    tier["seconds"] = round(tier["seconds"] + call["seconds"], 3)
+    tier["prompt_tokens"] += call["prompt_tokens"]
+    tier["completion_tokens"] += call["completion_tokens"]
+
+
+def record_model_call(calls: Optional[List[dict]], tier: str, start: float, prompt_tokens: int, completion_tokens: int):
+    """Count a finished model call in the tier stats and append it to `calls`."""
+    call = {"tier": tier, "model": TIER_MODELS[tier], "seconds": round(time.perf_counter() - start, 3),
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+    add_model_call(_tier_stats, call)
+    if calls is not None:
+        calls.append(call)
+
+
+def logprob_confidence(result: Dict[str, Any]) -> Optional[float]:
+    """Geometric-mean token probability of a reply, if the API returned logprobs."""
+    choice = (result.get("choices") or [{}])[0]
+    tokens = (choice.get("logprobs") or {}).get("content") or []
+    logprobs = [t["logprob"] for t in tokens if t.get("logprob") is not None]
+    return math.exp(sum(logprobs) / len(logprobs)) if logprobs else None
+
+
+def build_arg_schemas(tools: list) -> Dict[str, Dict[str, Any]]:
+    """{tool: {"required": [...], "properties": {...}}} from the input schemas."""
+    return {t.name: {"required": (t.inputSchema or {}).get("required", []),
+                     "properties": (t.inputSchema or {}).get("properties", {})} for t in tools}
+
+
+def arg_type_ok(value: Any, schema: Dict[str, Any]) -> bool:
+    expected = SCHEMA_TYPES.get(schema.get("type")) if isinstance(schema.get("type"), str) else None
+    if expected is None:
+        return True
+    if isinstance(value, bool) and expected is not bool:
+        return False
+    return isinstance(value, expected)
+
+
+def decision_confidence(decision: dict, catalog, hint: str = "") -> float:
+    """
+    How far a small-model tool decision can be trusted, from 0 to 1.
 
-            data = extract_json(raw)
-            decision = normalize(data)
+    The calls are checked against the catalog: a missing or empty required
+    argument gives 0, an unknown argument or one of the wrong JSON type 0.3,
+    and ignoring a tool the router's hint asked for 0.4. With CASCADE_LOGPROBS
+    the reply's token confidence can only lower the result.
+    """
+    schemas = catalog.derived("arg_schemas", build_arg_schemas)
+    confidence = decision.get("confidence", 1.0)
+    for call in decision["tool_calls"]:
+        schema = schemas.get(call["tool"], {"required": [], "properties": {}})
+        for arg in schema["required"]:
+            if call["args"].get(arg) in (None, ""):
+                return 0.0
+        properties = schema["properties"]
+        for arg, value in call["args"].items():
+            if (properties and arg not in properties) or not arg_type_ok(value, properties.get(arg, {})):
+                confidence = min(confidence, 0.3)
+    # The router was sure enough to name a tool ("MUST use the search_web tool"); a decision without it is suspect
+    named = [name for name in catalog.names() if re.search(rf"\b{re.escape(name)}\b", hint)]
+    if named and not any(call["tool"] in named for call in decision["tool_calls"]):
+        confidence = min(confidence, 0.4)
+    return confidence
+
+
+def escalation_reason(decision: Optional[dict], catalog, hint: str = "") -> Optional[str]:
+    """Why a small-model decision has to be redone by the large model, None if it can be used."""
+    if decision is None or decision.get("error"):
+        return "parse_failure"
+    if decision["ask_user"] or decision["is_satisfied"]:
+        return "final_answer"
+    if decision_confidence(decision, catalog, hint) < CASCADE_MIN_CONFIDENCE:
+        return "low_confidence"
+    return None
+
+
+def cascade_stats() -> dict:
+    """
+    Calls, latency and tokens per model tier, and how often the small tier escalated;
+    "stopped_early" small replies cut off at a final answer, "discarded_seconds" spent on
+    small-tier calls that were escalated, "skipped_local" decisions made without the cascade
+    because both tiers would have run on the local fallback model.
+    """
+    tiers = {}
+    for tier, stats in _tier_stats.items():
+        calls = stats["calls"]
+        tiers[tier] = {"model": TIER_MODELS[tier], **stats, "seconds": round(stats["seconds"], 3),
+                       "avg_latency": round(stats["seconds"] / calls, 3) if calls else 0.0}
+    decisions = _cascade_stats["decisions"]
+    escalations = _cascade_stats["escalations"]
+    return {"enabled": CASCADE_ENABLED, "tiers": tiers, "decisions": decisions, "escalations": dict(escalations),
+            "escalation_rate": round(sum(escalations.values()) / decisions, 3) if decisions else 0.0,
+            "stopped_early": _cascade_stats["stopped_early"], "skipped_local": _cascade_stats["skipped_local"],
+            "discarded_seconds": round(_cascade_stats["discarded_seconds"], 3)}
 
-            if decision["tool"]:
-                sig = (decision["tool"], json.dumps(decision["args"], sort_keys=True))
-                if sig in used_tools:
-                    decision["tool"] = None
-                    decision["is_satisfied"] = True
-                    decision["answer"] = decision["answer"] or "Action already taken."
 
+# ============== DECISION ==================
+async def decide(query: str, history: list, used_tools: set, client, mode: str, image: str = None,
+                 on_answer: Optional[Callable[[str], None]] = None,
+                 on_tool_call: Optional[Callable[[Dict], None]] = None, hint: str = ""):
+    """
+    Make a decision based on query, history, and available tools.
+
+    Uses the provider-native backend (DECISION_BACKEND "tools" or "json_schema")
+    when the API supports it, otherwise the <json> prompt parser. With
+    CASCADE_ENABLED the small model decides first (see escalation_reason),
+    except while the local fallback model is serving both tiers.
+
+    Args:
+        query: User query text
+        history: ConversationMemory (rendered within its token budget), or a list of
+            history lines of which the last six are used
+        used_tools: Set of (tool_name, args_json) tuples already used
+        client: MCP client
+        mode: "quick" or "thinking"
+        image: Optional base64 encoded image
+        on_answer: Called with pieces of the final answer as they are generated
+        on_tool_call: Called with each {"tool", "args"} as soon as it is complete in the
+            stream, before the rest of the decision is written
+        hint: Extra instruction for this decision (the intent router's, see agent_loop)
+
+    Returns:
+        Decision dictionary; "prompt_tokens" is the size of the request that produced it,
+        "tier" the model tier it came from, "escalation" why the small tier was overruled
+        (None if it wasn't) and "model_calls" every LLM call made for it
+    """
+    catalog = get_tool_catalog(client)
+    await catalog.get()
+    if isinstance(history, ConversationMemory):
+        history_text = history.render()
+    else:
+        history_text = "\n".join(history[-6:]) if history else "None"
+
+    # Build user content with optional image
+    user_content = query
+    if image:
+        # Detections for the image are already in history (see agent_loop)
+        user_content += "\n[Image provided by the user]"
+
+    # Per-request parts go after the static prefix so the prefix stays identical across calls
+    hint_text = f"\n{hint}" if hint else ""
+    context = f"""
+Conversation history:
+{history_text}
+{hint_text}
+"""
+
+    calls: List[dict] = []
+    decision = None
+    escalation = None
+    cascade = CASCADE_ENABLED
+    if cascade and local_fallback_active():
+        # Both tiers would run on the same local model: one decision is enough
+        cascade = False
+        _cascade_stats["skipped_local"] += 1
+    if cascade:
+        # The small model's answers aren't streamed: a final answer is written by the large model
+        _cascade_stats["decisions"] += 1
+        decision = await decide_tier("small", catalog, mode, context, user_content, None, on_tool_call, calls)
+        escalation = escalation_reason(decision, catalog, hint)
+        if escalation:
+            _cascade_stats["escalations"][escalation] += 1
+            # Time spent on the small tier before the large model could start
+            _cascade_stats["discarded_seconds"] += sum(c["seconds"] for c in calls)
+            log(f"Escalating to {MODEL_ID}: {escalation}")
+    if decision is None or escalation:
+        decision = await decide_tier("large", catalog, mode, context, user_content, on_answer, on_tool_call, calls)
+    decision["tier"] = "small" if cascade and not escalation else "large"
+    decision["escalation"] = escalation
+    decision["model_calls"] = calls
+
+    if decision["tool_calls"]:
+        # Drop calls that already ran; if nothing new is left, the loop is done
+        fresh = [c for c in decision["tool_calls"] if tool_signature(c["tool"], c["args"]) not in used_tools]
+        decision["tool_calls"] = fresh
+        if fresh:
+            decision["tool"], decision["args"] = fresh[0]["tool"], fresh[0]["args"]
+        else:
+            decision["tool"] = None
+            decision["args"] = {}
+            decision["is_satisfied"] = True
+            decision["answer"] = decision["answer"] or "Action already taken."
+    return decision
+
+
+async def decide_tier(tier: str, catalog, mode: str, context: str, user_content: str,
+                      on_answer: Optional[Callable[[str], None]], on_tool_call: Optional[Callable[[Dict], None]],
+                      calls: List[dict]) -> Optional[dict]:
+    """
+    One decision from a model tier: native path, then the prompt parser.
+
+    A small-tier native decision that fails (other than by an unsupported
+    request format) returns None so the large tier takes over directly. A
+    small-tier prompt decision is cut off as soon as it commits to answering.
+    """
+    model = TIER_MODELS[tier]
+    if DECISION_BACKEND != "prompt" and native_supported(model):
+        decision = await decide_native(catalog, mode, context, user_content, on_answer, tier, calls)
+        if decision is not None or (tier == "small" and native_supported(model)):
+            return decision
+    return await decide_prompt(catalog, mode, context, user_content, on_answer, on_tool_call, tier, calls,
+                               stop_on_final=(tier == "small"))
+
+
+async def decide_prompt(catalog, mode: str, context: str, user_content: str,
+                        on_answer: Optional[Callable[[str], None]] = None,
+                        on_tool_call: Optional[Callable[[Dict], None]] = None, tier: str = "large",
+                        calls: Optional[List[dict]] = None, stop_on_final: bool = False) -> dict:
+    """
+    Decision from a <json> block in the model's text, parsed (and streamed) tolerantly.
+
+    With `stop_on_final` the stream is closed once the decision sets
+    "is_satisfied" or "ask_user", before the answer itself is generated.
+    """
+    stats = _decision_stats["prompt"]
+    stats["decisions"] += 1
+    static_prompt = catalog.derived(("system_prompt", mode), lambda tools: build_system_prompt(tools, mode))
+    messages = [
+        {"role": "system", "content": static_prompt + context},
+        {"role": "user", "content": user_content}
+    ]
+
+    model = TIER_MODELS[tier]
+    retries = tier_retries(tier)
+    streamed = False
+    for attempt in range(retries + 1):
+        try:
+            start = time.perf_counter()
+            streaming = bool(on_answer or on_tool_call or stop_on_final)
+            stopped = False
+            if streaming:
+                # Don't stream a second copy of the answer if an attempt has to be retried
+                parser = StreamingDecisionParser(on_tool_call, None if streamed else on_answer)
+                stream = generate_chat_stream(messages, model=model)
+                try:
+                    async for delta in stream:
+                        parser.feed(delta)
+                        if stop_on_final and parser.final:
+                            stopped = True
+                            break
+                finally:
+                    await stream.aclose()
+                streamed = streamed or bool(parser.emitted)
+                raw = parser.buffer
+                log("RAW MODEL OUTPUT:", raw)
+            else:
+                raw = await generate_chat(messages, model=model)
+                log("RAW MODEL OUTPUT:", raw)
+            record_model_call(calls, tier, start, count_message_tokens(messages), count_tokens(raw or ""))
+            data = parser.result() if streaming else extract_json(raw)
+
+            decision = normalize(data)
+            if stopped:
+                _cascade_stats["stopped_early"] += 1
+                log(f"Stopped {model} after it committed to answering")
+            decision["prompt_tokens"] = count_message_tokens(messages)
             return decision
 
         except Exception as e:
             log(f"Error in decide (attempt {attempt + 1}): {e}")
-            if attempt == MAX_RETRIES:
+            if attempt < retries:
+                stats["retries"] += 1
+            else:
                 return {
                     "reasoning": "API error or malformed output",
                     "tool": None,
                     "args": {},
+                    "tool_calls": [],
                     "ask_user": None,
                     "is_satisfied": True,
-                    "answer": "Internal API issue."
+                    "answer": "Internal API issue.",
+                    "error": True,
+                    "prompt_tokens": count_message_tokens(messages)
                 }
 
             messages.append({
@@ -0,0 +1,312 @@
+"""
+Tolerant parsing of the agent's <json> decisions, whole or while streaming.
+
+The model is asked for one JSON object inside <json>...</json>. Common defects
+are repaired instead of costing another API call: smart or single quotes,
+Python literals, trailing commas, raw newlines in strings, and output cut off
+before the closing quote, brace or </json> tag.
+"""
+import re
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+# Opening quote -> characters that may close it
+QUOTES = {
+    '"': '"',
+    '“': '”“"',  # “ ” (models mix these up)
+    '”': '”“"',
+    '„': '”“"',  # „
+    "'": "'",
+    '‘': "’‘'",  # ‘ ’
+    '’': "’‘'",
+}
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+FENCE = re.compile(r"```(?:json)?")
+
+
+def _drop_trailing_comma(out: List[str]):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def repair_json(text: str) -> str:
+    """Rewrite almost-JSON into JSON; unterminated strings and containers are closed."""
+    out: List[str] = []
+    stack: List[str] = []
+    close = None  # closing quote characters while inside a string
+    escaped = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if close is not None:
+            if escaped:
+                out.append(ch)
+                escaped = False
+            elif ch == "\\":
+                out.append(ch)
+                escaped = True
+            elif ch in close:
+                out.append('"')
+                close = None
+            elif ch == '"':
+                out.append('\\"')  # straight quote inside a smart/single-quoted string
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\t":
+                out.append("\\t")
+            else:
+                out.append(ch)
+        elif ch in QUOTES:
+            out.append('"')
+            close = QUOTES[ch]
+        elif ch in "{[":
+            stack.append(ch)
+            out.append(ch)
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(ch)
+        else:
+            word = re.match(r"[A-Za-z]+", text[i:])
+            if word and word.group() in PYTHON_LITERALS:
+                out.append(PYTHON_LITERALS[word.group()])
+                i += len(word.group())
+                continue
+            out.append(ch)
+        i += 1
+
+    # Output cut off midway: close whatever is still open
+    if close is not None:
+        if escaped:
+            out.pop()
+        out.append('"')
+    _drop_trailing_comma(out)
+    if out and out[-1] == ":":
+        out.append("null")
+    for opener in reversed(stack):
+        _drop_trailing_comma(out)
+        out.append("}" if opener == "{" else "]")
+    return "".join(out)
+
+
+def loads_tolerant(text: str) -> Any:
+    """json.loads, retried on the repaired text; only the first JSON value is used."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        value, _ = json.JSONDecoder().raw_decode(repair_json(text).strip())
+        return value
+
+
+def json_body(text: str) -> str:
+    """The part of the model output that should hold the decision object."""
+    text = FENCE.sub("", text.strip())
+    start = text.find("<json>")
+    if start != -1:
+        text = text[start + len("<json>"):]
+        end = text.find("</json>")
+        if end != -1:
+            text = text[:end]
+    brace = text.find("{")
+    if brace == -1:
+        raise ValueError("No <json> block found")
+    return text[brace:]
+
+
+def extract_json(text: str) -> dict:
+    """Extract the decision object from complete model output, repairing it if needed."""
+    data = loads_tolerant(json_body(text))
+    if not isinstance(data, dict):
+        raise ValueError("Decision is not a JSON object")
+    return data
+
+
+class StreamingDecisionParser:
+    """
+    Incremental parser for a decision streamed as token deltas.
+
+    Top-level fields are parsed the moment their value is complete, so:
+    - `on_tool_call({"tool", "args"})` fires as soon as a tool and its args are
+      known (and for each finished element of "tool_calls"), letting the tool
+      start before "reasoning"/"answer" are written;
+    - `on_answer(text)` receives the "answer" string piece by piece, but only
+      if "is_satisfied": true came first, so tool-calling turns are never spoken.
+    """
+
+    def __init__(self, on_tool_call: Optional[Callable[[Dict], None]] = None,
+                 on_answer: Optional[Callable[[str], None]] = None):
+        self.on_tool_call = on_tool_call
+        self.on_answer = on_answer
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self.emitted = ""  # answer text passed to on_answer
+        self._answer_piece: List[str] = []  # answer text decoded during the current feed()
+        self.tool_calls: List[Dict] = []  # calls passed to on_tool_call
+
+        self._i = None  # scan position (None until the object starts)
+        self._stack: List[str] = []
+        self._close = None  # closing quote characters while inside a string
+        self._string: List[str] = []  # decoded text of the current key/answer string
+        self._key = None  # current top-level key
+        self._expect_key = True
+        self._value_start = None  # buffer index where the current top-level value starts
+        self._element_start = None  # buffer index of the current "tool_calls" element
+        self._streaming_answer = False
+
+    # ---------- feeding ----------
+    def feed(self, delta: str):
+        self.buffer += delta
+        if self._i is None:
+            start = self.buffer.find("{", self.buffer.find("<json>") + 1 if "<json>" in self.buffer else 0)
+            if start == -1:
+                return
+            self._i = start
+        self._scan()
+
+    def _scan(self):
+        buf = self.buffer
+        i = self._i
+        while i < len(buf) and not self._finished:
+            ch = buf[i]
+            if self._close is not None:
+                step = self._scan_string(buf, i)
+                if step == 0:
+                    break  # escape split across deltas; wait for more text
+                i += step
+                continue
+
+            depth = len(self._stack)
+            if ch in QUOTES:
+                self._close = QUOTES[ch]
+                self._string = []
+                if depth == 1 and not self._expect_key and self._value_start is None:
+                    self._value_start = i
+                    self._streaming_answer = (self._key == "answer" and self.on_answer is not None
+                                              and self.fields.get("is_satisfied") is True)
+            elif ch in "{[":
+                if depth == 1 and self._value_start is None:
+                    self._value_start = i
+                if depth == 2 and self._key == "tool_calls" and ch == "{":
+                    self._element_start = i
+                self._stack.append(ch)
+            elif ch in "}]":
+                if depth == 1:
+                    self._end_value(i)
+                if self._stack:
+                    self._stack.pop()
+                if len(self._stack) == 1 and self._value_start is not None:
+                    self._end_value(i + 1)
+                elif len(self._stack) == 2 and self._element_start is not None and ch == "}":
+                    self._tool_call_element(buf[self._element_start:i + 1])
+                    self._element_start = None
+            elif depth == 1:
+                if ch == ":":
+                    self._expect_key = False
+                elif ch == ",":
+                    self._end_value(i)
+                    self._expect_key = True
+                elif not ch.isspace() and not self._expect_key and self._value_start is None:
+                    self._value_start = i  # number / true / false / null
+            i += 1
+        self._i = i
+
+        if self._answer_piece:
+            piece = "".join(self._answer_piece)
+            self._answer_piece = []
+            self.emitted += piece
+            self.on_answer(piece)
+
+    def _scan_string(self, buf: str, i: int) -> int:
+        """Consume one (possibly escaped) character of a string; 0 if more text is needed."""
+        ch = buf[i]
+        if ch == "\\":
+            if i + 1 >= len(buf):
+                return 0
+            if buf[i + 1] == "u":
+                if i + 6 > len(buf):
+                    return 0
+                try:
+                    self._string_char(chr(int(buf[i + 2:i + 6], 16)))
+                except ValueError:
+                    pass
+                return 6
+            self._string_char(ESCAPES.get(buf[i + 1], buf[i + 1]))
+            return 2
+        if ch in self._close:
+            self._close = None
+            if len(self._stack) == 1:
+                if self._expect_key:
+                    self._key = "".join(self._string)
+                else:
+                    self._end_value(i + 1)
+            return 1
+        self._string_char(ch)
+        return 1
+
+    def _string_char(self, ch: str):
+        if len(self._stack) != 1:
+            return
+        if self._streaming_answer:
+            self._answer_piece.append(ch)
+        elif self._expect_key:
+            self._string.append(ch)
+
+    @property
+    def final(self) -> bool:
+        """Whether the decision has committed to answering: "is_satisfied": true or an "ask_user" question."""
+        return self.fields.get("is_satisfied") is True or bool(self.fields.get("ask_user"))
+
+    @property
+    def _finished(self) -> bool:
+        return self._i is not None and not self._stack and self._key is not None
+
+    # ---------- completed values ----------
+    def _end_value(self, end: int):
+        if self._value_start is None or self._key is None:
+            return
+        raw = self.buffer[self._value_start:end]
+        self._value_start = None
+        self._streaming_answer = False
+        try:
+            self.fields[self._key] = loads_tolerant(raw)
+        except ValueError:
+            return
+        if self._key in ("tool", "args"):
+            self._maybe_tool_call()
+
+    def _maybe_tool_call(self):
+        tool, args = self.fields.get("tool"), self.fields.get("args")
+        if isinstance(tool, str) and tool and isinstance(args, dict):
+            self._emit_tool_call({"tool": tool, "args": args})
+
+    def _tool_call_element(self, raw: str):
+        try:
+            call = loads_tolerant(raw)
+        except ValueError:
+            return
+        if isinstance(call, dict):
+            name = call.get("tool") or call.get("name")
+            args = call.get("args") or call.get("arguments") or {}
+            if isinstance(name, str) and name and isinstance(args, dict):
+                self._emit_tool_call({"tool": name, "args": args})
+
+    def _emit_tool_call(self, call: Dict):
+        if call in self.tool_calls:
+            return
+        self.tool_calls.append(call)
+        if self.on_tool_call is not None:
+            self.on_tool_call(call)
+
+    # ---------- result ----------
+    def result(self) -> dict:
+        """The whole decision: tolerant parse of the full output, else the fields seen so far."""
+        try:
+            return extract_json(self.buffer)
+        except ValueError:
+            if self.fields:
+                return dict(self.fields)
+            raise
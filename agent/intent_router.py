@@ -0,0 +1,348 @@
+"""
+Intent router: answer deterministic requests without the agent's LLM loop.
+
+Two stages classify a query:
+- compiled cue regexes (and explicit tool names) that are precise but narrow;
+- a tiny naive Bayes classifier over words and word pairs, trained at import
+  on the examples below, that catches rephrasings the cues miss.
+
+A confident route with all its arguments known is dispatched directly: the
+tool runs, and the answer comes from a template (time, navigation) or from a
+single phrasing call to the LLM (vision, live lookups). Everything else goes
+through the agent loop, with the route's hint added to the first decision.
+"""
+import re
+import sys
+import math
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from config.settings import ROUTER_CONFIDENCE
+from tools.navigation.nav import graph_nodes
+
+# Cue words per intent, checked in this order (first match wins)
+INTENT_CUES = [
+    ("time", re.compile(r"\b(time|clock|date|what day|which day|o'?clock)\b", re.I)),
+    ("vision", re.compile(
+        r"\b(see|seeing|look(ing)?|in ?front of me|camera|this|these|around me|visiondetect)\b", re.I)),
+    ("navigation", re.compile(
+        r"\b(navigate|directions?|route|way to|get to|go to|take me|guide me|lead me|how far|from .+ to|to .+ from)\b",
+        re.I)),
+    ("live", re.compile(r"\b(weather|news|latest|current(ly)?|today|tonight|price|cost|how much|score|now)\b", re.I)),
+]
+
+# "use search_web", "search the internet for ..." name the tool outright
+EXPLICIT_TOOLS = [
+    ("live", "search_web", re.compile(r"\b(use|with)\b.*\bsearch_web\b|\bsearch (the )?(web|internet|online)\b", re.I)),
+    ("vision", "VisionDetect", re.compile(r"\b(use|with)\b.*\b(vision|visiondetect)\b", re.I)),
+    ("navigation", "NavigateAStar", re.compile(r"\b(use|with)\b.*\bnavigateastar\b", re.I)),
+]
+
+# Only these whole-query phrasings ask for the current time/date; "what time does the museum open"
+# or "the date of the french revolution" merely mention it
+CURRENT_TIME = re.compile(
+    r"^\s*(please\s+)?(what'?s( the)?( current)? (time|date)|what is( the)?( current)? (time|date)|what time is it"
+    r"|what time|what day is (it|today)|what'?s today'?s date|what is today'?s date|what hour is it|how late is it"
+    r"|(tell me|do you know) (the|what) (time|date|day)( it is)?|(the )?current (time|date))"
+    r"( (right )?now| today| please| in [\w' -]+?)*\s*[?.!]*\s*$", re.I)
+
+# The query is about the user's surroundings: a scene phrase anywhere, or a short question that is nothing
+# else ("what is this word in spanish" and "can you see a doctor" are not)
+SCENE_WORDS = re.compile(r"\b(in front of me|around me|near me|my surroundings|the camera|your camera)\b", re.I)
+SCENE_QUERY = re.compile(
+    r"^\s*(please\s+)?(what('?s| is| are)( this| that| these| those| here)|what (am i|are we) (seeing|looking at)"
+    r"|what (do|can) you see|(can|do) you see anything|describe (this|that|what you see|the scene)|look around"
+    r"|identify (this|that)( object| thing)?)"
+    r"( (right )?now| here| please| for me)*\s*[?.!]*\s*$", re.I)
+
+# Time at some other place needs a lookup; the gateway clock only answers local time
+TIME_ELSEWHERE = re.compile(r"\btime\b.*\b(in|at)\s+(?!the morning|the evening|the afternoon)\w+", re.I)
+
+HINT_CONFIDENCE = 0.6  # below this a route doesn't even add a hint
+
+INTENT_TOOLS = {"vision": "VisionDetect", "navigation": "NavigateAStar", "live": "search_web"}
+
+TRAINING_EXAMPLES = {
+    "time": [
+        "what time is it", "what time is it right now", "tell me the time", "what's the time",
+        "what is today's date", "what day is it today", "what's the date", "do you know the time",
+        "what time is it in dubai", "current time please", "how late is it", "what hour is it",
+    ],
+    "vision": [
+        "what am i seeing", "what is in front of me", "what do you see", "describe what's around me",
+        "what is this", "what am i looking at", "can you see anything", "what objects are here",
+        "is there a chair near me", "how many people are in front of me", "read what's in front of me",
+        "how can i fix this", "identify this object", "what's on the table", "look around",
+    ],
+    "navigation": [
+        "how do i get from the entrance to the dean office", "take me to the dean office",
+        "directions from the entrance to floor 1", "where is hall 2-0-25", "guide me to the elevator",
+        "how far is the library from here", "navigate to the stairs", "which way to the exit",
+        "route from the elevator to hall 2-1-76", "lead me to the cafeteria", "how do i reach the lab",
+    ],
+    "live": [
+        "what's the weather in cairo", "latest news", "how much is an iphone 13", "price of bitcoin",
+        "who won the match yesterday", "search the web for restaurants", "what is the exchange rate",
+        "current news about egypt", "is it going to rain tomorrow", "stock price of apple",
+        "what's happening in the world", "look up the opening hours of the museum",
+        "is it raining in london", "is it hot outside", "will it snow this week",
+    ],
+    "general": [
+        "what is 2+2", "what is the integration of velocity", "what should i have for dinner",
+        "recommend me something for dinner", "tell me a joke", "explain photosynthesis",
+        "who wrote hamlet", "how do i make pancakes", "translate hello to arabic", "what is a prime number",
+        "write a short poem", "give me a tip to study better", "what's the capital of france",
+    ],
+}
+
+PHRASING_PROMPT = """You are the voice of a pair of smart glasses. Answer the user's question in ONE short \
+paragraph with no lists or formatting, using only the tool result. If the result doesn't answer the \
+question, say what you found."""
+
+
+def log(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+# ---------- classifier ----------
+def features(text: str) -> List[str]:
+    words = re.findall(r"[a-z0-9']+", text.lower().replace("’", "'"))
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class NaiveBayes:
+    """Multinomial naive Bayes with add-one smoothing."""
+
+    def __init__(self, examples: Dict[str, List[str]]):
+        self.counts: Dict[str, Counter] = {label: Counter() for label in examples}
+        self.priors: Dict[str, float] = {}
+        total = sum(len(texts) for texts in examples.values())
+        for label, texts in examples.items():
+            self.priors[label] = math.log(len(texts) / total)
+            for text in texts:
+                self.counts[label].update(features(text))
+        self.vocabulary = set().union(*self.counts.values())
+        self.totals = {label: sum(counts.values()) for label, counts in self.counts.items()}
+
+    def predict(self, text: str) -> Dict[str, float]:
+        """Probability of each label."""
+        feats = [f for f in features(text) if f in self.vocabulary]
+        scores = {}
+        for label, counts in self.counts.items():
+            denominator = self.totals[label] + len(self.vocabulary)
+            scores[label] = self.priors[label] + sum(math.log((counts[f] + 1) / denominator) for f in feats)
+        best = max(scores.values())
+        exp = {label: math.exp(score - best) for label, score in scores.items()}
+        total = sum(exp.values())
+        return {label: value / total for label, value in exp.items()}
+
+
+classifier = NaiveBayes(TRAINING_EXAMPLES)
+
+
+# ---------- navigation slots ----------
+def navigation_args(query: str) -> Optional[dict]:
+    """{"start", "destination"} if the query names two known locations."""
+    found: List[Tuple[int, str]] = []
+    taken = []
+    for node in graph_nodes():
+        for match in re.finditer(rf"(?<!\w){re.escape(node)}(?!\w)", query, re.I):
+            if not any(start < match.end() and match.start() < end for start, end in taken):
+                taken.append((match.start(), match.end()))
+                found.append((match.start(), node))
+    if len({node for _, node in found}) != 2:
+        return None
+    found.sort()
+    (first_pos, first), (_, second) = found[0], found[-1]
+    # "to X from Y" names the destination first
+    before_first = query[:first_pos].lower().rstrip()
+    if re.search(r"\b(to|reach)( the)?$", before_first) and re.search(r"\bfrom\b", query[first_pos:], re.I):
+        first, second = second, first
+    return {"start": first, "destination": second}
+
+
+# ---------- routing ----------
+class Route:
+    """Where a query should go: intent, confidence and (if dispatchable) the tool call."""
+
+    def __init__(self, intent: str, confidence: float, tool: Optional[str] = None, args: Optional[dict] = None,
+                 explicit: bool = False):
+        self.intent = intent
+        self.confidence = confidence
+        self.tool = tool
+        self.args = args
+        self.explicit = explicit
+
+    @property
+    def direct(self) -> bool:
+        """Whether the route can skip the agent loop."""
+        if self.confidence < ROUTER_CONFIDENCE or self.args is None:
+            return False
+        return self.intent == "time" or self.tool is not None  # time: local clock ({}), or search_web elsewhere
+
+    @property
+    def hint(self) -> str:
+        """Instruction for the agent's first decision when the route isn't dispatched."""
+        if self.explicit:
+            return (f"CRITICAL: The user explicitly asked you to use the {self.tool} tool. You MUST use it. "
+                    "Do not say you don't have access to tools - you do!")
+        if self.confidence < HINT_CONFIDENCE:
+            return ""
+        if self.intent == "live" or (self.intent == "time" and self.args is not None):
+            return ("CRITICAL: The user is asking for real-time information (time, current events, web search). "
+                    "You MUST use the search_web tool to get this information.")
+        if self.intent == "navigation":
+            return ("The user wants directions: use NavigateAStar with start and destination locations from the "
+                    "building; ask the user for a location that is missing.")
+        return ""
+
+    def to_dict(self) -> dict:
+        return {"intent": self.intent, "confidence": round(self.confidence, 3), "tool": self.tool,
+                "direct": self.direct}
+
+
+def query_intent(query: str) -> str:
+    """Intent from the cue words alone ("general" if none match)."""
+    for intent, cues in INTENT_CUES:
+        if cues.search(query):
+            return intent
+    return "general"
+
+
+def route_intent(query: str) -> Route:
+    """Classify `query` and fill in the tool call when its arguments are known."""
+    for intent, tool, pattern in EXPLICIT_TOOLS:
+        if pattern.search(query):
+            args = route_args(intent, query, explicit=True)
+            return Route(intent, 1.0, tool, args, explicit=True)
+
+    cue_intent = query_intent(query)
+    probabilities = classifier.predict(query)
+    model_intent = max(probabilities, key=probabilities.get)
+    if cue_intent == "general":
+        # The classifier alone only steers the agent (hint); it never dispatches directly
+        intent, confidence = model_intent, probabilities[model_intent] * 0.75
+    elif cue_intent == model_intent:
+        # A single cue word agreeing with the classifier adds no confidence of its own; whether the route is
+        # dispatchable at all is decided by its arguments (anchored time and scene phrasings, known locations)
+        intent, confidence = cue_intent, probabilities[model_intent]
+    else:
+        intent, confidence = cue_intent, max(0.5, probabilities[cue_intent])
+
+    tool = INTENT_TOOLS.get(intent)
+    if intent == "time" and TIME_ELSEWHERE.search(query):
+        tool = "search_web"
+    args = route_args(intent, query, tool)
+    if intent in ("time", "vision") and cue_intent == intent and args is not None:
+        confidence = max(0.9, confidence)  # the whole query is a time/scene phrasing, not just a cue word
+    return Route(intent, confidence, tool, args)
+
+
+def route_args(intent: str, query: str, tool: Optional[str] = None, explicit: bool = False) -> Optional[dict]:
+    """Arguments of the route's tool call, or None if the query doesn't pin them down."""
+    if intent == "navigation":
+        return navigation_args(query)
+    if intent == "vision":
+        return {} if explicit or SCENE_WORDS.search(query) or SCENE_QUERY.match(query) else None
+    if intent == "time":
+        if not CURRENT_TIME.match(query):
+            return None
+        return {"query": query} if tool == "search_web" else {}
+    if intent == "live":
+        return {"query": query}
+    return None
+
+
+# ---------- dispatch ----------
+def time_answer(now: Optional[datetime] = None) -> str:
+    now = now or datetime.now()
+    return f"It's {now:%H:%M} on {now:%A, %B} {now.day}, {now.year}."
+
+
+def navigation_answer(result: str) -> str:
+    """NavigateAStar's step list as one paragraph."""
+    lines = [line.strip() for line in result.splitlines() if line.strip()]
+    return " ".join(line if line.endswith((".", ":", ")")) else f"{line}." for line in lines)
+
+
+async def phrase(query: str, tool: str, result: str, on_answer: Optional[Callable[[str], None]] = None) -> str:
+    """
+    One LLM call turning a tool result into the answer, streamed to `on_answer`.
+
+    On an API error the text streamed so far is returned ("" if none).
+    """
+    from agent.api_llm import generate_chat_stream
+
+    messages = [
+        {"role": "system", "content": PHRASING_PROMPT},
+        {"role": "user", "content": f"Question: {query}\n\nTool {tool} result:\n{result}"},
+    ]
+    pieces = []
+    try:
+        async for delta in generate_chat_stream(messages, max_tokens=256, temperature=0.3):
+            pieces.append(delta)
+            if on_answer:
+                on_answer(delta)
+    except Exception as e:
+        log(f"Phrasing failed: {e}")
+    return "".join(pieces).strip()
+
+
+async def dispatch(client, route: Route, query: str, run_tool, on_answer: Optional[Callable[[str], None]] = None,
+                   metrics: Optional[dict] = None, detections: Optional[str] = None, session=None) -> Optional[str]:
+    """
+    Answer a direct route: run its tool, then a template or one phrasing call.
+
+    Returns None (nothing sent to `on_answer`) when the agent loop should
+    handle the query after all, e.g. because the tool failed.
+    """
+    start = time.perf_counter()
+    llm_calls = 0
+    tool = route.tool
+    if route.intent == "time" and tool != "search_web":
+        answer, tool, text = time_answer(), None, None
+        if on_answer:
+            on_answer(answer)
+    else:
+        if tool == "VisionDetect" and detections:
+            ok, text = True, detections  # the gateway already ran detection on the uploaded image
+        else:
+            ok, text = await run_tool(client, tool, route.args)
+        if not ok:
+            log(f"Direct {tool} failed ({text}); using the agent loop")
+            return None
+        if route.intent == "navigation":
+            answer = navigation_answer(text)
+            if on_answer:
+                on_answer(answer)
+        else:
+            llm_calls = 1
+            answer = await phrase(query, tool, text, on_answer)
+            if not answer:
+                return None
+
+    if session is not None:
+        session.memory.add("User", query)
+        if tool is not None:
+            session.memory.add(f"Tool({tool})", text)
+            session.record_tool_result(tool, route.args or {}, text)
+        session.memory.add("Answer", answer)
+    if metrics is not None:
+        metrics["route"] = {**route.to_dict(), "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+        metrics["llm_calls"] = llm_calls
+        metrics["tools"] = [tool] if tool else []
+        metrics["outcome"] = "answer"
+    return answer
+
+
+_stats: Dict[str, int] = defaultdict(int)
+
+
+def record_route(name: str):
+    _stats[name] += 1
+
+
+def router_stats() -> dict:
+    """Requests answered per direct route, "fallback" for failed direct attempts, "agent" for the agent loop."""
+    return dict(_stats)
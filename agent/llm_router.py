@@ -0,0 +1,349 @@
+"""
+Multi-provider routing of LLM calls over OpenAI-compatible endpoints.
+
+Providers come from LLM_PROVIDERS and their rate limits (requests and tokens
+per minute/hour/day) from the free-llm-api-resources catalog, the README that
+pull_available_models.py generates. Each call goes to the provider with the
+lowest latency EWMA that still has quota for it; if that provider hasn't
+answered by its p90 latency, the next one is asked as well and the first
+response wins. Errors and 429s put a provider on a short cooldown.
+
+LLMRouter has the chat_completion* methods of CerebrasAPIClient, so
+get_api_client() can return either.
+"""
+import re
+import sys
+import time
+import asyncio
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+from agent.api_llm import APIError, CerebrasAPIClient
+from agent.memory import count_message_tokens
+from config.settings import (
+    MODEL_ID, LLM_PROVIDERS, LLM_CATALOG_PATH, LLM_EWMA_ALPHA, LLM_LATENCY_WINDOW, LLM_HEDGE_QUANTILE,
+    LLM_HEDGE_MIN_SAMPLES, LLM_HEDGE_DELAY, LLM_RATE_LIMIT_COOLDOWN, LLM_ERROR_COOLDOWN
+)
+
+WINDOWS = {"minute": 60, "hour": 3600, "day": 86400, "month": 30 * 86400}
+LIMIT = re.compile(r"([\d,]+) (requests|tokens)/(minute|hour|day|month)")
+SECTION = re.compile(r"^### \[([^\]]+)\]", re.M)
+TABLE_ROW = re.compile(r"<tr><td>(.*?)</td><td>(.*?)</td></tr>")
+SHARED_LIMITS = re.compile(r"\*\*Limits:\*\*\s*(.+)")
+
+
+def log(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+# ---------- catalog ----------
+def parse_limits(text: str) -> Dict[str, int]:
+    """{"requests/day": 14400, "tokens/minute": 60000, ...}; the first figure per limit wins."""
+    limits: Dict[str, int] = {}
+    for value, kind, window in LIMIT.findall(text):
+        limits.setdefault(f"{kind}/{window}", int(value.replace(",", "")))
+    return limits
+
+
+def load_catalog(path=LLM_CATALOG_PATH) -> Dict[str, dict]:
+    """{provider: {"limits": limits shared by its models, "models": {model name: limits}}}."""
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except OSError as e:
+        log(f"LLM catalog not loaded ({e}); providers run without quota limits")
+        return {}
+    parts = SECTION.split(text)
+    catalog = {}
+    for name, body in zip(parts[1::2], parts[2::2]):
+        shared = SHARED_LIMITS.search(body)
+        catalog[name] = {
+            "limits": parse_limits(shared.group(1)) if shared else {},
+            "models": {re.sub(r"<[^>]+>", "", model): parse_limits(limits)
+                       for model, limits in TABLE_ROW.findall(body)},
+        }
+    return catalog
+
+
+def model_key(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def catalog_limits(catalog: Dict[str, dict], provider: str, model: str) -> Dict[str, int]:
+    """
+    Limits of a provider's model: the catalog row whose name matches the model ID
+    ("llama-3.3-70b-versatile" -> "Llama 3.3 70B", longest match wins) over the
+    provider's shared limits.
+    """
+    entry = catalog.get(provider)
+    if entry is None:
+        return {}
+    key = model_key(model)
+    names = [name for name in entry["models"] if model_key(name) and key.startswith(model_key(name))]
+    best = max(names, key=len) if names else None
+    return {**entry["limits"], **(entry["models"][best] if best else {})}
+
+
+# ---------- quota ----------
+class Quota:
+    """Requests and tokens sent in sliding windows, against a provider's limits."""
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = {}
+        for key, limit in limits.items():
+            kind, window = key.split("/")
+            if kind in ("requests", "tokens") and window in WINDOWS:
+                self.limits[key] = (kind, WINDOWS[window], limit)
+        self.horizon = max((window for _, window, _ in self.limits.values()), default=0)
+        self.events: Deque[list] = deque()  # [time, tokens], oldest first
+        self.blocked_until = 0.0
+
+    def _prune(self, now: float):
+        while self.events and now - self.events[0][0] > self.horizon:
+            self.events.popleft()
+
+    def remaining(self) -> Dict[str, int]:
+        now = time.monotonic()
+        self._prune(now)
+        left = {}
+        for key, (kind, window, limit) in self.limits.items():
+            recent = [tokens for at, tokens in self.events if now - at <= window]
+            used = len(recent) if kind == "requests" else sum(recent)
+            left[key] = limit - used
+        return left
+
+    def allows(self, tokens: int) -> bool:
+        """Whether a request of about `tokens` tokens fits every limit right now."""
+        if time.monotonic() < self.blocked_until:
+            return False
+        left = self.remaining()
+        return all(left[key] >= (1 if kind == "requests" else tokens)
+                   for key, (kind, _, _) in self.limits.items())
+
+    def record(self, tokens: int) -> list:
+        """Count a request; the returned entry's token count can be corrected once usage is known."""
+        event = [time.monotonic(), tokens]
+        if self.horizon:
+            self.events.append(event)
+        return event
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+# ---------- endpoints ----------
+class Endpoint:
+    """One model at one provider: its client, quota and latency record."""
+
+    def __init__(self, provider: str, model: str, client: CerebrasAPIClient, limits: Dict[str, int]):
+        self.provider = provider
+        self.model = model
+        self.client = client
+        self.quota = Quota(limits)
+        self.ewma: Optional[float] = None
+        self.samples: Deque[float] = deque(maxlen=LLM_LATENCY_WINDOW)
+        self.cooldown_until = 0.0
+        self.stats = {"requests": 0, "wins": 0, "hedges": 0, "errors": 0, "rate_limited": 0}
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}/{self.model}"
+
+    def observe(self, seconds: float):
+        self.ewma = seconds if self.ewma is None else LLM_EWMA_ALPHA * seconds + (1 - LLM_EWMA_ALPHA) * self.ewma
+        self.samples.append(seconds)
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for this endpoint before asking another (its p90 latency)."""
+        if len(self.samples) < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_DELAY
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(LLM_HEDGE_QUANTILE * len(ordered)))]
+
+    def available(self, tokens: int) -> bool:
+        return time.monotonic() >= self.cooldown_until and self.quota.allows(tokens)
+
+    def failed(self, error: Exception):
+        self.stats["errors"] += 1
+        if isinstance(error, APIError) and error.status == 429:
+            self.stats["rate_limited"] += 1
+            self.quota.block(LLM_RATE_LIMIT_COOLDOWN)
+        elif not isinstance(error, APIError) or error.status is None or error.status >= 500:
+            self.cooldown_until = time.monotonic() + LLM_ERROR_COOLDOWN
+
+    def summary(self) -> dict:
+        return {
+            **self.stats,
+            "ewma": round(self.ewma, 3) if self.ewma is not None else None,
+            "p90": round(self.hedge_delay(), 3),
+            "remaining": self.quota.remaining(),
+            "cooling_down": time.monotonic() < max(self.cooldown_until, self.quota.blocked_until),
+        }
+
+
+class LLMRouter:
+    """
+    Several providers behind the CerebrasAPIClient interface.
+
+    Usage:
+        async with LLMRouter(LLM_PROVIDERS, load_catalog()) as router:
+            result = await router.chat_completion_raw(messages, model="llama3.1-8b")
+    """
+
+    def __init__(self, providers: List[dict], catalog: Dict[str, dict], default_model: str = MODEL_ID):
+        self.default_model = default_model
+        self.model_id = default_model
+        self.clients: List[CerebrasAPIClient] = []
+        self.routes: Dict[str, List[Endpoint]] = defaultdict(list)
+        for provider in providers:
+            # No retries inside a client: the router fails over to the next provider instead
+            client = CerebrasAPIClient(provider["base_url"], provider["api_key"], default_model, retries=0)
+            self.clients.append(client)
+            for model, provider_model in provider["models"].items():
+                limits = catalog_limits(catalog, provider["name"], provider_model)
+                self.routes[model].append(Endpoint(provider["name"], provider_model, client, limits))
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "no_quota": 0}
+
+    async def __aenter__(self):
+        for client in self.clients:
+            await client.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        for client in self.clients:
+            await client.__aexit__(exc_type, exc_val, exc_tb)
+
+    async def warmup(self) -> bool:
+        return any(await asyncio.gather(*(client.warmup() for client in self.clients)))
+
+    # ---------- selection ----------
+    def candidates(self, model: Optional[str], tokens: int) -> List[Endpoint]:
+        """Endpoints serving `model` with quota for `tokens`, fastest first (unmeasured ones are tried first)."""
+        endpoints = self.routes.get(model or self.default_model)
+        if not endpoints:
+            raise APIError(f"No provider serves model {model or self.default_model}", 404)
+        ranked = [e for e in endpoints if e.available(tokens)]
+        ranked.sort(key=lambda e: e.ewma or 0.0)
+        if not ranked:
+            self.stats["no_quota"] += 1
+            raise APIError(f"No provider has quota left for {model or self.default_model}", 429)
+        return ranked
+
+    async def _timed(self, endpoint: Endpoint, tokens: int,
+                     call: Callable[[Endpoint], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        endpoint.stats["requests"] += 1
+        event = endpoint.quota.record(tokens)
+        start = time.perf_counter()
+        try:
+            result = await call(endpoint)
+        except asyncio.CancelledError:
+            # Lost to a hedge: the time so far is a lower bound of its latency, so the EWMA still learns it is slow
+            endpoint.observe(time.perf_counter() - start)
+            raise
+        except Exception as e:
+            endpoint.failed(e)
+            if isinstance(e, APIError):
+                e.provider = endpoint.name
+            raise
+        endpoint.observe(time.perf_counter() - start)
+        usage = result.get("usage") or {}
+        if usage.get("total_tokens"):
+            event[1] = usage["total_tokens"]
+        return result
+
+    async def _hedged(self, ranked: List[Endpoint], tokens: int,
+                      call: Callable[[Endpoint], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """First successful response: primary, a hedge after the primary's p90, then failover in order."""
+        queue = list(ranked)
+        pending: Dict[asyncio.Task, tuple] = {}  # task -> (endpoint, started, is_hedge)
+        hedged = False
+        last_error: Optional[Exception] = None
+
+        def launch(is_hedge: bool = False):
+            endpoint = queue.pop(0)
+            task = asyncio.ensure_future(self._timed(endpoint, tokens, call))
+            pending[task] = (endpoint, time.monotonic(), is_hedge)
+
+        self.stats["calls"] += 1
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if not hedged and queue and len(pending) == 1:
+                    endpoint, started, _ = next(iter(pending.values()))
+                    timeout = max(0.0, endpoint.hedge_delay() - (time.monotonic() - started))
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slower than its p90: ask the next provider too, keep whichever answers first
+                    hedged = True
+                    self.stats["hedged"] += 1
+                    queue[0].stats["hedges"] += 1
+                    launch(is_hedge=True)
+                    continue
+                for task in done:
+                    endpoint, _, is_hedge = pending.pop(task)
+                    if task.exception() is None:
+                        endpoint.stats["wins"] += 1
+                        if is_hedge:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    last_error = task.exception()
+                    log(f"LLM provider {endpoint.name} failed: {last_error}")
+                if not pending and queue:
+                    self.stats["failovers"] += 1
+                    launch()
+            raise last_error if isinstance(last_error, APIError) else APIError(f"All LLM providers failed: {last_error}")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # ---------- CerebrasAPIClient interface ----------
+    async def chat_completion_raw(self, messages: List[Dict[str, Any]], max_tokens: int = 512,
+                                  temperature: float = 0.1, model: Optional[str] = None, **options) -> Dict[str, Any]:
+        tokens = count_message_tokens(messages) + max_tokens
+        ranked = self.candidates(model, tokens)
+        return await self._hedged(ranked, tokens, lambda endpoint: endpoint.client.chat_completion_raw(
+            messages, max_tokens, temperature, model=endpoint.model, **options))
+
+    async def chat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 512, temperature: float = 0.1,
+                              model: Optional[str] = None) -> str:
+        result = await self.chat_completion_raw(messages, max_tokens, temperature, model=model)
+        return result["choices"][0]["message"]["content"]
+
+    async def chat_completion_stream(self, messages: List[Dict[str, str]], max_tokens: int = 512,
+                                     temperature: float = 0.1, model: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream from the fastest provider with quota; fails over only before the first delta (no hedging)."""
+        tokens = count_message_tokens(messages) + max_tokens
+        last_error: Optional[Exception] = None
+        for endpoint in self.candidates(model, tokens):
+            endpoint.stats["requests"] += 1
+            endpoint.quota.record(tokens)
+            started = False
+            try:
+                async for delta in endpoint.client.chat_completion_stream(messages, max_tokens, temperature,
+                                                                          model=endpoint.model):
+                    started = True
+                    yield delta
+                endpoint.stats["wins"] += 1
+                return
+            except APIError as e:
+                endpoint.failed(e)
+                e.provider = endpoint.name
+                if started:
+                    raise
+                last_error = e
+                self.stats["failovers"] += 1
+                log(f"LLM provider {endpoint.name} failed: {e}")
+        raise last_error
+
+    def summary(self) -> dict:
+        return {**self.stats, "endpoints": {e.name: e.summary() for endpoints in self.routes.values() for e in endpoints}}
+
+
+def build_router(providers: List[dict] = LLM_PROVIDERS, catalog_path=LLM_CATALOG_PATH) -> Optional[LLMRouter]:
+    """Router over the providers that have an API key; None if fewer than two do."""
+    configured = [p for p in providers if p.get("api_key")]
+    if len(configured) < 2:
+        return None
+    router = LLMRouter(configured, load_catalog(catalog_path))
+    log(f"LLM router over {', '.join(p['name'] for p in configured)}")
+    return router
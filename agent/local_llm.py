@@ -0,0 +1,252 @@
+"""
+Local llama.cpp backend for generate_chat, the offline fallback of the API.
+
+A GGUF model is loaded once in each of LOCAL_LLM_WORKERS processes
+(agent/local_llm_worker.py) and kept for the gateway's lifetime. Requests
+wait for a free worker; beyond LOCAL_LLM_MAX_QUEUE waiting requests new ones
+are refused instead of piling up behind a slow CPU model. Workers keep the
+KV state of shared prompt prefixes, and a request goes to the worker that
+last saw the same system prompt when it is free.
+"""
+import sys
+import time
+import zlib
+import asyncio
+import threading
+import multiprocessing
+from typing import Any, AsyncIterator, Dict, List, Optional
+from agent.api_llm import APIError
+from config.settings import (
+    LOCAL_LLM_CTX, LOCAL_LLM_THREADS, LOCAL_LLM_WORKERS, LOCAL_LLM_MAX_QUEUE, LOCAL_LLM_PREFIX_CACHE,
+    LOCAL_LLM_MIN_PREFIX, LOCAL_LLM_LOAD_TIMEOUT
+)
+
+# Request fields the local model can't honor; callers fall back to the prompt parser
+UNSUPPORTED_OPTIONS = {"tools", "tool_choice", "response_format", "logprobs"}
+
+
+def log(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+def prefix_key(messages: List[Dict[str, Any]]) -> int:
+    """Which static prompt a request starts with (first 512 characters of its first message)."""
+    first = str(messages[0].get("content") or "") if messages else ""
+    return zlib.crc32(first[:512].encode("utf-8"))
+
+
+class LocalWorker:
+    """One worker process, its pipe, and a reader thread feeding replies into an asyncio queue."""
+
+    def __init__(self, index: int, model_path: str, prefix_cache: int = LOCAL_LLM_PREFIX_CACHE):
+        self.index = index
+        self.model_path = model_path
+        self.prefix_cache = prefix_cache
+        self.process = None
+        self.conn = None
+        self.cancel = None
+        self.inbox: Optional[asyncio.Queue] = None
+        self.prefix = None  # prefix_key of the last request
+        self.busy = False
+
+    async def start(self):
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child = ctx.Pipe()
+        self.cancel = ctx.Event()
+        from agent.local_llm_worker import run_worker
+
+        self.process = ctx.Process(
+            target=run_worker, name=f"local-llm-{self.index}", daemon=True,
+            args=(child, self.cancel, self.model_path, LOCAL_LLM_CTX, LOCAL_LLM_THREADS,
+                  self.prefix_cache, LOCAL_LLM_MIN_PREFIX),
+        )
+        self.process.start()
+        child.close()
+
+        loop = asyncio.get_running_loop()
+        self.inbox = asyncio.Queue()
+        threading.Thread(target=self._read, args=(loop, self.conn, self.inbox), daemon=True).start()
+        try:
+            kind, info = await asyncio.wait_for(self.inbox.get(), LOCAL_LLM_LOAD_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.stop()
+            raise APIError(f"Local model did not load within {LOCAL_LLM_LOAD_TIMEOUT:.0f}s")
+        if kind != "ready":
+            self.stop()
+            raise APIError(f"Local model unavailable: {info}")
+        log(f"Local LLM worker {self.index} ready: {info}")
+
+    @staticmethod
+    def _read(loop, conn, inbox: asyncio.Queue):
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                message = ("error", "worker process exited")
+            loop.call_soon_threadsafe(inbox.put_nowait, message)
+            if message == ("error", "worker process exited"):
+                return
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    async def drain(self):
+        """Read the rest of an abandoned reply so the next request starts clean."""
+        while True:
+            kind, _ = await self.inbox.get()
+            if kind in ("done", "error"):
+                return
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            self.conn.send(("stop",))
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.process = None
+
+
+class LocalLLMClient:
+    """
+    llama.cpp worker processes behind the CerebrasAPIClient interface.
+
+    Usage:
+        async with LocalLLMClient("models/qwen2.5-0.5b-instruct-q4_k_m.gguf") as client:
+            text = await client.chat_completion(messages)
+
+    Tools, response_format and logprobs are not supported (APIError 501).
+    """
+
+    def __init__(self, model_path: str, workers: int = LOCAL_LLM_WORKERS, max_queue: int = LOCAL_LLM_MAX_QUEUE,
+                 prefix_cache: int = LOCAL_LLM_PREFIX_CACHE):
+        self.model_path = model_path
+        self.model_id = model_path
+        self.max_queue = max_queue
+        self.workers = [LocalWorker(i, model_path, prefix_cache) for i in range(max(1, workers))]
+        self.waiting = 0
+        self._free: Optional[asyncio.Condition] = None
+        self.stats = {"requests": 0, "rejected": 0, "cancelled": 0, "restarts": 0, "prompt_tokens": 0,
+                      "reused_prefix_tokens": 0, "completion_tokens": 0, "prefill_seconds": 0.0,
+                      "generation_seconds": 0.0, "queue_seconds": 0.0}
+
+    async def __aenter__(self):
+        self._free = asyncio.Condition()
+        await asyncio.gather(*(worker.start() for worker in self.workers))
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        for worker in self.workers:
+            worker.stop()
+
+    async def warmup(self) -> bool:
+        return all(worker.alive() for worker in self.workers)
+
+    # ---------- queueing ----------
+    async def _acquire(self, key: int) -> LocalWorker:
+        """A free worker, preferring the one that served the same prompt prefix last."""
+        if self.waiting >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise APIError(f"Local LLM queue is full ({self.waiting} waiting)", 503)
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            async with self._free:
+                await self._free.wait_for(lambda: any(not w.busy for w in self.workers))
+                free = [w for w in self.workers if not w.busy]
+                worker = next((w for w in free if w.prefix == key), free[0])
+                worker.busy = True
+        finally:
+            self.waiting -= 1
+            self.stats["queue_seconds"] += time.perf_counter() - start
+        if not worker.alive():
+            self.stats["restarts"] += 1
+            try:
+                await worker.start()
+            except APIError:
+                await self._release(worker)
+                raise
+        worker.prefix = key
+        return worker
+
+    async def _release(self, worker: LocalWorker):
+        async with self._free:
+            worker.busy = False
+            self._free.notify()
+
+    async def _drain_and_release(self, worker: LocalWorker):
+        await worker.drain()
+        await self._release(worker)
+
+    def _record(self, usage: dict):
+        for key in ("prompt_tokens", "reused_prefix_tokens", "completion_tokens", "prefill_seconds",
+                    "generation_seconds"):
+            self.stats[key] += usage.get(key, 0)
+
+    # ---------- CerebrasAPIClient interface ----------
+    async def _generate(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                        usage: dict) -> AsyncIterator[str]:
+        """Text deltas of a reply from a worker; `usage` is filled in when it is complete."""
+        self.stats["requests"] += 1
+        worker = await self._acquire(prefix_key(messages))
+        finished = False
+        try:
+            worker.conn.send(("chat", messages, max_tokens, temperature))
+            while True:
+                kind, payload = await worker.inbox.get()
+                if kind == "delta":
+                    yield payload
+                    continue
+                finished = True
+                if kind == "done":
+                    self._record(payload)
+                    usage.update(payload)
+                    return
+                raise APIError(f"Local LLM failed: {payload}", 500)
+        finally:
+            if finished:
+                await self._release(worker)
+            else:
+                # Abandoned mid-reply: stop generating, and free the worker once its reply is read
+                self.stats["cancelled"] += 1
+                worker.cancel.set()
+                asyncio.ensure_future(self._drain_and_release(worker))
+
+    async def chat_completion_stream(self, messages: List[Dict[str, str]], max_tokens: int = 512,
+                                     temperature: float = 0.1, model: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream a reply; `model` is ignored (the GGUF file decides)."""
+        async for delta in self._generate(messages, max_tokens, temperature, {}):
+            yield delta
+
+    async def chat_completion_raw(self, messages: List[Dict[str, Any]], max_tokens: int = 512,
+                                  temperature: float = 0.1, model: Optional[str] = None, **options) -> Dict[str, Any]:
+        unsupported = UNSUPPORTED_OPTIONS & set(options)
+        if unsupported:
+            raise APIError(f"Not supported by the local model: {', '.join(sorted(unsupported))}", 501)
+        usage: Dict[str, Any] = {}
+        text = "".join([delta async for delta in self._generate(messages, max_tokens, temperature, usage)])
+        usage["total_tokens"] = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+        return {"model": self.model_id, "choices": [{"message": {"role": "assistant", "content": text}}],
+                "usage": usage}
+
+    async def chat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 512, temperature: float = 0.1,
+                              model: Optional[str] = None) -> str:
+        result = await self.chat_completion_raw(messages, max_tokens, temperature)
+        return result["choices"][0]["message"]["content"]
+
+    def summary(self) -> dict:
+        stats = self.stats
+        return {
+            **{key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()},
+            "workers": sum(w.alive() for w in self.workers),
+            "waiting": self.waiting,
+            "prefix_reuse": round(stats["reused_prefix_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else 0.0,
+            "prefill_tokens_per_s": round((stats["prompt_tokens"] - stats["reused_prefix_tokens"]) / stats["prefill_seconds"], 1)
+            if stats["prefill_seconds"] else 0.0,
+            "generation_tokens_per_s": round(stats["completion_tokens"] / stats["generation_seconds"], 1)
+            if stats["generation_seconds"] else 0.0,
+        }
@@ -0,0 +1,182 @@
+"""
+llama.cpp worker process for the local LLM backend (see agent/local_llm.py).
+
+The GGUF model is loaded once per process and serves requests one at a time
+over a Pipe. KV states of shared prompt prefixes (the static system prompt
+of decide()) are saved after their first reuse, so the next request that
+starts with the same prefix only evaluates its new suffix.
+
+Only the standard library and llama_cpp are imported here: the process is
+spawned and shouldn't pay for the gateway's imports.
+"""
+import sys
+import time
+import traceback
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+# Used when the GGUF file has no chat template
+CHATML_TEMPLATE = (
+    "{% for message in messages %}<|im_start|>{{ message.role }}\n{{ message.content }}<|im_end|>\n{% endfor %}"
+    "{% if add_generation_prompt %}<|im_start|>assistant\n{% endif %}"
+)
+
+
+def log(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+def common_prefix(a: Sequence[int], b: Sequence[int]) -> int:
+    """Number of leading tokens `a` and `b` share."""
+    n = min(len(a), len(b))
+    for i in range(n):
+        if a[i] != b[i]:
+            return i
+    return n
+
+
+class PrefixCache:
+    """
+    Saved KV states of prompt prefixes, least recently used out.
+
+    A prefix is saved once two consecutive prompts share at least
+    `min_tokens` leading tokens that no saved state covers yet; that shared
+    part is the static system prompt (and whatever history didn't change).
+    """
+
+    def __init__(self, capacity: int, min_tokens: int):
+        self.capacity = capacity
+        self.min_tokens = min_tokens
+        self.entries: "OrderedDict[Tuple[int, ...], object]" = OrderedDict()
+        self.last: Sequence[int] = ()
+
+    def lookup(self, tokens: Sequence[int]) -> Tuple[int, Optional[object]]:
+        """(length, state) of the longest saved prefix of `tokens`; (0, None) if there is none."""
+        best: Tuple[int, Optional[object]] = (0, None)
+        best_key = None
+        for key, state in self.entries.items():
+            if len(key) > best[0] and common_prefix(key, tokens) == len(key):
+                best, best_key = (len(key), state), key
+        if best_key is not None:
+            self.entries.move_to_end(best_key)
+        return best
+
+    def boundary(self, tokens: Sequence[int], covered: int) -> int:
+        """Length of a new prefix worth saving (shared with the previous prompt), 0 if none."""
+        shared = common_prefix(self.last, tokens)
+        self.last = tokens
+        if self.capacity <= 0 or shared < self.min_tokens or shared <= covered:
+            return 0
+        return shared
+
+    def store(self, tokens: Sequence[int], state: object):
+        self.entries[tuple(tokens)] = state
+        self.entries.move_to_end(tuple(tokens))
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+
+class ChatModel:
+    """A llama.cpp model with its chat template and prefix cache."""
+
+    def __init__(self, model_path: str, n_ctx: int, n_threads: int, prefix_cache: int, min_prefix: int):
+        from llama_cpp import Llama
+        from llama_cpp.llama_chat_format import Jinja2ChatFormatter
+
+        self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads or None,
+                         n_gpu_layers=0, verbose=False)
+        template = self.llm.metadata.get("tokenizer.chat_template") or CHATML_TEMPLATE
+        self.formatter = Jinja2ChatFormatter(template=template, bos_token=self.token_text(self.llm.token_bos()),
+                                             eos_token=self.token_text(self.llm.token_eos()))
+        self.cache = PrefixCache(prefix_cache, min_prefix)
+
+    def token_text(self, token: int) -> str:
+        return self.llm.detokenize([token], special=True).decode("utf-8", errors="ignore")
+
+    def prompt_tokens(self, messages: List[dict]) -> Tuple[List[int], List[str]]:
+        response = self.formatter(messages=messages)
+        tokens = self.llm.tokenize(response.prompt.encode("utf-8"), add_bos=False, special=True)
+        return tokens, response.stop or []
+
+    def prepare(self, tokens: List[int]) -> int:
+        """
+        Bring the context to the longest available prefix of `tokens`; returns its length.
+
+        Llama.generate() skips whatever prefix is still in the context, so only
+        tokens after the returned length are evaluated for this request.
+        """
+        in_context = common_prefix(self.llm.input_ids.tolist(), tokens)
+        cached, state = self.cache.lookup(tokens)
+        if state is not None and cached > in_context:
+            self.llm.load_state(state)
+            in_context = cached
+
+        boundary = self.cache.boundary(tokens, max(in_context, cached))
+        if boundary:
+            # Evaluate the new shared prefix on its own and keep its state for later requests
+            self.llm.n_tokens = min(in_context, boundary)
+            self.llm.eval(tokens[self.llm.n_tokens:boundary])
+            self.cache.store(tokens[:boundary], self.llm.save_state())
+            in_context = boundary
+        return in_context
+
+    def chat(self, messages: List[dict], max_tokens: int, temperature: float, cancel, send) -> dict:
+        """Generate a reply, sending ("delta", text) messages; returns the usage."""
+        start = time.perf_counter()
+        tokens, stop = self.prompt_tokens(messages)
+        if len(tokens) + max_tokens > self.llm.n_ctx():
+            max_tokens = max(1, self.llm.n_ctx() - len(tokens))
+        reused = self.prepare(tokens)
+
+        completion_tokens = 0
+        first_token = None
+        for chunk in self.llm.create_completion(tokens, max_tokens=max_tokens, temperature=temperature,
+                                                stop=stop, stream=True):
+            if first_token is None:
+                first_token = time.perf_counter()
+            completion_tokens += 1
+            text = chunk["choices"][0]["text"]
+            if text:
+                send(("delta", text))
+            if cancel.is_set():
+                break
+        end = time.perf_counter()
+        first_token = first_token or end
+        return {
+            "prompt_tokens": len(tokens),
+            "reused_prefix_tokens": reused,
+            "completion_tokens": completion_tokens,
+            "prefill_seconds": round(first_token - start, 4),
+            "generation_seconds": round(end - first_token, 4),
+        }
+
+
+def run_worker(conn, cancel, model_path: str, n_ctx: int, n_threads: int, prefix_cache: int, min_prefix: int):
+    """
+    Process entry point. Sends ("ready", info) once the model is loaded, then
+    answers each ("chat", messages, max_tokens, temperature) with deltas and a
+    final ("done", usage) or ("error", message); ("stop",) exits.
+    """
+    try:
+        start = time.perf_counter()
+        model = ChatModel(model_path, n_ctx, n_threads, prefix_cache, min_prefix)
+        conn.send(("ready", {"load_seconds": round(time.perf_counter() - start, 2), "n_ctx": model.llm.n_ctx()}))
+    except Exception as e:
+        conn.send(("error", f"Loading {model_path} failed: {type(e).__name__}: {e}"))
+        return
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request[0] == "stop":
+            return
+        _, messages, max_tokens, temperature = request
+        cancel.clear()
+        try:
+            usage = model.chat(messages, max_tokens, temperature, cancel, conn.send)
+            conn.send(("done", usage))
+        except Exception as e:
+            log(traceback.format_exc())
+            conn.send(("error", f"{type(e).__name__}: {e}"))
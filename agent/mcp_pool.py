@@ -0,0 +1,355 @@
+"""
+Pool of MCP server subprocesses behind the ClientSession interface.
+
+One server process runs its tools one event-loop turn at a time, so a slow
+VisionDetect or search_web call delays every other request's tools. The
+pool starts MCP_POOL_SIZE copies of server/server.py and sends each call to
+the least-loaded one, except tools pinned to a slot in MCP_TOOL_AFFINITY:
+the vision tools always go to the slot that owns the camera.
+
+Workers are pinged every MCP_HEARTBEAT_INTERVAL; one that fails its health
+check or drops its connection mid-call is replaced by a warm standby
+(already started, initialized and with its model loaded) and a new standby
+is started in the background.
+"""
+import sys
+import time
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Set
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+from config.settings import (
+    MCP_POOL_SIZE, MCP_POOL_STANDBY, MCP_POOL_START_TIMEOUT, MCP_TOOL_AFFINITY, MCP_HEARTBEAT_INTERVAL,
+    MCP_HEARTBEAT_TIMEOUT
+)
+
+# Raised by a session whose server process has gone away
+TRANSPORT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream)
+
+
+def log(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+def is_transport_error(error: BaseException) -> bool:
+    """Whether a call failed because the worker is gone (the call may not have run at all)."""
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, TRANSPORT_ERRORS)
+
+
+class MCPWorker:
+    """
+    One server subprocess and its session.
+
+    The stdio transport and the session are entered and left by the worker's
+    own task (anyio requires that); other tasks only use `session`.
+    """
+
+    def __init__(self, params: StdioServerParameters, slot: Optional[int], message_handler=None):
+        self.params = params
+        self.slot = slot  # None while on standby
+        self.message_handler = message_handler
+        self.session: Optional[ClientSession] = None
+        self.state = "new"  # new, starting, ready, dead
+        self.retired = False
+        self.inflight = 0
+        self.calls = 0
+        self.started_at = None
+        self.error: Optional[BaseException] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    @property
+    def label(self) -> str:
+        return "standby" if self.slot is None else str(self.slot)
+
+    async def start(self, timeout: float = MCP_POOL_START_TIMEOUT):
+        """Spawn the server and initialize the session. Raises RuntimeError if it doesn't come up."""
+        self.state = "starting"
+        self._stop = asyncio.Event()
+        ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run(ready))
+        waiter = asyncio.ensure_future(ready.wait())
+        await asyncio.wait({self._task, waiter}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        if not ready.is_set():
+            self.state = "dead"
+            await self.stop()
+            raise RuntimeError(f"MCP worker {self.label} did not start: {self.error or 'timed out'}")
+        self.state = "ready"
+        self.started_at = time.monotonic()
+
+    async def _run(self, ready: asyncio.Event):
+        try:
+            async with stdio_client(self.params) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream, message_handler=self.message_handler) as session:
+                    await session.initialize()
+                    self.session = session
+                    ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            if self.state == "ready":
+                self.state = "dead"
+
+    async def ping(self, timeout: float = MCP_HEARTBEAT_TIMEOUT) -> bool:
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = e
+            return False
+
+    async def stop(self, timeout: float = 10.0):
+        """Leave the session and transport, which ends the process tree."""
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+    def summary(self) -> dict:
+        return {
+            "slot": self.label,
+            "state": self.state,
+            "inflight": self.inflight,
+            "calls": self.calls,
+            "uptime": round(time.monotonic() - self.started_at, 1) if self.started_at and self.ready else None,
+        }
+
+
+class MCPSessionPool:
+    """
+    MCP server subprocesses behind one call_tool/list_tools/send_ping interface.
+
+    Usage:
+        async with MCPSessionPool(server_params, message_handler=catalog.message_handler) as pool:
+            result = await pool.call_tool("search_web", {"query": "..."})
+
+    A call that loses its worker is retried once on another worker; tools
+    pinned to a slot wait for that slot's replacement instead.
+    """
+
+    def __init__(self, params: StdioServerParameters, size: int = MCP_POOL_SIZE, standby: int = MCP_POOL_STANDBY,
+                 affinity: Optional[Dict[str, int]] = None, message_handler=None,
+                 health_interval: float = MCP_HEARTBEAT_INTERVAL, health_timeout: float = MCP_HEARTBEAT_TIMEOUT,
+                 start_timeout: float = MCP_POOL_START_TIMEOUT):
+        """
+        Args:
+            params: How to start one server process
+            size: Worker processes serving calls
+            standby: Extra started processes that take over a dead worker's slot
+            affinity: Tool name -> slot; those tools only run on that slot
+            message_handler: ClientSession message_handler of every worker (e.g. the tool catalog's)
+            health_interval: Seconds between health checks
+            health_timeout: Seconds a worker has to answer a ping
+            start_timeout: Seconds a worker has to start and initialize
+        """
+        self.params = params
+        self.size = max(1, size)
+        self.standby_size = max(0, standby)
+        self.affinity = {tool: slot % self.size for tool, slot in (MCP_TOOL_AFFINITY if affinity is None else affinity).items()}
+        self.message_handler = message_handler
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.start_timeout = start_timeout
+
+        self.slots: List[MCPWorker] = []
+        self.standby: List[MCPWorker] = []
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "promoted": 0, "respawned": 0}
+        self._changed: Optional[asyncio.Event] = None
+        self._refilling: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    # ---------- lifecycle ----------
+    def worker_params(self, slot: Optional[int]) -> StdioServerParameters:
+        """Server parameters of one worker: only slots with pinned tools (and standbys) preload the model."""
+        preload = slot is None or slot in self.affinity.values()
+        env = dict(self.params.env or {}, MCP_WORKER="standby" if slot is None else str(slot),
+                   VISION_PRELOAD="true" if preload else "false")
+        return self.params.model_copy(update={"env": env})
+
+    def _new_worker(self, slot: Optional[int]) -> MCPWorker:
+        return MCPWorker(self.worker_params(slot), slot, self.message_handler)
+
+    async def __aenter__(self):
+        self._changed = asyncio.Event()
+        self.slots = [self._new_worker(slot) for slot in range(self.size)]
+        results = await asyncio.gather(*(w.start(self.start_timeout) for w in self.slots), return_exceptions=True)
+        for worker, result in zip(self.slots, results):
+            if isinstance(result, Exception):
+                log(f"[MCP] {result}")
+        if not any(w.ready for w in self.slots):
+            await self.close()
+            raise RuntimeError(f"No MCP worker started: {results[0]}")
+        log(f"[MCP] Pool of {sum(w.ready for w in self.slots)}/{self.size} workers ready")
+        self._background(self._fill_standby())
+        self._background(self._monitor())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*(w.stop() for w in self.slots + self.standby), return_exceptions=True)
+        self.standby = []
+
+    def _background(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    # ---------- health and replacement ----------
+    def _retire(self, worker: MCPWorker, reason: str):
+        """Take a failed worker out of service and start replacing it."""
+        if worker.retired:
+            return
+        worker.retired = True
+        worker.state = "dead"
+        self.stats["failures"] += 1
+        log(f"[MCP] Worker {worker.label} retired: {reason}")
+        self._background(worker.stop())
+        if worker in self.standby:
+            self.standby.remove(worker)
+            self._background(self._fill_standby())
+        elif self.slots[worker.slot] is worker:
+            self._background(self._refill_slot(worker.slot))
+        self._notify()
+
+    async def _refill_slot(self, slot: int):
+        if slot in self._refilling or self.slots[slot].state in ("starting", "ready"):
+            return
+        self._refilling.add(slot)
+        try:
+            standby = next((w for w in self.standby if w.ready), None)
+            if standby is not None:
+                # Warm takeover: already running with its model loaded
+                self.standby.remove(standby)
+                standby.slot = slot
+                self.slots[slot] = standby
+                self.stats["promoted"] += 1
+                log(f"[MCP] Standby took over slot {slot}")
+            else:
+                worker = self._new_worker(slot)
+                self.slots[slot] = worker
+                self.stats["respawned"] += 1
+                try:
+                    await worker.start(self.start_timeout)
+                    log(f"[MCP] Worker {slot} respawned")
+                except RuntimeError as e:
+                    log(f"[MCP] {e}")  # the next health check tries again
+            self._notify()
+        finally:
+            self._refilling.discard(slot)
+        await self._fill_standby()
+
+    async def _fill_standby(self):
+        while len(self.standby) < self.standby_size:
+            worker = self._new_worker(None)
+            self.standby.append(worker)
+            try:
+                await worker.start(self.start_timeout)
+            except RuntimeError as e:
+                log(f"[MCP] {e}")
+                if worker in self.standby:
+                    self.standby.remove(worker)
+                return
+            # A slot may have died while it was starting
+            for slot, current in enumerate(self.slots):
+                if not current.ready and current.state != "starting":
+                    self._background(self._refill_slot(slot))
+                    break
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            workers = [w for w in self.slots + self.standby if w.ready]
+            healthy = await asyncio.gather(*(w.ping(self.health_timeout) for w in workers))
+            for worker, ok in zip(workers, healthy):
+                if not ok:
+                    self._retire(worker, f"health check failed ({worker.error!r})")
+            for slot, worker in enumerate(self.slots):
+                if worker.state == "dead" and slot not in self._refilling:
+                    self._background(self._refill_slot(slot))
+            if len(self.standby) < self.standby_size:
+                self._background(self._fill_standby())
+
+    # ---------- dispatch ----------
+    def _candidates(self, slot: Optional[int]) -> List[MCPWorker]:
+        if slot is not None:
+            return [self.slots[slot]] if self.slots[slot].ready else []
+        return [w for w in self.slots if w.ready]
+
+    async def _pick(self, tool: Optional[str] = None) -> MCPWorker:
+        """The worker for `tool`: its pinned slot, else the one with the fewest calls in flight."""
+        slot = self.affinity.get(tool) if tool else None
+        deadline = time.monotonic() + self.start_timeout
+        while True:
+            candidates = self._candidates(slot)
+            if candidates:
+                return min(candidates, key=lambda w: (w.inflight, w.calls))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError("No MCP worker available" + (f" for slot {slot}" if slot is not None else ""))
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _call(self, tool: Optional[str], method: Callable[[ClientSession], Any]):
+        for attempt in range(2):
+            worker = await self._pick(tool)
+            worker.inflight += 1
+            worker.calls += 1
+            try:
+                return await method(worker.session)
+            except Exception as e:
+                if not is_transport_error(e) or attempt:
+                    raise
+                self._retire(worker, f"connection lost ({e!r})")
+                self.stats["retries"] += 1
+            finally:
+                worker.inflight -= 1
+
+    # ---------- ClientSession interface ----------
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, **kwargs):
+        self.stats["calls"] += 1
+        return await self._call(name, lambda session: session.call_tool(name, arguments, **kwargs))
+
+    async def list_tools(self, *args, **kwargs):
+        return await self._call(None, lambda session: session.list_tools(*args, **kwargs))
+
+    async def send_ping(self):
+        return await self._call(None, lambda session: session.send_ping())
+
+    def summary(self) -> dict:
+        return {
+            **self.stats,
+            "ready": sum(w.ready for w in self.slots),
+            "size": self.size,
+            "inflight": sum(w.inflight for w in self.slots),
+            "workers": [w.summary() for w in self.slots],
+            "standby": [w.summary() for w in self.standby],
+            "affinity": dict(self.affinity),
+        }
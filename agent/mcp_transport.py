@@ -0,0 +1,112 @@
+"""
+How the gateway reaches the MCP tools (MCP_TRANSPORT).
+
+- "stdio": server/server.py subprocesses (MCPSessionPool). Isolated: a crash
+  or a leak in a tool doesn't take the gateway down. Every call is JSON
+  over pipes, including large search_web documents.
+- "memory": the FastMCP object of server/server.py inside the gateway, with
+  a ClientSession connected over in-memory streams. Full MCP protocol
+  (initialize, notifications), no serialization and no process hop.
+- "direct": the same server's request handlers awaited as functions. No
+  session, streams or message tasks; the result objects are the same.
+
+All three have the call_tool/list_tools/send_ping interface of ClientSession.
+Tools run on the gateway's event loop in the in-process modes, so blocking
+tools must be offloaded (see TOOL_POOLS).
+"""
+import sys
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+from mcp import StdioServerParameters, types
+from config.settings import MCP_TRANSPORT, VISION_PRELOAD
+
+TRANSPORTS = ("stdio", "memory", "direct")
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def log(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+def load_server():
+    """The FastMCP object of server/server.py, imported once into this process (starts the YOLO warm-up)."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            import server.server as mcp_server
+            if VISION_PRELOAD:
+                threading.Thread(target=mcp_server.warm_up_vision, name="vision-warmup", daemon=True).start()
+            _server = mcp_server.mcp
+    return _server
+
+
+def lowlevel_server(server):
+    """The low-level mcp Server behind a FastMCP object (either FastMCP package), or `server` itself."""
+    return getattr(server, "_mcp_server", server)
+
+
+class DirectMCPClient:
+    """
+    A server's MCP request handlers behind the ClientSession interface.
+
+    Usage:
+        client = DirectMCPClient(load_server())
+        result = await client.call_tool("search_web", {"query": "..."})  # CallToolResult
+
+    Arguments are validated against the tool's input schema and results are
+    built exactly as for a remote call; only the transport is skipped.
+    """
+
+    def __init__(self, server):
+        self.server = lowlevel_server(server)
+
+    async def _request(self, request):
+        handler = self.server.request_handlers.get(type(request))
+        if handler is None:
+            raise RuntimeError(f"MCP server does not handle {request.method}")
+        result = await handler(request)
+        return result.root
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, **kwargs) -> types.CallToolResult:
+        return await self._request(types.CallToolRequest(params=types.CallToolRequestParams(name=name, arguments=arguments)))
+
+    async def list_tools(self, *args, **kwargs) -> types.ListToolsResult:
+        return await self._request(types.ListToolsRequest())
+
+    async def send_ping(self) -> types.EmptyResult:
+        return await self._request(types.PingRequest())
+
+
+@asynccontextmanager
+async def connect_mcp(params: StdioServerParameters, transport: str = MCP_TRANSPORT, message_handler=None,
+                      server=None):
+    """
+    The gateway's MCP client for `transport`, ready to use until the block exits.
+
+    Args:
+        params: How to start a server subprocess ("stdio")
+        transport: "stdio", "memory" or "direct"
+        message_handler: ClientSession message_handler (unused by "direct", which has no notifications)
+        server: FastMCP object for the in-process transports (default: server/server.py's)
+    """
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown MCP transport {transport!r}, expected one of {TRANSPORTS}")
+
+    if transport == "stdio":
+        from agent.mcp_pool import MCPSessionPool
+        async with MCPSessionPool(params, message_handler=message_handler) as pool:
+            yield pool
+        return
+
+    server = load_server() if server is None else server
+    log(f"[MCP] Serving tools in-process ({transport})")
+    if transport == "memory":
+        from mcp.shared.memory import create_connected_server_and_client_session
+        async with create_connected_server_and_client_session(lowlevel_server(server),
+                                                              message_handler=message_handler) as session:
+            yield session
+    else:
+        yield DirectMCPClient(server)
@@ -0,0 +1,173 @@
+"""
+Token-budgeted conversation memory with an incremental rolling summary.
+
+Entries (user turns, agent reasoning, tool results) are stored with their
+token counts. When they no longer fit the budget, the oldest ones are folded
+into a running summary: only the evicted entries and the previous summary are
+sent to the summarizer, never the whole conversation again.
+"""
+import re
+import sys
+from typing import Awaitable, Callable, List, Optional, Tuple
+from config.settings import (
+    MEMORY_TOKEN_BUDGET, MEMORY_ENTRY_MAX_TOKENS, MEMORY_SUMMARY_TOKENS, MEMORY_KEEP_RECENT
+)
+
+# Rough BPE token: a word, a run of digits or a single other character, with
+# long words counted per 4 characters (no tokenizer is available for the API model)
+TOKEN = re.compile(r"[^\W\d_]{1,4}|\d{1,3}|[^\w\s]", re.UNICODE)
+
+SUMMARY_PROMPT = """You maintain a short running summary of an assistant's conversation.
+Update the summary with the new entries. Keep facts, tool results and open questions
+the assistant may still need; drop wording and repetition. Reply with the summary only,
+at most {tokens} tokens."""
+
+Summarizer = Callable[[str, List[str], int], Awaitable[str]]
+
+
+def log(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+def count_tokens(text: str) -> int:
+    """Estimated token count of `text`."""
+    return len(TOKEN.findall(text))
+
+
+def truncate_tokens(text: str, max_tokens: int, marker: str = " …[truncated]") -> str:
+    """Cut `text` after about `max_tokens` tokens."""
+    if max_tokens <= 0:
+        return ""
+    matches = TOKEN.finditer(text)
+    for i, match in enumerate(matches):
+        if i == max_tokens:
+            return text[:match.start()].rstrip() + marker
+    return text
+
+
+def count_message_tokens(messages: List[dict]) -> int:
+    """Estimated prompt tokens of a chat request (content plus ~4 per message of framing)."""
+    return sum(count_tokens(str(m.get("content") or "")) + 4 for m in messages)
+
+
+async def llm_summarize(summary: str, entries: List[str], max_tokens: int) -> str:
+    """Default summarizer: one short LLM call over the previous summary and the new entries."""
+    from agent.api_llm import generate_chat
+
+    new = "\n".join(entries)
+    messages = [
+        {"role": "system", "content": SUMMARY_PROMPT.format(tokens=max_tokens)},
+        {"role": "user", "content": f"Current summary:\n{summary or 'None'}\n\nNew entries:\n{new}"},
+    ]
+    return (await generate_chat(messages, max_tokens=max_tokens)).strip()
+
+
+def extractive_summary(summary: str, entries: List[str], max_tokens: int) -> str:
+    """Fallback without an LLM: keep the start of each entry, newest content last."""
+    share = max(8, max_tokens // max(1, len(entries)))
+    lines = [summary] if summary else []
+    lines += [truncate_tokens(entry, share, " …") for entry in entries]
+    text = "\n".join(lines)
+    # Over budget: drop the oldest lines first
+    while count_tokens(text) > max_tokens and len(lines) > 1:
+        lines.pop(0)
+        text = "\n".join(lines)
+    return truncate_tokens(text, max_tokens, " …")
+
+
+class ConversationMemory:
+    """
+    History for one conversation, rendered into prompts within a token budget.
+
+    `add()` records an entry (long ones are cut to `entry_max_tokens`);
+    `compact()` folds the oldest entries into the summary once the total
+    exceeds `budget`; `render()` returns the summary plus the newest entries
+    that fit.
+    """
+
+    def __init__(self, budget: int = MEMORY_TOKEN_BUDGET, entry_max_tokens: int = MEMORY_ENTRY_MAX_TOKENS,
+                 summary_tokens: int = MEMORY_SUMMARY_TOKENS, keep_recent: int = MEMORY_KEEP_RECENT,
+                 summarize: Optional[Summarizer] = None):
+        self.budget = budget
+        self.entry_max_tokens = entry_max_tokens
+        self.summary_tokens = summary_tokens
+        self.keep_recent = keep_recent
+        self.summarize = summarize or llm_summarize
+        self.entries: List[Tuple[str, int]] = []  # (text, tokens)
+        self.summary = ""
+        self.summary_token_count = 0
+        self.stats = {"entries": 0, "truncated": 0, "summarized_entries": 0, "summary_updates": 0,
+                      "summary_failures": 0}
+
+    # ---------- recording ----------
+    def add(self, role: str, text: str):
+        """Record `text` as "<role>: <text>"."""
+        if count_tokens(text) > self.entry_max_tokens:
+            text = truncate_tokens(text, self.entry_max_tokens)
+            self.stats["truncated"] += 1
+        entry = f"{role}: {text}"
+        self.entries.append((entry, count_tokens(entry)))
+        self.stats["entries"] += 1
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def tokens(self) -> int:
+        """Tokens of the full rendered history."""
+        return self.summary_token_count + sum(tokens for _, tokens in self.entries)
+
+    # ---------- summarizing ----------
+    async def compact(self):
+        """Fold the oldest entries into the summary until the history fits the budget."""
+        if self.tokens <= self.budget:
+            return
+        # Evict until the entries fit next to a full-size summary
+        room = self.budget - self.summary_tokens
+        evicted = []
+        total = sum(tokens for _, tokens in self.entries)
+        while len(self.entries) > self.keep_recent and total > room:
+            entry, tokens = self.entries.pop(0)
+            evicted.append(entry)
+            total -= tokens
+        if not evicted:
+            return
+
+        try:
+            summary = await self.summarize(self.summary, evicted, self.summary_tokens)
+            self.stats["summary_updates"] += 1
+        except Exception as e:
+            log(f"Summary update failed ({e}); keeping an extractive summary")
+            summary = extractive_summary(self.summary, evicted, self.summary_tokens)
+            self.stats["summary_failures"] += 1
+        self.summary = truncate_tokens(summary, self.summary_tokens, " …")
+        self.summary_token_count = count_tokens(self.summary)
+        self.stats["summarized_entries"] += len(evicted)
+
+    # ---------- persistence ----------
+    def to_dict(self) -> dict:
+        return {"summary": self.summary, "entries": [entry for entry, _ in self.entries]}
+
+    def load(self, data: dict):
+        """Restore entries and summary saved by to_dict() (limits and summarizer stay as configured)."""
+        self.summary = data.get("summary") or ""
+        self.summary_token_count = count_tokens(self.summary)
+        self.entries = [(entry, count_tokens(entry)) for entry in data.get("entries", [])]
+
+    # ---------- prompting ----------
+    def render(self, budget: Optional[int] = None) -> str:
+        """Summary plus the newest entries, within `budget` tokens (default: the memory budget)."""
+        budget = self.budget if budget is None else budget
+        parts = []
+        used = 0
+        if self.summary:
+            parts.append(f"Summary of earlier conversation: {self.summary}")
+            used += self.summary_token_count
+        recent = []
+        for entry, tokens in reversed(self.entries):
+            if used + tokens > budget and recent:
+                break
+            recent.append(entry)
+            used += tokens
+        parts += reversed(recent)
+        return "\n".join(parts) if parts else "None"
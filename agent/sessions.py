@@ -0,0 +1,245 @@
+"""
+Multi-turn sessions: conversation memory, recent tool results and detections per user.
+
+The gateway keeps one Session per session_id so follow-up questions see the
+earlier conversation and reuse fresh search/navigation results and the last
+detections instead of fetching them again. Sessions are evicted least recently
+used, after an idle TTL, or when their total size exceeds a memory cap; with a
+SQLite path they are also written through to disk and reloaded on a miss.
+"""
+import sys
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from agent.memory import ConversationMemory
+from shared.executors import run_io
+from config.settings import (
+    SESSION_MAX, SESSION_MAX_BYTES, SESSION_TTL, SESSION_DB_PATH, SESSION_DB_TTL,
+    SESSION_TOOL_RESULTS, SESSION_TOOL_RESULT_TTL, SESSION_DETECTIONS_TTL
+)
+
+# Results that depend on the camera are kept as detections (short TTL), not as reusable tool results
+VISION_TOOLS = {"VisionDetect", "VisionDetectStructured", "VisionDetectBatch"}
+
+
+def log(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+def result_key(tool: str, args: dict) -> str:
+    return json.dumps([tool, args], sort_keys=True)
+
+
+class Session:
+    """State of one conversation."""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.memory = ConversationMemory()
+        self.tool_results: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (text, time)
+        self.detections: Optional[str] = None
+        self.detections_at = 0.0
+        self.last_used = time.time()
+        self.size = 0  # bytes of serialized state, updated by SessionStore.save
+        self.lock = asyncio.Lock()  # one request per session at a time
+        self.in_use = 0  # requests between SessionStore.get and release; never evicted meanwhile
+
+    # ---------- tool results ----------
+    def record_tool_result(self, tool: str, args: dict, text: str):
+        if tool in VISION_TOOLS:
+            self.record_detections(text)
+            return
+        key = result_key(tool, args)
+        self.tool_results.pop(key, None)
+        self.tool_results[key] = (text, time.time())
+        while len(self.tool_results) > SESSION_TOOL_RESULTS:
+            self.tool_results.popitem(last=False)
+
+    def tool_result(self, tool: str, args: dict) -> Optional[str]:
+        """A result of the same call from an earlier turn, if still fresh."""
+        entry = self.tool_results.get(result_key(tool, args))
+        if entry is None or time.time() - entry[1] > SESSION_TOOL_RESULT_TTL:
+            return None
+        return entry[0]
+
+    def record_detections(self, text: str):
+        self.detections = text
+        self.detections_at = time.time()
+
+    def recent_detections(self) -> Optional[str]:
+        if self.detections and time.time() - self.detections_at <= SESSION_DETECTIONS_TTL:
+            return self.detections
+        return None
+
+    # ---------- persistence ----------
+    def to_dict(self) -> dict:
+        return {
+            "memory": self.memory.to_dict(),
+            "tool_results": [[key, text, at] for key, (text, at) in self.tool_results.items()],
+            "detections": self.detections,
+            "detections_at": self.detections_at,
+            "last_used": self.last_used,
+        }
+
+    @classmethod
+    def from_dict(cls, session_id: str, data: dict) -> "Session":
+        session = cls(session_id)
+        session.memory.load(data.get("memory", {}))
+        session.tool_results = OrderedDict((key, (text, at)) for key, text, at in data.get("tool_results", []))
+        session.detections = data.get("detections")
+        session.detections_at = data.get("detections_at", 0.0)
+        session.last_used = data.get("last_used", session.last_used)
+        return session
+
+
+class SessionStore:
+    """
+    In-memory LRU of sessions with TTL and a byte cap, optionally backed by SQLite.
+
+    Usage:
+        session = store.get(req.session_id)   # new session if unknown/expired; in use until released
+        try:
+            async with session.lock:
+                ... run the agent with session ...
+            await store.save(session)
+        finally:
+            store.release(session)
+    """
+
+    def __init__(self, max_sessions: int = SESSION_MAX, max_bytes: int = SESSION_MAX_BYTES,
+                 ttl: float = SESSION_TTL, db_path: str = SESSION_DB_PATH, db_ttl: float = SESSION_DB_TTL):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.db_ttl = db_ttl
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.bytes = 0
+        self.stats = {"hits": 0, "loaded": 0, "created": 0, "evicted_lru": 0, "evicted_ttl": 0,
+                      "evicted_memory": 0}
+        self.db = None
+        self._db_lock = threading.Lock()  # writes run on I/O threads
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            self._purge_db()
+
+    # ---------- lookup ----------
+    def get(self, session_id: Optional[str] = None) -> Session:
+        """The session for `session_id`, from memory or disk; a new one if it is unknown or expired."""
+        self.evict_expired()
+        if session_id:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                self.sessions.move_to_end(session_id)
+                self.stats["hits"] += 1
+            else:
+                session = self._load(session_id)
+            if session is not None:
+                session.last_used = time.time()
+                session.in_use += 1
+                return session
+
+        session = Session(session_id or uuid.uuid4().hex)
+        session.in_use += 1
+        self.stats["created"] += 1
+        self._add(session)
+        return session
+
+    def release(self, session: Session):
+        """End a get(): the session can be evicted again once no request uses it."""
+        session.in_use = max(0, session.in_use - 1)
+
+    def _add(self, session: Session):
+        self.sessions[session.id] = session
+        self.sessions.move_to_end(session.id)
+        self._enforce_limits()
+
+    # ---------- saving and eviction ----------
+    async def save(self, session: Session):
+        """Record the session's new size after a request and write it through to disk (on an I/O thread)."""
+        session.last_used = time.time()
+        data = json.dumps(session.to_dict())
+        current = self.sessions.get(session.id)
+        if current is session:
+            self.bytes += len(data) - session.size
+        else:
+            # Not in memory any more (or replaced): this request's state is the latest
+            if current is not None:
+                self.bytes -= current.size
+            self.sessions[session.id] = session
+            self.bytes += len(data)
+        session.size = len(data)
+        self._enforce_limits()
+        if self.db is not None:
+            await run_io(self._write, session.id, data, session.last_used)
+
+    def _write(self, session_id: str, data: str, updated: float):
+        with self._db_lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO sessions (id, data, updated) VALUES (?, ?, ?)",
+                            (session_id, data, updated))
+
+    def _drop(self, session_id: str, reason: str):
+        session = self.sessions.pop(session_id)
+        self.bytes -= session.size
+        self.stats[reason] += 1
+
+    def _evictable(self):
+        """Least recently used first; sessions serving a request are skipped."""
+        return [sid for sid, s in self.sessions.items() if not s.in_use and not s.lock.locked()]
+
+    def _enforce_limits(self):
+        for sid in self._evictable():
+            if len(self.sessions) <= self.max_sessions:
+                break
+            self._drop(sid, "evicted_lru")
+        for sid in self._evictable():
+            if self.bytes <= self.max_bytes:
+                break
+            self._drop(sid, "evicted_memory")
+
+    def evict_expired(self):
+        cutoff = time.time() - self.ttl
+        for sid in [sid for sid in self._evictable() if self.sessions[sid].last_used < cutoff]:
+            self._drop(sid, "evicted_ttl")
+
+    # ---------- SQLite ----------
+    def _load(self, session_id: str) -> Optional[Session]:
+        if self.db is None:
+            return None
+        with self._db_lock:
+            row = self.db.execute("SELECT data, updated FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None or time.time() - row[1] > self.db_ttl:
+            return None
+        try:
+            session = Session.from_dict(session_id, json.loads(row[0]))
+        except (ValueError, TypeError, KeyError) as e:
+            log(f"Discarding unreadable session {session_id}: {e}")
+            return None
+        session.size = len(row[0])
+        self.bytes += session.size
+        self.stats["loaded"] += 1
+        self._add(session)
+        return session
+
+    def _purge_db(self):
+        with self._db_lock, self.db:
+            self.db.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - self.db_ttl,))
+
+    def close(self):
+        if self.db is not None:
+            self._purge_db()
+            with self._db_lock:
+                self.db.close()
+            self.db = None
+
+    def summary(self) -> Dict:
+        return {"sessions": len(self.sessions), "bytes": self.bytes, "persistent": self.db is not None,
+                **self.stats}
@@ -0,0 +1,110 @@
+"""Speculative tool prefetch: start the likely tool while the first LLM decision is in flight."""
+import re
+import sys
+import time
+import asyncio
+from typing import Awaitable, Dict, List, Optional, Tuple
+from agent.api_llm import tool_signature
+from agent.intent_router import route_intent
+
+# Read-only tools only: a wrong guess is cancelled, so it must have no side effects
+SPECULATIVE_TOOLS = {"VisionDetect", "search_web", "NavigateAStar"}
+# A cue match is enough (routes backed by cue words score >= 0.5); a wrong guess only costs a cancelled call
+SPECULATION_CONFIDENCE = 0.5
+
+# Word-overlap (Jaccard) needed for a speculative search to stand in for the model's query
+SEARCH_MATCH = 0.5
+
+_stats = {"requests": 0, "speculated": 0, "hits": 0, "saved_ms": 0.0}
+
+
+def log(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+def predict_tool(query: str) -> Optional[Tuple[str, dict]]:
+    """The tool the first decision will most likely pick for this query, if any (from the intent router)."""
+    route = route_intent(query)
+    if route.tool not in SPECULATIVE_TOOLS or route.args is None or route.confidence < SPECULATION_CONFIDENCE:
+        return None
+    return route.tool, route.args
+
+
+def words(text: str) -> set:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+def args_compatible(tool: str, speculated: dict, actual: dict) -> bool:
+    """Whether the speculative result can stand in for a call with `actual` args."""
+    if speculated == actual:
+        return True
+    if tool == "search_web" and set(speculated) == set(actual) == {"query"}:
+        a, b = words(str(speculated["query"])), words(str(actual["query"]))
+        return bool(a and b) and len(a & b) / len(a | b) >= SEARCH_MATCH
+    return False
+
+
+class Speculation:
+    """One speculative tool call for one request."""
+
+    def __init__(self, tool: str, args: dict, task: asyncio.Task):
+        self.tool = tool
+        self.args = args
+        self.task = task
+        self.started = time.perf_counter()
+        self.finished = None
+        self.matched_call = None
+        # Per-request report, updated in place as the speculation resolves
+        self.report = {"tool": tool, "hit": False, "saved_ms": 0.0}
+        task.add_done_callback(lambda _: setattr(self, "finished", time.perf_counter()))
+
+    @classmethod
+    def start(cls, client, query: str, used_tools: set, run_tool) -> Optional["Speculation"]:
+        """Start the predicted tool, unless there is no prediction or it already ran."""
+        _stats["requests"] += 1
+        prediction = predict_tool(query)
+        if prediction is None or tool_signature(*prediction) in used_tools:
+            return None
+        tool, args = prediction
+        _stats["speculated"] += 1
+        log(f"Speculatively running {tool} {args}")
+        return cls(tool, args, asyncio.create_task(run_tool(client, tool, args)))
+
+    def covers(self, call: Dict) -> bool:
+        """Whether this prefetch can serve `call`."""
+        return call["tool"] == self.tool and args_compatible(self.tool, self.args, call["args"])
+
+    def resolve(self, calls: List[Dict]):
+        """Match the first decision's tool calls; cancel the prefetch if none is compatible."""
+        for call in calls:
+            if self.covers(call):
+                self.matched_call = call
+                self.report["hit"] = True
+                _stats["hits"] += 1
+                return
+        self.task.cancel()
+
+    def claim(self, call: Dict) -> Optional[Awaitable]:
+        """The in-flight result for `call` if it is the matched one (else None: run it normally)."""
+        if call is not self.matched_call:
+            return None
+        return self._await(time.perf_counter())
+
+    async def _await(self, requested: float):
+        result = await self.task
+        # Without prefetch the tool would have started at `requested` and taken (finished - started)
+        duration = (self.finished or time.perf_counter()) - self.started
+        saved_ms = max(0.0, min(duration, requested - self.started)) * 1000
+        self.report["saved_ms"] = round(saved_ms, 1)
+        _stats["saved_ms"] += saved_ms
+        return result
+
+
+def speculation_stats() -> dict:
+    """Process-wide hit rate and latency saved."""
+    speculated = _stats["speculated"]
+    return {
+        **_stats,
+        "saved_ms": round(_stats["saved_ms"], 1),
+        "hit_rate": round(_stats["hits"] / speculated, 3) if speculated else 0.0,
+    }
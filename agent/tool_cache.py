@@ -0,0 +1,203 @@
+"""
+Tool-result cache in front of MCP call_tool.
+
+Results are keyed by tool name and normalized arguments, so "Weather  Cairo?"
+and "weather cairo" share an entry. Each tool has its own lifetime
+(TOOL_CACHE_TTLS): search results for minutes, vision for seconds, navigation
+until the graph file changes. Concurrent identical calls share one execution,
+and the cache is bounded by entry count and bytes (least recently used out).
+"""
+import json
+import time
+import asyncio
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from config.settings import (
+    TOOL_CACHE_TTLS, TOOL_CACHE_SIZE, TOOL_CACHE_MAX_BYTES, NAV_GRAPH_PATH
+)
+
+FOREVER = None  # TTL for results that only change with their data source
+
+
+def file_version(path) -> Optional[Tuple[int, int]]:
+    """(mtime, size) of a file, None if it is missing."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# ---------- argument normalization ----------
+def normalize_text(value: str) -> str:
+    return " ".join(value.split())
+
+
+def normalize_query(value: str) -> str:
+    """Search queries: case, spacing and trailing punctuation don't change the results."""
+    return normalize_text(value).lower().rstrip("?!.")
+
+
+# Per-tool normalizers for string arguments (others only get whitespace collapsed)
+ARG_NORMALIZERS: Dict[str, Callable[[str], str]] = {
+    "search_web": normalize_query,
+}
+
+# Version of the data a tool's results depend on; a change drops the cached results
+TOOL_VERSIONS: Dict[str, Callable[[], Any]] = {
+    "NavigateAStar": lambda: file_version(NAV_GRAPH_PATH),
+}
+
+
+def normalize_args(tool: str, args: dict) -> dict:
+    """Arguments as the cache compares them: None values dropped, strings normalized."""
+    normalize = ARG_NORMALIZERS.get(tool, normalize_text)
+    return {
+        key: normalize(value) if isinstance(value, str) else value
+        for key, value in (args or {}).items()
+        if value is not None
+    }
+
+
+def cache_key(tool: str, args: dict) -> str:
+    return json.dumps([tool, normalize_args(tool, args)], sort_keys=True, default=str)
+
+
+class ToolResultCache:
+    """
+    Results of successful tool calls for one MCP session.
+
+    Usage:
+        ok, text = await cache.call(name, args, lambda: run_uncached(name, args))
+
+    Only tools with a TTL policy are cached and failed calls ((False, error))
+    never are. A shared call is cancelled once every caller waiting on it has
+    been cancelled.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, Optional[float]]] = None, max_entries: int = TOOL_CACHE_SIZE,
+                 max_bytes: int = TOOL_CACHE_MAX_BYTES, versions: Optional[Dict[str, Callable[[], Any]]] = None):
+        self.ttls = TOOL_CACHE_TTLS if ttls is None else ttls
+        self.versions = TOOL_VERSIONS if versions is None else versions
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "uncacheable": 0, "expired": 0,
+                      "invalidated": 0, "evicted": 0}
+        self.per_tool: Dict[str, Dict[str, int]] = {}
+
+        # key -> (result, expires_at or None, data version, size)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}  # in-flight task -> callers awaiting it
+
+    def cacheable(self, tool: str) -> bool:
+        return tool in self.ttls
+
+    async def call(self, tool: str, args: dict, run: Callable[[], Awaitable[Tuple[bool, str]]]) -> Tuple[bool, str]:
+        """Cached result of `tool(args)`, running `run()` on a miss (once for concurrent callers)."""
+        if not self.cacheable(tool):
+            self.stats["uncacheable"] += 1
+            return await run()
+
+        key = cache_key(tool, args)
+        version = self.versions[tool]() if tool in self.versions else None
+        result = self._lookup(key, version)
+        counts = self.per_tool.setdefault(tool, {"hits": 0, "misses": 0})
+        if result is not None:
+            self.stats["hits"] += 1
+            counts["hits"] += 1
+            return result
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            counts["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            counts["misses"] += 1
+            # Own task: a cancelled caller doesn't cancel the call other callers are waiting on
+            task = asyncio.ensure_future(self._run(tool, key, version, run))
+            self._inflight[key] = task
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # The last caller was cancelled: nobody wants the result any more
+                    task.cancel()
+                    if self._inflight.get(key) is task:
+                        del self._inflight[key]
+
+    async def _run(self, tool: str, key: str, version, run) -> Tuple[bool, str]:
+        try:
+            result = await run()
+            if result[0]:
+                self._store(tool, key, version, result)
+            return result
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    # ---------- entries ----------
+    def _lookup(self, key: str, version) -> Optional[Tuple[bool, str]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, expires_at, entry_version, _ = entry
+        if entry_version != version:
+            self._drop(key, "invalidated")
+            return None
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self._drop(key, "expired")
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _store(self, tool: str, key: str, version, result: Tuple[bool, str]):
+        size = len(key) + len(result[1])
+        if size > self.max_bytes:
+            return
+        ttl = self.ttls[tool]
+        expires_at = None if ttl is FOREVER else time.monotonic() + ttl
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (result, expires_at, version, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)), "evicted")
+
+    def _drop(self, key: str, reason: Optional[str] = None):
+        _, _, _, size = self._entries.pop(key)
+        self.bytes -= size
+        if reason:
+            self.stats[reason] += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def summary(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["coalesced"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hit_rate": round((self.stats["hits"] + self.stats["coalesced"]) / lookups, 3) if lookups else 0.0,
+            "per_tool": self.per_tool,
+        }
+
+
+_caches: "weakref.WeakKeyDictionary[Any, ToolResultCache]" = weakref.WeakKeyDictionary()
+
+
+def get_tool_cache(client) -> ToolResultCache:
+    """The result cache for an MCP session (created on first use)."""
+    cache = _caches.get(client)
+    if cache is None:
+        cache = _caches[client] = ToolResultCache()
+    return cache
@@ -0,0 +1,108 @@
+"""Cached MCP tool catalog, invalidated by tools/list_changed notifications or a TTL."""
+import sys
+import json
+import time
+import asyncio
+import weakref
+from typing import Any, Callable, Dict, Hashable, List
+from mcp import types
+from config.settings import TOOL_CATALOG_TTL
+
+
+def log(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+class ToolCatalog:
+    """
+    The tool list of one MCP session, fetched once and reused across requests.
+
+    `version` increases whenever the fetched tool definitions actually change;
+    anything derived from the tool list (prompts, schemas) is memoized per
+    version with `derived()`.
+    """
+
+    def __init__(self, client=None, ttl: float = TOOL_CATALOG_TTL):
+        """
+        Args:
+            client: MCP ClientSession to fetch from (can be bound later)
+            ttl: Seconds before the list is re-fetched even without a notification
+        """
+        self.client = None
+        self.ttl = ttl
+        self.version = 0
+        self.stats = {"fetches": 0, "hits": 0, "invalidations": 0}
+
+        self._tools: List[types.Tool] = []
+        self._fingerprint = None
+        self._fetched_at = None
+        self._derived: Dict[Hashable, Any] = {}
+        self._lock = asyncio.Lock()
+        if client is not None:
+            self.bind(client)
+
+    def bind(self, client):
+        """Attach the catalog to an MCP session; decide() finds it via get_tool_catalog()."""
+        self.client = client
+        self.invalidate()
+        _catalogs[client] = self
+
+    def invalidate(self):
+        """Force a re-fetch on next use."""
+        self._fetched_at = None
+        self.stats["invalidations"] += 1
+
+    @property
+    def is_fresh(self) -> bool:
+        return self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl
+
+    async def message_handler(self, message):
+        """ClientSession message_handler: drop the cached list when the server says it changed."""
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ToolListChangedNotification):
+            log("[MCP] Tool list changed, invalidating catalog")
+            self.invalidate()
+
+    async def get(self) -> List[types.Tool]:
+        """Current tools, fetched from the server only if the cache is stale."""
+        if self.is_fresh:
+            self.stats["hits"] += 1
+            return self._tools
+        async with self._lock:
+            if self.is_fresh:  # another request refreshed it while we waited
+                self.stats["hits"] += 1
+                return self._tools
+            if self.client is None:
+                raise RuntimeError("Tool catalog is not bound to an MCP session")
+            result = await self.client.list_tools()
+            self.stats["fetches"] += 1
+
+            fingerprint = json.dumps([t.model_dump(mode="json") for t in result.tools], sort_keys=True)
+            if fingerprint != self._fingerprint:
+                self._tools = list(result.tools)
+                self._fingerprint = fingerprint
+                self._derived.clear()
+                self.version += 1
+                log(f"[MCP] Tool catalog v{self.version}: {[t.name for t in self._tools]}")
+            self._fetched_at = time.monotonic()
+            return self._tools
+
+    def derived(self, key: Hashable, build: Callable[[List[types.Tool]], Any]) -> Any:
+        """`build(tools)` computed once per catalog version (call after get())."""
+        if key not in self._derived:
+            self._derived[key] = build(self._tools)
+        return self._derived[key]
+
+    def names(self) -> List[str]:
+        return [t.name for t in self._tools]
+
+
+# Catalog per MCP session
+_catalogs: "weakref.WeakKeyDictionary[Any, ToolCatalog]" = weakref.WeakKeyDictionary()
+
+
+def get_tool_catalog(client) -> ToolCatalog:
+    """Catalog bound to `client`, creating a TTL-only one if the session has none."""
+    catalog = _catalogs.get(client)
+    if catalog is None:
+        catalog = ToolCatalog(client)
+    return catalog
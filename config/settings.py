@@ -14,6 +14,45 @@ API_KEY = api_key
 # API_KEY = os.getenv("CEREBRAS_API_KEY", "")  # Set your Cerebras API key
 MODEL_ID = os.getenv("MODEL_ID", "llama3.3-70b")  # Cerebras model ID
 
+# Model cascade: tool-selection steps go to a small model, final answers to MODEL_ID
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "true") == "true"
+SMALL_MODEL_ID = os.getenv("SMALL_MODEL_ID", "llama3.1-8b")  # Cerebras model ID of the small tier
+CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.6"))  # small-model decisions below this escalate
+# Confidence of a small-model decision comes from checking its tool calls against their schemas and the
+# router's hint; logprobs (native backends only, larger responses, not accepted by every provider) can lower it
+CASCADE_LOGPROBS = os.getenv("CASCADE_LOGPROBS", "false") == "true"
+
+# Multi-provider routing (agent/llm_router.py): used when more than one provider below has an API key.
+# "models" maps the model names used here (MODEL_ID, SMALL_MODEL_ID) to the provider's model IDs;
+# rate limits come from the free-llm-api-resources catalog.
+LLM_ROUTER_ENABLED = os.getenv("LLM_ROUTER_ENABLED", "true") == "true"
+LLM_CATALOG_PATH = BASE_DIR / "free-llm-api-resources" / "README.md"  # generated by pull_available_models.py
+LLM_PROVIDERS = [
+    {"name": "Cerebras", "base_url": API_BASE_URL, "api_key": API_KEY,
+     "models": {MODEL_ID: MODEL_ID, SMALL_MODEL_ID: SMALL_MODEL_ID}},
+    {"name": "Groq", "base_url": "https://api.groq.com/openai/v1", "api_key": os.getenv("GROQ_API_KEY", ""),
+     "models": {"llama3.3-70b": "llama-3.3-70b-versatile", "llama3.1-8b": "llama-3.1-8b-instant"}},
+]
+LLM_EWMA_ALPHA = float(os.getenv("LLM_EWMA_ALPHA", "0.3"))  # weight of the newest latency sample
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "50"))  # latency samples kept for the hedge quantile
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.9"))  # ask a second provider after this latency quantile
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "5"))
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "2.0"))  # hedge delay until a provider has enough samples
+LLM_RATE_LIMIT_COOLDOWN = float(os.getenv("LLM_RATE_LIMIT_COOLDOWN", "60"))  # seconds a provider is skipped after a 429
+LLM_ERROR_COOLDOWN = float(os.getenv("LLM_ERROR_COOLDOWN", "10"))  # ... after a 5xx or connection error
+
+# Local llama.cpp fallback (agent/local_llm.py) for when the API is unreachable
+LOCAL_LLM_ENABLED = os.getenv("LOCAL_LLM_ENABLED", "true") == "true"
+LOCAL_LLM_MODEL_PATH = os.getenv("LOCAL_LLM_MODEL_PATH", "")  # GGUF file; empty disables the fallback
+LOCAL_LLM_CTX = int(os.getenv("LOCAL_LLM_CTX", "4096"))
+LOCAL_LLM_THREADS = int(os.getenv("LOCAL_LLM_THREADS", "0"))  # 0 = llama.cpp default
+LOCAL_LLM_WORKERS = int(os.getenv("LOCAL_LLM_WORKERS", "1"))  # processes, each with its own copy of the model
+LOCAL_LLM_MAX_QUEUE = int(os.getenv("LOCAL_LLM_MAX_QUEUE", "8"))  # waiting requests before new ones are refused
+LOCAL_LLM_PREFIX_CACHE = int(os.getenv("LOCAL_LLM_PREFIX_CACHE", "4"))  # saved prompt-prefix KV states per worker
+LOCAL_LLM_MIN_PREFIX = int(os.getenv("LOCAL_LLM_MIN_PREFIX", "64"))  # tokens; shorter shared prefixes aren't saved
+LOCAL_LLM_LOAD_TIMEOUT = float(os.getenv("LOCAL_LLM_LOAD_TIMEOUT", "120"))
+LOCAL_LLM_API_RETRY = float(os.getenv("LOCAL_LLM_API_RETRY", "30"))  # seconds on the local model before retrying the API
+
 # Legacy local model config (commented out)
 # MODEL_ID = os.getenv(
 #     "MODEL_ID",
@@ -29,6 +68,39 @@ DEVICE = os.getenv(
 
 MAX_LOOPS = int(os.getenv("MAX_LOOPS", "8"))
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "2"))
+# "prompt" (<json> parser, streams the answer and starts tools mid-decision), "tools" (function calling)
+# or "json_schema"; the native backends return the whole reply at once
+DECISION_BACKEND = os.getenv("DECISION_BACKEND", "prompt")
+SPECULATION_ENABLED = os.getenv("SPECULATION_ENABLED", "true") == "true"  # Prefetch the likely first tool
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true") == "true"  # Answer time/vision/navigation without the agent loop
+ROUTER_CONFIDENCE = float(os.getenv("ROUTER_CONFIDENCE", "0.8"))  # minimum intent confidence for a direct route
+
+# Conversation memory (token counts are estimates, see agent/memory.py)
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "1500"))  # history tokens per prompt, summary included
+MEMORY_ENTRY_MAX_TOKENS = int(os.getenv("MEMORY_ENTRY_MAX_TOKENS", "500"))  # longer entries (tool results) are cut
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "300"))  # size of the rolling summary
+MEMORY_KEEP_RECENT = int(os.getenv("MEMORY_KEEP_RECENT", "2"))  # newest entries never folded into the summary
+
+# Gateway sessions (multi-turn state keyed by MultimodalRequest.session_id)
+SESSION_MAX = int(os.getenv("SESSION_MAX", "256"))  # sessions kept in memory (least recently used evicted)
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(32 * 1024 * 1024)))  # cap on all in-memory session state
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))  # idle seconds before a session leaves memory
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "")  # SQLite file for persistence; empty disables it
+SESSION_DB_TTL = float(os.getenv("SESSION_DB_TTL", "86400"))  # idle seconds before a persisted session is deleted
+SESSION_TOOL_RESULTS = int(os.getenv("SESSION_TOOL_RESULTS", "8"))  # recent tool results reused by follow-ups
+SESSION_TOOL_RESULT_TTL = float(os.getenv("SESSION_TOOL_RESULT_TTL", "600"))
+SESSION_DETECTIONS_TTL = float(os.getenv("SESSION_DETECTIONS_TTL", "20"))  # the scene changes quickly
+
+# HTTP client for the LLM API
+API_POOL_LIMIT = int(os.getenv("API_POOL_LIMIT", "16"))  # max open connections
+API_KEEPALIVE = float(os.getenv("API_KEEPALIVE", "60"))  # seconds an idle connection stays open
+API_DNS_TTL = int(os.getenv("API_DNS_TTL", "300"))
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "5"))
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "30"))  # max gap between response chunks
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "60"))  # whole request, per attempt
+API_HTTP_RETRIES = int(os.getenv("API_HTTP_RETRIES", "3"))  # retries on 429/5xx/connection errors
+API_BACKOFF_BASE = float(os.getenv("API_BACKOFF_BASE", "0.25"))
+API_BACKOFF_MAX = float(os.getenv("API_BACKOFF_MAX", "8"))
 
 # ================= API CONFIGURATION =================
 API_HOST = os.getenv("API_HOST", "localhost")
@@ -37,13 +109,88 @@ API_URL = f"http://{API_HOST}:{API_PORT}"
 
 # ================= MCP SERVER =================
 MCP_SERVER_PATH = BASE_DIR / "server" / "server.py"
-MCP_TRANSPORT = "stdio"
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")  # "stdio" (server subprocesses), "memory" or "direct" (in the gateway)
+TOOL_CATALOG_TTL = float(os.getenv("TOOL_CATALOG_TTL", "300"))  # seconds before the tool list is re-fetched
+MCP_HEARTBEAT_INTERVAL = float(os.getenv("MCP_HEARTBEAT_INTERVAL", "15"))
+MCP_HEARTBEAT_TIMEOUT = float(os.getenv("MCP_HEARTBEAT_TIMEOUT", "5"))
+# Pool of MCP server subprocesses (agent/mcp_pool.py); health checks use the heartbeat interval/timeout
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))  # server processes serving tool calls
+MCP_POOL_STANDBY = int(os.getenv("MCP_POOL_STANDBY", "1"))  # started spares that take over a dead worker's slot
+MCP_POOL_START_TIMEOUT = float(os.getenv("MCP_POOL_START_TIMEOUT", "60"))  # seconds to spawn and initialize a worker
+MCP_TOOL_AFFINITY = {  # tool -> worker slot; the vision tools stay with the worker that owns the camera
+    "VisionDetect": 0,
+    "VisionDetectStructured": 0,
+    "VisionDetectBatch": 0,
+}
 
 # ================= TOOLS =================
 TOOLS_DIR = BASE_DIR / "tools"
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "30"))  # Default per-call timeout for MCP tools (seconds)
+TOOL_TIMEOUTS = {  # Per-tool overrides
+    "VisionDetect": 15.0,
+    "VisionDetectStructured": 15.0,
+    "search_web": 20.0,
+    "NavigateAStar": 10.0,
+}
+NAV_GRAPH_PATH = TOOLS_DIR / "navigation" / "navigationGraph.json"
+# Pools for blocking work (shared/executors.py), one set per process
+IO_POOL_WORKERS = int(os.getenv("IO_POOL_WORKERS", "8"))  # threads for network/disk-bound calls
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", "2"))  # processes for Whisper/YOLO, 0 runs them in the calling thread
+TOOL_POOLS = {  # where each MCP tool runs; tools not listed run on the server's event loop
+    "search_web": "io",  # requests + BeautifulSoup
+    "NavigateAStar": "io",  # reads navigationGraph.json
+    "VisionDetect": "io",  # camera and cache on an I/O thread; the forward pass goes to the CPU pool via cpu_call()
+    "VisionDetectStructured": "io",
+    "VisionDetectBatch": "io",
+}
+# Tool-result cache in front of MCP call_tool (agent/tool_cache.py); tools not listed are never cached
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true") == "true"
+TOOL_CACHE_TTLS = {  # seconds a result is reused; None = until the tool's data source changes
+    "NavigateAStar": None,  # invalidated when navigationGraph.json changes
+    "search_web": float(os.getenv("TOOL_CACHE_SEARCH_TTL", "300")),
+    "VisionDetect": float(os.getenv("TOOL_CACHE_VISION_TTL", "2")),
+    "VisionDetectStructured": float(os.getenv("TOOL_CACHE_VISION_TTL", "2")),
+}
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "256"))  # entries
+TOOL_CACHE_MAX_BYTES = int(os.getenv("TOOL_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+# Semantic answer cache in front of the agent loop (agent/answer_cache.py)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true") == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.9"))  # cosine similarity of n-gram vectors
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))  # answers kept (least recently used evicted)
+ANSWER_CACHE_TTLS = {  # seconds an answer stays valid per intent; 0 = never cached, None = until the data changes
+    "time": 0,  # clock/date questions
+    "vision": 0,  # depends on what the camera sees right now
+    "live": float(os.getenv("ANSWER_CACHE_LIVE_TTL", "600")),  # weather, news, prices
+    "navigation": None,  # until navigationGraph.json changes
+    "general": float(os.getenv("ANSWER_CACHE_TTL", "86400")),
+}
 VISION_MODEL_PATH = (
     SRC_DIR / "mcp_server" / "tools" / "computer_vision" / "yolo11n.pt"
 )
+VISION_BACKEND = os.getenv("VISION_BACKEND", "torch")  # "torch", "onnx" or "openvino"
+VISION_INT8 = os.getenv("VISION_INT8", "false") == "true"  # Use the INT8-quantized export
+VISION_IMGSZ = int(os.getenv("VISION_IMGSZ", "640"))  # Inference/export input size
+VISION_ONNX_THREADS = int(os.getenv("VISION_ONNX_THREADS", "0"))  # 0 lets onnxruntime decide
+VISION_POOL_SIZE = int(os.getenv("VISION_POOL_SIZE", "2"))  # Preloaded YOLO instances per process
+VISION_PRELOAD = os.getenv("VISION_PRELOAD", "true") == "true"  # Load YOLO at MCP server startup (off for pool workers without vision tools)
+VISION_WARMUP_SIZE = int(os.getenv("VISION_WARMUP_SIZE", "640"))  # Dummy frame size, 0 disables warm-up
+VISION_CONF = float(os.getenv("VISION_CONF", "0.25"))  # Default minimum detection confidence
+VISION_IOU = float(os.getenv("VISION_IOU", "0.7"))  # Default NMS IoU threshold
+VISION_CACHE_ENABLED = os.getenv("VISION_CACHE_ENABLED", "true") == "true"
+VISION_CACHE_THRESHOLD = float(os.getenv("VISION_CACHE_THRESHOLD", "0.08"))  # Luma change (0-1) in any thumbnail cell that counts as a new scene
+VISION_CACHE_TTL = float(os.getenv("VISION_CACHE_TTL", "5.0"))  # Seconds a cached result may be reused
+VISION_CACHE_SIZE = 8  # Recent scenes remembered
+VISION_BATCH_MAX = int(os.getenv("VISION_BATCH_MAX", "16"))  # Frames per batched forward pass
+VISION_VOTE_RATIO = float(os.getenv("VISION_VOTE_RATIO", "0.5"))  # Share of frames a label needs to be stable
+
+# ================= CAMERA CAPTURE =================
+CAPTURE_SOURCE = os.getenv("CAPTURE_SOURCE", "camera")  # "camera", "synthetic" or a video file path
+CAPTURE_BUFFER_SIZE = int(os.getenv("CAPTURE_BUFFER_SIZE", "16"))  # Frames kept in the ring buffer
+CAPTURE_WIDTH = 640
+CAPTURE_HEIGHT = 480
+CAPTURE_FPS = float(os.getenv("CAPTURE_FPS", "15"))  # Used by synthetic/file sources
+CAPTURE_TIMEOUT = float(os.getenv("CAPTURE_TIMEOUT", "3.0"))  # Seconds to wait for a first frame
+CAPTURE_MAX_AGE = float(os.getenv("CAPTURE_MAX_AGE", "1.0"))  # Older frames count as stale
 
 # ================= AUDIO =================
 AUDIO_SAMPLE_RATE = 44100
@@ -54,6 +201,7 @@ AUDIO_RECORD_SECONDS = 5
 TTS_OUTPUT_DIR = BASE_DIR / "tools" / "speech" / "output"
 TTS_ENGLISH_VOICE = "en-US-AriaNeural"
 TTS_ARABIC_VOICE = "ar-EG-SalmaNeural"
+TTS_MIN_SENTENCE_CHARS = 12  # shorter streamed sentences are merged with the next one
 
 # ================= LOGGING =================
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -1,6 +1,6 @@
 """Pydantic models for API requests."""
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class TextRequest(BaseModel):
@@ -15,4 +15,11 @@ class MultimodalRequest(BaseModel):
     audio: Optional[str] = None  # base64 encoded audio bytes (as string for JSON)
     audio_dtype: Optional[str] = "float32"  # Audio data type (int16, int32, float32)
     mode: Optional[str] = "thinking"  # "quick" or "thinking"
+    session_id: Optional[str] = None  # continue a conversation; the response carries the id to reuse
+
+
+class BatchVisionRequest(BaseModel):
+    """Batched detection over uploaded frames, or recent camera frames if none are given."""
+    images: List[str] = []  # base64 encoded images
+    frames: int = 8  # number of camera frames to use when no images are uploaded
 
@@ -5,12 +5,31 @@ import os
 from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI
-from models.requests import MultimodalRequest, TextRequest
+from fastapi.responses import StreamingResponse
+import json
+from typing import Callable, Optional
+from models.requests import BatchVisionRequest, MultimodalRequest, TextRequest
 from tools.speech.transcription import transcribe_audio_bytes
+from shared.frame_store import publish_frame, release_frame
+from shared.executors import executor_stats, run_io, shutdown_executors
+from shared.utils import base64_to_array
+from agent.tool_catalog import ToolCatalog
+from agent.speculation import speculation_stats
+from agent.api_llm import cascade_stats, decision_stats, local_llm_stats, provider_stats
+from agent.sessions import VISION_TOOLS, Session, SessionStore
+from agent.tool_cache import get_tool_cache
+from agent.answer_cache import AnswerCache, needs_context
+from agent.intent_router import dispatch, record_route, route_intent, router_stats
+from config.settings import (
+    MCP_HEARTBEAT_INTERVAL, MCP_HEARTBEAT_TIMEOUT, MCP_TRANSPORT, ANSWER_CACHE_ENABLED, ROUTER_ENABLED
+)
 
 # MCP client for tool access
 mcp_client = None # try mcp_session 
 mcp_connected = False # try mcp_session.connected
+tool_catalog = ToolCatalog()
+session_store = SessionStore()  # multi-turn state per MultimodalRequest.session_id
+answer_cache = AnswerCache()  # answers to repeated questions
 
 # Get project root
 project_root = Path(__file__).parent.parent
@@ -18,19 +37,48 @@ mcp_server_path = project_root / "server" / "server.py"
 
 
 # Store context managers at module level to keep them alive
-_stdio_transport_context = None
 _mcp_session_context = None
 
+
+async def mcp_heartbeat(session):
+    """
+    Ping the MCP server in the background and keep `mcp_connected` current.
+
+    Replaces per-request list_tools() probes; also refreshes the tool catalog
+    once its TTL runs out so requests never pay for the fetch.
+    """
+    global mcp_connected
+    while True:
+        await asyncio.sleep(MCP_HEARTBEAT_INTERVAL)
+        try:
+            await asyncio.wait_for(session.send_ping(), timeout=MCP_HEARTBEAT_TIMEOUT)
+            if not mcp_connected:
+                print("[HTTP] MCP heartbeat recovered", file=sys.stderr)
+            mcp_connected = True
+            if not tool_catalog.is_fresh:
+                await tool_catalog.get()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if mcp_connected:
+                print(f"[WARNING] MCP heartbeat failed: {e!r}. Marking as disconnected.", file=sys.stderr)
+            mcp_connected = False
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for FastAPI app."""
-    global mcp_client, mcp_connected, _stdio_transport_context, _mcp_session_context
+    global mcp_client, mcp_connected, _mcp_session_context
     
     print("[HTTP] Starting gateway server...", file=sys.stderr)
+
+    # Open the LLM API connection in the background so the first request skips the TLS handshake
+    from agent.api_llm import warm_up_api_client, close_api_client
+    api_warmup = asyncio.create_task(warm_up_api_client())
     
     try:
-        from mcp import ClientSession, StdioServerParameters
-        from mcp.client.stdio import stdio_client
+        from mcp import StdioServerParameters
+        from agent.mcp_transport import connect_mcp
         
         print(f"[HTTP] Initializing MCP client connection to {mcp_server_path}", file=sys.stderr)
         
@@ -41,26 +89,27 @@ async def lifespan(app: FastAPI):
             env=dict(os.environ, PYTHONPATH=str(project_root))
         )
         
-        # Use nested async context managers properly
-        async with stdio_client(server_params) as (read_stream, write_stream):
-            async with ClientSession(read_stream, write_stream) as mcp_session:
-                # Initialize the session
-                await mcp_session.initialize()
-                
-                # List available tools
-                tools = await mcp_session.list_tools()
-                print(f"[HTTP] MCP connected successfully! Available tools: {[t.name for t in tools.tools]}", file=sys.stderr)
-                
-                # Store references
-                mcp_client = mcp_session
-                mcp_connected = True
-                _stdio_transport_context = stdio_client(server_params)  # Keep reference
-                _mcp_session_context = mcp_session  # Keep reference
-                
-                # Yield - context managers stay alive until we exit
+        # Subprocess pool or in-process server (MCP_TRANSPORT), all with the ClientSession interface
+        async with connect_mcp(server_params, message_handler=tool_catalog.message_handler) as mcp_session:
+            # List available tools (cached; refreshed on tools/list_changed or TTL)
+            tool_catalog.bind(mcp_session)
+            tools = await tool_catalog.get()
+            print(f"[HTTP] MCP connected successfully! Available tools: {[t.name for t in tools]}", file=sys.stderr)
+            
+            # Store references
+            mcp_client = mcp_session
+            mcp_connected = True
+            _mcp_session_context = mcp_session  # Keep reference
+            
+            heartbeat = asyncio.create_task(mcp_heartbeat(mcp_session))
+
+            # Yield - the connection stays alive until we exit
+            try:
                 yield
-                
-                # Cleanup happens automatically when exiting context
+            finally:
+                heartbeat.cancel()
+            
+            # Workers are stopped when exiting the connection context
         
     except Exception as e:
         print(f"[ERROR] Failed to connect to MCP server: {e}", file=sys.stderr)
@@ -71,9 +120,12 @@ async def lifespan(app: FastAPI):
     
     # Final cleanup
     print("[HTTP] Shutting down gateway", file=sys.stderr)
+    api_warmup.cancel()
+    await close_api_client()
+    session_store.close()
+    shutdown_executors()
     mcp_connected = False
     mcp_client = None
-    _stdio_transport_context = None
     _mcp_session_context = None
 
 
@@ -93,8 +145,8 @@ async def health_check():
         available_tools = []
         if mcp_connected and mcp_client:
             try:
-                tools = await mcp_client.list_tools()
-                available_tools = [t.name for t in tools.tools]
+                tools = await tool_catalog.get()
+                available_tools = [t.name for t in tools]
             except:
                 pass
         
@@ -134,9 +186,23 @@ async def debug_info():
     
     if mcp_connected and mcp_client:
         try:
-            tools = await mcp_client.list_tools()
-            debug_info["available_tools"] = [{"name": t.name, "description": t.description} for t in tools.tools]
-            debug_info["tool_count"] = len(tools.tools)
+            tools = await tool_catalog.get()
+            debug_info["available_tools"] = [{"name": t.name, "description": t.description} for t in tools]
+            debug_info["tool_count"] = len(tools)
+            debug_info["tool_catalog"] = {"version": tool_catalog.version, **tool_catalog.stats}
+            debug_info["speculation"] = speculation_stats()
+            debug_info["decisions"] = decision_stats()
+            debug_info["cascade"] = cascade_stats()
+            debug_info["llm_providers"] = provider_stats()
+            debug_info["local_llm"] = local_llm_stats()
+            debug_info["sessions"] = session_store.summary()
+            debug_info["tool_cache"] = get_tool_cache(mcp_client).summary()
+            debug_info["answer_cache"] = answer_cache.summary()
+            debug_info["router"] = router_stats()
+            debug_info["executors"] = executor_stats()
+            debug_info["mcp_transport"] = MCP_TRANSPORT
+            if hasattr(mcp_client, "summary"):
+                debug_info["mcp_pool"] = mcp_client.summary()
         except Exception as e:
             debug_info["tool_list_error"] = str(e)
             debug_info["mcp_connected"] = False  # Mark as disconnected if we can't list tools
@@ -156,9 +222,9 @@ async def mcp_status():
     
     if mcp_connected and mcp_client:
         try:
-            tools = await mcp_client.list_tools()
-            status["tools"] = [t.name for t in tools.tools]
-            status["tool_count"] = len(tools.tools)
+            tools = await tool_catalog.get()
+            status["tools"] = [t.name for t in tools]
+            status["tool_count"] = len(tools)
             status["status"] = "ready"
         except Exception as e:
             status["status"] = "error"
@@ -186,8 +252,78 @@ async def run_agent(req: TextRequest):
         return {"response": f"Error: {error_msg}"}
 
 
-@app.post("/process")
-async def process_multimodal(req: MultimodalRequest):
+async def detect_client_image(image_b64: str) -> str:
+    """
+    Run VisionDetect on the client-supplied image instead of the server camera.
+
+    The image is decoded once and handed to the MCP tool process as a
+    shared-memory frame handle, so it is never re-encoded or sent over stdio.
+    """
+    image = base64_to_array(image_b64)
+    handle = publish_frame(image)
+    try:
+        result = await mcp_client.call_tool(name="VisionDetect", arguments={"frame": handle})
+    finally:
+        release_frame(handle)
+
+    if hasattr(result, 'content') and result.content:
+        return str(result.content[0].text)
+    return str(result)
+
+
+@app.post("/vision/batch")
+async def vision_batch(req: BatchVisionRequest):
+    """
+    Batched object detection with temporal voting.
+
+    Uploaded images are decoded once and passed to VisionDetectBatch as
+    shared-memory frame handles; without uploads the recent camera frames are used.
+    """
+    if not (mcp_connected and mcp_client):
+        return {"error": "MCP not connected"}
+
+    handles = []
+    try:
+        for image_b64 in req.images:
+            handles.append(publish_frame(base64_to_array(image_b64)))
+        arguments = {"frame_handles": handles} if handles else {"frames": req.frames}
+        result = await mcp_client.call_tool(name="VisionDetectBatch", arguments=arguments)
+    except Exception as e:
+        return {"error": f"Batch detection failed: {str(e)}"}
+    finally:
+        for handle in handles:
+            release_frame(handle)
+
+    if hasattr(result, 'content') and result.content:
+        return json.loads(result.content[0].text)
+    return {"error": "Empty response from VisionDetectBatch"}
+
+
+async def complete_direct(messages, on_answer: Optional[Callable[[str], None]] = None) -> str:
+    """Direct LLM call (no tools), streamed to `on_answer` when given."""
+    from agent.llm import generate_chat
+    if on_answer is None:
+        return await generate_chat(messages, max_tokens=512, temperature=0.1)
+
+    from agent.api_llm import generate_chat_stream
+    parts = []
+    async for delta in generate_chat_stream(messages, max_tokens=512, temperature=0.1):
+        parts.append(delta)
+        on_answer(delta)
+    return "".join(parts)
+
+
+async def run_multimodal(req: MultimodalRequest, on_answer: Optional[Callable[[str], None]] = None) -> dict:
+    """Answer a request in its session, which can't be evicted until the answer is done (or cancelled)."""
+    session = session_store.get(req.session_id)
+    try:
+        return await answer_multimodal(req, session, on_answer)
+    finally:
+        session_store.release(session)
+
+
+async def answer_multimodal(req: MultimodalRequest, session: Session,
+                            on_answer: Optional[Callable[[str], None]] = None) -> dict:
     """
     Process multimodal request (text + image + audio) using direct LLM calls.
 
@@ -195,6 +331,8 @@ async def process_multimodal(req: MultimodalRequest):
     - Transcribes audio if provided
     - Combines text + transcribed audio
     - Uses direct LLM call instead of MCP
+
+    `on_answer` receives pieces of the final answer as the LLM generates them.
     """
 
     # Transcribe audio if provided
@@ -206,7 +344,8 @@ async def process_multimodal(req: MultimodalRequest):
             audio_bytes = base64.b64decode(req.audio)
             # Get dtype from request if available (default to float32 for WebRTC)
             audio_dtype = getattr(req, "audio_dtype", "float32")
-            transcribed_text = transcribe_audio_bytes(audio_bytes, dtype=audio_dtype)
+            # Google recognition waits on the network, Whisper on a CPU pool worker; neither blocks the loop
+            transcribed_text = await run_io(transcribe_audio_bytes, audio_bytes, dtype=audio_dtype)
             print(f"DEBUG: Transcribed text: '{transcribed_text}' (length: {len(transcribed_text)})", file=sys.stderr)
         except Exception as e:
             print(f"Audio transcription error: {e}", file=sys.stderr)
@@ -239,56 +378,73 @@ async def process_multimodal(req: MultimodalRequest):
     print(f"[HTTP] Processing request with mode='{mode}'", file=sys.stderr)
     
     global mcp_client, mcp_connected
+    detections = None
+    metrics = {}
     
-    # Verify MCP connection is still active
-    if mcp_connected and mcp_client:
-        try:
-            # Test connection by listing tools
-            tools = await mcp_client.list_tools()
-            print(f"[HTTP] MCP connection verified. Available tools: {[t.name for t in tools.tools]}", file=sys.stderr)
-        except Exception as e:
-            print(f"[WARNING] MCP connection test failed: {e}. Marking as disconnected.", file=sys.stderr)
-            mcp_connected = False
-    
+    # Connection liveness is tracked by the background heartbeat (mcp_heartbeat)
     if mcp_connected and mcp_client:
         # Use agent loop with MCP tools
         print(f"[HTTP] Using MCP agent loop with tools", file=sys.stderr)
         try:
-            from agent.agent_loop import agent_loop
-            
-            # Verify MCP connection is still working
-            try:
-                tools_check = await mcp_client.list_tools()
-                print(f"[HTTP] MCP connection verified. Tools: {[t.name for t in tools_check.tools]}", file=sys.stderr)
-            except Exception as e:
-                print(f"[ERROR] MCP connection lost: {e}. Falling back to direct LLM.", file=sys.stderr)
-                mcp_connected = False
-                raise Exception("MCP connection lost")
+            from agent.agent_loop import agent_loop, run_tool
             
             # Remove the instruction prefix for agent loop - we'll add it to the final response instead
             user_query = combined_text.replace("INSTRUCTION: Answer this question in ONE SINGLE PARAGRAPH with no headers, no bullet points, no lists, and no formatting. Keep it brief. QUESTION: ", "")
-            
-            # Check if user explicitly requests tool usage
-            tool_requested = False
-            tool_name = None
-            if "use" in user_query.lower() and "search_web" in user_query.lower():
-                tool_requested = True
-                tool_name = "search_web"
-            elif "use" in user_query.lower() and ("vision" in user_query.lower() or "VisionDetect" in user_query):
-                tool_requested = True
-                tool_name = "VisionDetect"
-            elif ("search" in user_query.lower() and ("web" in user_query.lower() or "internet" in user_query.lower())) or "current time" in user_query.lower():
-                tool_requested = True
-                tool_name = "search_web"
-            
-            if tool_requested:
-                user_query = f"CRITICAL INSTRUCTION: The user explicitly requested to use the {tool_name} tool. You MUST use this tool to answer their question. Do not say you don't have access to tools - you have access to {tool_name}. Original question: {user_query}"
-                print(f"[HTTP] Tool usage explicitly requested: {tool_name}", file=sys.stderr)
+            question = user_query
+
+            # Repeated questions are answered from the cache; not for images or follow-ups that need the conversation
+            cached = None
+            earlier_turns = len(session.memory) > 0
+            if ANSWER_CACHE_ENABLED and not req.image and not (earlier_turns and needs_context(question)):
+                cached = answer_cache.lookup(question)
+
+            # Time, "what do you see" and directions between known places skip the agent loop;
+            # explicit tool requests ("use search_web") are passed to the agent as a hint
+            route = route_intent(question)
+            print(f"[HTTP] Route: {route.to_dict()}", file=sys.stderr)
             
             print(f"[HTTP] User query (after cleanup): '{user_query[:200]}...'", file=sys.stderr)
+
+            # Detect objects in the uploaded image up front; the agent sees the result
+            # as an earlier VisionDetect call and won't re-capture from the server camera
+            if req.image:
+                try:
+                    detections = await detect_client_image(req.image)
+                    print(f"[HTTP] Client image detections: {detections}", file=sys.stderr)
+                except Exception as e:
+                    print(f"[WARNING] Client image detection failed: {e}", file=sys.stderr)
+            else:
+                # A follow-up within seconds of the last detection is about the same scene
+                detections = session.recent_detections()
             
             # Run agent loop with MCP client
-            result = await agent_loop(mcp_client, user_query, mode, image=req.image)
+            result = None
+            if cached is not None:
+                print(f"[HTTP] Answer cache hit ({cached['similarity']}): '{cached['query']}'", file=sys.stderr)
+                result = cached["answer"]
+                metrics["answer_cache"] = {"hit": True, "similarity": cached["similarity"], "intent": cached["intent"]}
+                metrics["llm_calls"] = 0
+                if on_answer:
+                    on_answer(result)
+                async with session.lock:
+                    session.memory.add("User", question)
+                    session.memory.add("Answer", result)
+            elif ROUTER_ENABLED and route.direct and not (req.image and route.intent != "vision"):
+                async with session.lock:
+                    result = await dispatch(mcp_client, route, question, run_tool, on_answer=on_answer,
+                                            metrics=metrics, detections=detections, session=session)
+                record_route(route.intent if result is not None else "fallback")
+            if result is None:
+                record_route("agent")
+                async with session.lock:
+                    result = await agent_loop(mcp_client, user_query, mode, image=req.image, detections=detections,
+                                              on_answer=on_answer, metrics=metrics, session=session)
+            # Only answers that depend on the question alone are shared: not follow-ups (the session
+            # memory may have shaped the answer), nor answers about the scene (detections, vision tools)
+            if (cached is None and ANSWER_CACHE_ENABLED and not req.image and metrics.get("outcome") == "answer"
+                    and not earlier_turns and not detections and not VISION_TOOLS & set(metrics.get("tools", []))):
+                answer_cache.store(question, result, tools=metrics.get("tools", []))
+            await session_store.save(session)
             
             # Add one-paragraph instruction to the final result if it's too long
             if result and ('\n\n' in result or result.count('\n') > 3):
@@ -317,28 +473,27 @@ async def process_multimodal(req: MultimodalRequest):
             # Fallback to direct LLM call
             print(f"[HTTP] Falling back to direct LLM call", file=sys.stderr)
             try:
-                from agent.llm import generate_chat
                 messages = [
                     {"role": "system", "content": "You are a helpful AI assistant. Always respond in exactly ONE SINGLE PARAGRAPH with no headers, no bullet points, no lists, and no formatting. Keep it brief."},
                     {"role": "user", "content": combined_text}
                 ]
-                result = await generate_chat(messages, max_tokens=512, temperature=0.1)
+                result = await complete_direct(messages, on_answer)
                 print(f"[HTTP] Fallback LLM response received: {result[:100]}...", file=sys.stderr)
             except Exception as e2:
                 return {
                     "response": f"Error: Both MCP agent loop and direct LLM failed. MCP error: {error_msg}. LLM error: {str(e2)}",
-                    "transcription": transcribed_text if transcribed_text else None
+                    "transcription": transcribed_text if transcribed_text else None,
+                    "detections": detections
                 }
     else:
         # Fallback to direct LLM call if MCP not connected
         print(f"[HTTP] MCP not connected, using direct LLM call", file=sys.stderr)
         try:
-            from agent.llm import generate_chat
             messages = [
                 {"role": "system", "content": "You are a helpful AI assistant. Always respond in exactly ONE SINGLE PARAGRAPH with no headers, no bullet points, no lists, and no formatting. Keep it brief."},
                 {"role": "user", "content": combined_text}
             ]
-            result = await generate_chat(messages, max_tokens=512, temperature=0.1)
+            result = await complete_direct(messages, on_answer)
             print(f"[HTTP] Direct LLM response received: {result[:100]}...", file=sys.stderr)
         except Exception as e:
             error_msg = f"LLM processing failed: {str(e)}"
@@ -350,6 +505,63 @@ async def process_multimodal(req: MultimodalRequest):
 
     return {
         "response": result,
-        "transcription": transcribed_text if transcribed_text else None
+        "transcription": transcribed_text if transcribed_text else None,
+        "detections": detections,
+        "metrics": metrics,
+        "session_id": session.id
     }
 
+
+@app.post("/process")
+async def process_multimodal(req: MultimodalRequest):
+    """Process multimodal request (text + image + audio) and return the whole answer at once."""
+    return await run_multimodal(req)
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/process/stream")
+async def process_multimodal_stream(req: MultimodalRequest):
+    """
+    Process multimodal request, streaming the answer as server-sent events.
+
+    Events:
+    - "delta": {"text": ...} for each piece of the answer as the LLM writes it
+    - "done": the same body /process returns; "response" is authoritative
+    - "error": {"message": ...} if processing failed
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(run_multimodal(req, on_answer=queue.put_nowait))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+
+    async def events():
+        streamed = ""
+        try:
+            while (delta := await queue.get()) is not None:
+                streamed += delta
+                yield sse_event("delta", {"text": delta})
+
+            try:
+                body = task.result()
+            except Exception as e:
+                yield sse_event("error", {"message": str(e)})
+                return
+
+            # Answers that were not streamed (tool results, cleanup) still reach speech clients
+            final = body.get("response") or ""
+            if final.startswith(streamed) and len(final) > len(streamed):
+                yield sse_event("delta", {"text": final[len(streamed):]})
+            yield sse_event("done", body)
+        finally:
+            # Client went away: stop working on the answer
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,7 +1,9 @@
 """MCP server with FastMCP."""
 import sys
 import os
+from contextlib import ExitStack
 from pathlib import Path
+from typing import List
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent
@@ -32,20 +34,50 @@ except ImportError as e:
     raise
 
 try:
-    from tools.vision.yolo import infer
+    from tools.vision.yolo import infer, infer_structured, warm_up as warm_up_vision, vision_stats, VisionError
 except ImportError as e:
     print(f"ERROR: Failed to import yolo: {e}", file=sys.stderr, flush=True)
     # Don't raise - make it optional for now
-    def infer():
+    def infer(frame_handle=None):
         return "Vision tool not available: Import failed"
 
+    class VisionError(RuntimeError):
+        pass
+
+    def infer_structured(*args, **kwargs):
+        raise VisionError("Vision tool not available: Import failed")
+
+    def vision_stats():
+        return {"error": "Vision tool not available: Import failed"}
+
+    def warm_up_vision():
+        pass
+
+try:
+    from tools.vision.batch import detect_batch, summarize_batch
+    from tools.vision.capture import get_capture_service
+    from shared.frame_store import open_frame
+    from config.settings import CAPTURE_TIMEOUT
+except ImportError as e:
+    print(f"ERROR: Failed to import batch vision: {e}", file=sys.stderr, flush=True)
+    detect_batch = None
+
+try:
+    from tools.navigation.nav import load_graph, graph_nodes, astar
+except ImportError as e:
+    print(f"ERROR: Failed to import navigation: {e}", file=sys.stderr, flush=True)
+    raise
+
+from shared.executors import offload
+
 mcp = FastMCP(name="Cerebro")
 
 # LLM -> MCP -> Tools -> LLM
 
 
 @mcp.tool()
-def VisionDetect() -> str:
+@offload  # pool declared in TOOL_POOLS
+def VisionDetect(frame: str = "") -> str:
     """Detect and identify objects in the camera view using YOLO object detection.
 
     Requirements:
@@ -53,10 +85,13 @@ def VisionDetect() -> str:
     - Camera permissions must be granted
     - YOLO model must be available
 
+    Args:
+        frame: Internal frame handle for an image uploaded by the client. Leave empty to use the camera.
+
     Returns detected objects as a comma-separated list, or error message if camera/model unavailable.
     """
     try:
-        result = infer()
+        result = infer(frame or None)
 
         # If vision fails, provide helpful guidance
         if "not available" in result.lower() or "failed" in result.lower() or "not found" in result.lower():
@@ -73,12 +108,83 @@ def VisionDetect() -> str:
 
 
 @mcp.tool()
+@offload
+def VisionDetectStructured(
+    conf: float = None,
+    iou: float = None,
+    classes: List[str] = None,
+    frame: str = ""
+) -> dict:
+    """Detect objects in the camera view and return where they are.
+
+    Use this instead of VisionDetect when positions or confidences matter
+    (e.g. "where is the chair", "is the cup on my left").
+
+    Args:
+        conf: Minimum confidence 0-1 (default 0.25)
+        iou: NMS IoU threshold 0-1 (default 0.7)
+        classes: Only look for these class names, e.g. ["person", "chair"]
+        frame: Internal frame handle for an image uploaded by the client. Leave empty to use the camera.
+
+    Returns xyxy pixel boxes, confidences, class ids, a class-name table,
+    the image size and a summary string, or an error message.
+    """
+    try:
+        return infer_structured(frame or None, conf=conf, iou=iou, classes=classes).to_dict()
+    except VisionError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {"error": f"Vision detection error: {str(e)}"}
+
+
+@mcp.tool()
+@offload
+def VisionDetectBatch(frames: int = 8, frame_handles: List[str] = None) -> dict:
+    """Detect objects across several recent camera frames in one batched YOLO pass.
+
+    Labels are voted across frames, so objects that flicker in and out of single
+    frames are filtered out. Use this when a stable answer matters more than speed.
+
+    Args:
+        frames: Number of recent camera frames to use (1-16)
+        frame_handles: Internal frame handles for uploaded images. Leave empty to use the camera.
+
+    Returns per-frame labels, per-label vote statistics, stable labels and a summary.
+    """
+    if detect_batch is None:
+        return {"summary": "Vision tool not available: Import failed"}
+    try:
+        with ExitStack() as stack:
+            if frame_handles:
+                images = [stack.enter_context(open_frame(h)) for h in frame_handles]
+            else:
+                service = get_capture_service()
+                service.latest(timeout=CAPTURE_TIMEOUT)  # wait for the first frame after startup
+                images = [f.image for f in service.recent(max(1, frames))]
+            if not images:
+                return {"summary": "Camera not available: no frames captured yet."}
+            result = detect_batch(images, handles=frame_handles or None)
+        result["summary"] = summarize_batch(result)
+        return result
+    except Exception as e:
+        return {"summary": f"Vision detection error: {str(e)}"}
+
+
+@mcp.resource("vision://stats")
+def VisionStats() -> dict:
+    """Detection cache hit/miss counters, model pool and camera capture state."""
+    return vision_stats()
+
+
+@mcp.tool()
+@offload
 def search_web(query: str) -> dict:
     """Perform a web search and return results to summarize."""
     return retrieve_web_context(query)
 
 
 @mcp.tool()
+@offload
 def NavigateAStar(start: str, destination: str) -> str:
     """
     Compute navigation steps between two locations using A* pathfinding.
@@ -94,11 +200,13 @@ def NavigateAStar(start: str, destination: str) -> str:
     """
     try:
         graph = load_graph()
+        # Dead-end locations only appear as neighbours
+        nodes = set(graph_nodes())
 
-        if start not in graph:
+        if start not in nodes:
             return f"Invalid start location: {start}"
 
-        if destination not in graph:
+        if destination not in nodes:
             return f"Invalid destination location: {destination}"
 
         path = astar(graph, start, destination)
@@ -136,5 +244,11 @@ def NavigateAStar(start: str, destination: str) -> str:
 
 
 if __name__ == "__main__":
+    # Load YOLO weights in the background so the stdio handshake is not delayed;
+    # VisionDetect calls that arrive early simply wait for the pool to finish loading.
+    import threading
+    from config.settings import VISION_PRELOAD
+    if VISION_PRELOAD:
+        threading.Thread(target=warm_up_vision, name="vision-warmup", daemon=True).start()
     mcp.run()
 
@@ -0,0 +1,239 @@
+"""
+Thread and process pools for blocking work called from async code.
+
+The gateway and the MCP server each run a single asyncio loop; a synchronous
+call made on it (a Google speech request, a web search, a YOLO forward pass)
+stalls every other request until it returns. Blocking calls go instead to:
+
+- the I/O pool: IO_POOL_WORKERS threads for network- and disk-bound calls,
+  bounded so a burst of requests can't open an unbounded number of sockets;
+- the CPU pool: CPU_POOL_WORKERS spawned processes for Whisper and YOLO,
+  which hold the GIL for most of a forward pass. Each worker loads its
+  models once and keeps them (CPU_POOL_WORKERS = 0 runs them in the calling
+  thread instead).
+
+MCP tools that block are declared in TOOL_POOLS (config/settings.py) and
+wrapped with offload(), which runs them on the I/O pool; tools with a
+forward pass hand it on to the CPU pool themselves with cpu_call().
+"""
+import sys
+import time
+import asyncio
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import partial, wraps
+from typing import Callable, List, Optional
+from config.settings import CPU_POOL_WORKERS, IO_POOL_WORKERS, TOOL_POOLS
+
+POOLS = ("io", "cpu")
+
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+_in_worker = False  # set in CPU pool worker processes
+_worker_setup: List[str] = []  # "module:function" run in every CPU worker as it starts
+_stats = {pool: {"calls": 0, "active": 0, "peak_active": 0, "failed": 0, "seconds": 0.0} for pool in POOLS}
+_stats["cpu"]["restarts"] = 0
+
+
+def log(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+@contextmanager
+def _track(pool: str):
+    stats = _stats[pool]
+    with _lock:
+        stats["calls"] += 1
+        stats["active"] += 1
+        stats["peak_active"] = max(stats["peak_active"], stats["active"])
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        with _lock:
+            stats["failed"] += 1
+        raise
+    finally:
+        with _lock:
+            stats["active"] -= 1
+            stats["seconds"] += time.perf_counter() - start
+
+
+# ---------- I/O pool ----------
+def io_executor() -> ThreadPoolExecutor:
+    global _io_executor
+    with _lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(max_workers=max(1, IO_POOL_WORKERS), thread_name_prefix="io-pool")
+        return _io_executor
+
+
+def _run_tracked(pool: str, fn: Callable, args, kwargs):
+    with _track(pool):
+        return fn(*args, **kwargs)
+
+
+async def run_io(fn: Callable, *args, **kwargs):
+    """Run a blocking call on an I/O pool thread and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor(), partial(_run_tracked, "io", fn, args, kwargs))
+
+
+# ---------- CPU pool ----------
+def on_cpu_worker_start(target: str):
+    """Run "module:function" in every CPU worker as it starts, e.g. to load a model before the first call."""
+    if target not in _worker_setup:
+        _worker_setup.append(target)
+
+
+def _init_worker(setup: List[str]):
+    global _in_worker
+    _in_worker = True
+    # Workers inherit the parent's stdout, which is the JSON-RPC channel in the MCP server
+    sys.stdout = sys.stderr
+    for target in setup:
+        module, name = target.split(":")
+        try:
+            getattr(importlib.import_module(module), name)()
+        except Exception as e:
+            log(f"CPU worker setup {target} failed: {e}")
+
+
+def in_cpu_worker() -> bool:
+    """Whether this process is a CPU pool worker (it runs one call at a time)."""
+    return _in_worker
+
+
+def cpu_executor() -> Optional[ProcessPoolExecutor]:
+    """The process pool; None when CPU_POOL_WORKERS is 0 or inside a worker."""
+    global _cpu_executor
+    if CPU_POOL_WORKERS <= 0 or _in_worker:
+        return None
+    with _lock:
+        if _cpu_executor is None:
+            _cpu_executor = ProcessPoolExecutor(
+                max_workers=CPU_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(list(_worker_setup),),
+            )
+        return _cpu_executor
+
+
+def _restart_cpu_executor(broken: ProcessPoolExecutor):
+    """Replace a pool whose worker died (a broken pool refuses every later call)."""
+    global _cpu_executor
+    with _lock:
+        if _cpu_executor is not broken:
+            return
+        _cpu_executor = None
+        _stats["cpu"]["restarts"] += 1
+    log("CPU pool worker died, starting a new pool")
+    broken.shutdown(wait=False)
+
+
+def _submit_cpu(executor: ProcessPoolExecutor, fn: Callable, args, kwargs) -> Future:
+    try:
+        return executor.submit(fn, *args, **kwargs)
+    except BrokenProcessPool:
+        _restart_cpu_executor(executor)
+        return cpu_executor().submit(fn, *args, **kwargs)
+
+
+def cpu_call(fn: Callable, *args, **kwargs):
+    """
+    Run a module-level function in a CPU worker and wait for it.
+
+    Blocks the calling thread, so call it from an I/O pool thread (or use
+    run_cpu() on the event loop). Arguments and result are pickled.
+    """
+    executor = cpu_executor()
+    if executor is None:
+        return _run_tracked("cpu", fn, args, kwargs)
+    with _track("cpu"):
+        future = _submit_cpu(executor, fn, args, kwargs)
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            _restart_cpu_executor(executor)
+            raise
+
+
+async def run_cpu(fn: Callable, *args, **kwargs):
+    """Run a module-level function in a CPU worker and await its result."""
+    executor = cpu_executor()
+    if executor is None:
+        return await run_io(fn, *args, **kwargs)
+    with _track("cpu"):
+        future = _submit_cpu(executor, fn, args, kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            _restart_cpu_executor(executor)
+            raise
+
+
+def _worker_ready() -> bool:
+    time.sleep(0.05)  # long enough that each worker takes one
+    return True
+
+
+def warm_cpu_pool() -> int:
+    """Start every CPU worker now (running its setup) instead of on the first call; returns the count."""
+    executor = cpu_executor()
+    if executor is None:
+        return 0
+    futures = [executor.submit(_worker_ready) for _ in range(CPU_POOL_WORKERS)]
+    return sum(future.result() for future in futures)
+
+
+# ---------- tool declarations ----------
+def offload(fn: Callable, pool: Optional[str] = None) -> Callable:
+    """
+    Wrap a blocking MCP tool so it runs off the event loop.
+
+    `pool` defaults to the tool's TOOL_POOLS entry; the only tool pool is
+    "io", and the tool becomes a coroutine running on an I/O pool thread.
+    Tools never run whole in a CPU worker: vision tools read the camera and
+    cache in the server process and hand only their forward pass on with
+    cpu_call(). Undeclared tools are returned unchanged and run on the event
+    loop.
+    """
+    pool = pool or TOOL_POOLS.get(fn.__name__)
+    if pool is None:
+        return fn
+    if pool != "io":
+        raise ValueError(f"Unknown pool {pool!r} for tool {fn.__name__} (tools run on the \"io\" pool)")
+
+    @wraps(fn)
+    async def offloaded(*args, **kwargs):
+        return await run_io(fn, *args, **kwargs)
+
+    offloaded.pool = pool
+    return offloaded
+
+
+def executor_stats() -> dict:
+    """Calls, concurrency and busy seconds per pool, and the pool of each declared tool."""
+    with _lock:
+        stats = {pool: {key: round(value, 3) if isinstance(value, float) else value
+                        for key, value in counters.items()} for pool, counters in _stats.items()}
+    stats["io"]["workers"] = max(1, IO_POOL_WORKERS)
+    stats["cpu"]["workers"] = max(0, CPU_POOL_WORKERS)
+    stats["tools"] = dict(TOOL_POOLS)
+    return stats
+
+
+def shutdown_executors():
+    """Stop both pools (pending calls are cancelled)."""
+    global _io_executor, _cpu_executor
+    with _lock:
+        io, cpu = _io_executor, _cpu_executor
+        _io_executor = _cpu_executor = None
+    if io is not None:
+        io.shutdown(wait=False, cancel_futures=True)
+    if cpu is not None:
+        cpu.shutdown(wait=False, cancel_futures=True)
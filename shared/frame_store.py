@@ -0,0 +1,97 @@
+"""Hand decoded frames between processes through shared memory.
+
+The gateway decodes a client image once, publishes the pixel buffer and
+passes a short handle string to the MCP tool process, which maps the same
+memory instead of receiving a re-encoded image over stdio.
+
+Handle format: "<shm name>:<height>x<width>x<channels>:<dtype>"
+"""
+import sys
+import threading
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, List
+
+import numpy as np
+
+# Blocks published by this process, kept alive until released
+_published: Dict[str, shared_memory.SharedMemory] = {}
+# Blocks whose close() failed because an array view was still alive
+_deferred_close: List[shared_memory.SharedMemory] = []
+_lock = threading.Lock()
+
+
+def publish_frame(image: np.ndarray) -> str:
+    """Copy a frame into a new shared memory block and return its handle."""
+    image = np.ascontiguousarray(image)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+    view = np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)
+    view[...] = image
+    del view
+
+    shape = "x".join(str(d) for d in image.shape)
+    handle = f"{shm.name}:{shape}:{image.dtype.str}"
+    with _lock:
+        _published[handle] = shm
+    return handle
+
+
+def release_frame(handle: str):
+    """Free a block published by this process."""
+    with _lock:
+        shm = _published.pop(handle, None)
+    if shm is not None:
+        shm.close()
+        shm.unlink()
+
+
+def parse_handle(handle: str):
+    """Split a handle into (name, shape, dtype). Raises ValueError if malformed."""
+    try:
+        name, shape, dtype = handle.rsplit(":", 2)
+        return name, tuple(int(d) for d in shape.split("x")), np.dtype(dtype)
+    except Exception:
+        raise ValueError(f"Invalid frame handle: {handle!r}")
+
+
+def _close_deferred():
+    with _lock:
+        pending = list(_deferred_close)
+        _deferred_close.clear()
+    for shm in pending:
+        _close(shm)
+
+
+def _close(shm: shared_memory.SharedMemory):
+    try:
+        shm.close()
+    except BufferError:
+        # A consumer (e.g. a YOLO predictor caching its last batch) still holds
+        # a view; try again on a later call rather than copying the frame.
+        with _lock:
+            _deferred_close.append(shm)
+
+
+@contextmanager
+def open_frame(handle: str):
+    """Map a published frame as a read-only array without copying it."""
+    _close_deferred()
+    name, shape, dtype = parse_handle(handle)
+    shm = shared_memory.SharedMemory(name=name)
+    with _lock:
+        published_here = handle in _published
+    if sys.platform != "win32" and not published_here:
+        # Only the publishing process owns the block; stop this process's
+        # resource tracker from unlinking it at exit. (When this process published
+        # it, e.g. the in-process MCP transports, release_frame's unlink() does.)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    try:
+        # frombuffer holds an export of shm.buf (np.ndarray(buffer=...) doesn't), so close()
+        # raises BufferError instead of unmapping memory a live view still points at
+        frame = np.frombuffer(shm.buf, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+        frame.flags.writeable = False
+        yield frame
+    finally:
+        frame = None
+        _close(shm)
@@ -1,6 +1,8 @@
 """Shared utility functions."""
 import base64
 import io
+import json
+from typing import Iterable, Iterator, Tuple
 from PIL import Image
 import numpy as np
 
@@ -19,3 +21,29 @@ def base64_to_image(base64_str: str) -> Image.Image:
     img_bytes = base64.b64decode(base64_str)
     return Image.open(io.BytesIO(img_bytes))
 
+
+def base64_to_array(base64_str: str) -> np.ndarray:
+    """Decode a base64 image straight into a BGR numpy array (OpenCV/YOLO layout)."""
+    import cv2
+
+    img_bytes = base64.b64decode(base64_str)
+    image = cv2.imdecode(np.frombuffer(img_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image data")
+    return image
+
+
+def iter_sse_events(lines: Iterable[str]) -> Iterator[Tuple[str, dict]]:
+    """Parse server-sent event lines into (event, JSON data) pairs."""
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+    if data:
+        yield event, json.loads("\n".join(data))
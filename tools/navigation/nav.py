@@ -1,26 +1,40 @@
 import json
 import heapq
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
-from fastmcp import FastMCP
-mcp = FastMCP("navigation")
+from agent.tool_cache import file_version
+from config.settings import NAV_GRAPH_PATH
 
 
+_graph_cache = {}  # file_version(NAV_GRAPH_PATH) -> (graph, node names)
 
 
-import os
+def _parsed_graph() -> Tuple[Dict, List[str]]:
+    """The graph and its node names (longest first), parsed again only after the file changed."""
+    version = file_version(NAV_GRAPH_PATH)
+    if version is None or version not in _graph_cache:
+        with open(NAV_GRAPH_PATH, "r", encoding="utf-8") as f:
+            graph = json.load(f)
+        nodes = set(graph) | {node for edges in graph.values() for node in edges}
+        _graph_cache.clear()
+        _graph_cache[version] = graph, sorted(nodes, key=len, reverse=True)
+    return _graph_cache[version]
 
-BASE_DIR = os.path.dirname(__file__)
-GRAPH_PATH = os.path.join(BASE_DIR, "navigationGraph.json")
 
+def load_graph() -> Dict:
+    """The navigation graph."""
+    return _parsed_graph()[0]
 
 
-def load_graph() -> Dict:
-    with open(GRAPH_PATH, "r") as f:
-        return json.load(f)
+def graph_nodes() -> List[str]:
+    """Location names in the navigation graph, longest first ([] if it is missing)."""
+    if file_version(NAV_GRAPH_PATH) is None:
+        return []
+    return _parsed_graph()[1]
+
 
-@mcp.tool()
-def NavigateAStar(graph: Dict, start: str, goal: str):
+def astar(graph: Dict, start: str, goal: str):
+    """Shortest path from start to goal as a list of node names, or None."""
     def heuristic(a, b):
         # No coordinates yet → admissible zero heuristic
         return 0
@@ -48,7 +62,7 @@ def NavigateAStar(graph: Dict, start: str, goal: str):
         for neighbor, meta in graph.get(current, {}).items():
             tentative = g_score[current] + meta["distance"]
 
-            if tentative < g_score[neighbor]:
+            if tentative < g_score.get(neighbor, float("inf")):  # leaf nodes have no entry of their own
                 came_from[neighbor] = current
                 g_score[neighbor] = tentative
                 f_score[neighbor] = tentative + heuristic(neighbor, goal)
@@ -2,6 +2,7 @@
 import numpy as np
 from typing import Union
 import io
+from shared.executors import cpu_call
 
 # Import speech recognition libraries
 try:
@@ -120,6 +121,16 @@ def transcribe_audio_bytes_whisper(audio_bytes: bytes, sample_rate: int = 16000,
         print(f"DEBUG: Audio too quiet (max amplitude: {np.max(np.abs(audio_array)):.6f})", file=__import__('sys').stderr)
         return ""
 
+    # The forward pass holds the GIL for seconds; run it in a CPU pool worker
+    return cpu_call(whisper_transcribe, audio_array)
+
+
+def whisper_transcribe(audio_array: np.ndarray) -> str:
+    """
+    Run the Whisper model on float32 audio in [-1, 1] (loaded once per process).
+    """
+    import torch
+
     model = get_whisper_model()
     if model is None:
         return ""
@@ -1,16 +1,22 @@
 """Text-to-speech using edge-tts."""
 import asyncio
 import os
+import re
+import time
 import uuid
 from pathlib import Path
+from typing import AsyncIterable, List, Optional
 from edge_tts import Communicate
 from mutagen.mp3 import MP3
 import pygame
-from config.settings import TTS_OUTPUT_DIR, TTS_ENGLISH_VOICE, TTS_ARABIC_VOICE
+from config.settings import TTS_OUTPUT_DIR, TTS_ENGLISH_VOICE, TTS_ARABIC_VOICE, TTS_MIN_SENTENCE_CHARS
 
 # Ensure output directory exists
 TTS_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# End of a sentence: terminal punctuation (Latin or Arabic) followed by whitespace, or a newline
+SENTENCE_END = re.compile(r'(?<=[.!?؟…])\s+|\n+')
+
 
 def get_voice_for_text(text: str) -> str:
     """Detect Arabic vs English text."""
@@ -19,24 +25,44 @@ def get_voice_for_text(text: str) -> str:
     return TTS_ENGLISH_VOICE
 
 
-async def text_to_speech(text: str):
-    """Convert TEXT directly to speech and play it."""
-    if not text or not text.strip():
-        print("⚠️ TTS received empty text. Skipping.")
-        return
+class SentenceBuffer:
+    """Accumulate streamed text and hand out complete sentences."""
 
-    voice = get_voice_for_text(text)
-    output_file = TTS_OUTPUT_DIR / f"tts_{uuid.uuid4().hex}.mp3"
+    def __init__(self, min_chars: int = TTS_MIN_SENTENCE_CHARS):
+        """
+        Args:
+            min_chars: Shorter sentences are merged with the next one (avoids speaking "Mr." alone)
+        """
+        self.min_chars = min_chars
+        self.pending = ""
 
-    # Generate speech
-    tts = Communicate(text=text, voice=voice)
+    def feed(self, text: str) -> List[str]:
+        self.pending += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.pending):
+            sentence = self.pending[start:match.start()].strip()
+            if len(sentence) >= self.min_chars:
+                sentences.append(sentence)
+                start = match.end()
+        self.pending = self.pending[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        rest, self.pending = self.pending.strip(), ""
+        return rest or None
+
+
+async def synthesize(text: str) -> Path:
+    """Synthesize text to an mp3 file and return its path."""
+    output_file = TTS_OUTPUT_DIR / f"tts_{uuid.uuid4().hex}.mp3"
+    tts = Communicate(text=text, voice=get_voice_for_text(text))
     await tts.save(str(output_file))
+    return output_file
 
-    # Read duration (optional, just for info)
-    audio = MP3(str(output_file))
-    print(f"🔊 Duration: {audio.info.length:.2f}s")
 
-    # Play audio
+async def play(output_file: Path):
+    """Play an mp3 file to completion, then delete it."""
     if not pygame.mixer.get_init():
         pygame.mixer.init()
 
@@ -44,11 +70,9 @@ async def text_to_speech(text: str):
     pygame.mixer.music.play()
 
     while pygame.mixer.music.get_busy():
-        await asyncio.sleep(0.1)
+        await asyncio.sleep(0.05)
 
-    pygame.mixer.music.stop()
-    pygame.mixer.quit()
-    await asyncio.sleep(0.2)
+    pygame.mixer.music.unload()
 
     # Cleanup
     try:
@@ -56,3 +80,65 @@ async def text_to_speech(text: str):
     except Exception as e:
         print("Cleanup error:", e)
 
+
+async def text_to_speech(text: str):
+    """Convert TEXT directly to speech and play it."""
+    if not text or not text.strip():
+        print("⚠️ TTS received empty text. Skipping.")
+        return
+
+    # Generate speech
+    output_file = await synthesize(text)
+
+    # Read duration (optional, just for info)
+    audio = MP3(str(output_file))
+    print(f"🔊 Duration: {audio.info.length:.2f}s")
+
+    await play(output_file)
+    pygame.mixer.quit()
+    await asyncio.sleep(0.2)
+
+
+async def speak_stream(chunks: AsyncIterable[str]) -> dict:
+    """
+    Speak streamed text sentence by sentence.
+
+    Each sentence is synthesized as soon as it is complete, while earlier ones
+    are still playing, so audio starts after the first sentence instead of the
+    whole answer.
+
+    Returns:
+        Metrics: time_to_first_audio (seconds from the call, None if nothing was
+        spoken) and the number of sentences spoken
+    """
+    start = time.perf_counter()
+    metrics = {"time_to_first_audio": None, "sentences": 0}
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        buffer = SentenceBuffer()
+        try:
+            async for chunk in chunks:
+                for sentence in buffer.feed(chunk):
+                    queue.put_nowait(asyncio.create_task(synthesize(sentence)))
+            rest = buffer.flush()
+            if rest:
+                queue.put_nowait(asyncio.create_task(synthesize(rest)))
+        finally:
+            queue.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (task := await queue.get()) is not None:
+            output_file = await task
+            if metrics["time_to_first_audio"] is None:
+                metrics["time_to_first_audio"] = time.perf_counter() - start
+                print(f"🔊 Time to first audio: {metrics['time_to_first_audio']:.2f}s")
+            await play(output_file)
+            metrics["sentences"] += 1
+        await producer
+    finally:
+        producer.cancel()
+        if pygame.mixer.get_init():
+            pygame.mixer.quit()
+    return metrics
@@ -0,0 +1,166 @@
+"""Inference backends for the YOLO vision tools.
+
+Every backend exposes the same small interface so the model pool, single-frame
+and batched detection don't care what runs underneath:
+
+    backend.names                                  -> {class_id: name}
+    backend.detect(frames, conf, iou, classes)     -> [Detections, ...]
+
+Backends:
+    torch     ultralytics + PyTorch on the .pt weights (default)
+    onnx      onnxruntime on an exported .onnx file (see tools/vision/export.py)
+    openvino  ultralytics driving an exported OpenVINO model directory
+"""
+import ast
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+from config.settings import VISION_BACKEND, VISION_IMGSZ, VISION_INT8, VISION_ONNX_THREADS
+from tools.vision.detections import Detections
+
+
+def artifact_path(model_path: Path, backend: str = VISION_BACKEND, int8: bool = VISION_INT8) -> Path:
+    """Where the exported model for a backend lives, next to the .pt weights."""
+    model_path = Path(model_path)
+    suffix = "_int8" if int8 else ""
+    if backend == "torch":
+        return model_path
+    if backend == "onnx":
+        return model_path.with_name(f"{model_path.stem}{suffix}.onnx")
+    if backend == "openvino":
+        return model_path.with_name(f"{model_path.stem}{suffix}_openvino_model")
+    raise ValueError(f"Unknown vision backend: {backend}")
+
+
+def load_backend(model_path: Path, backend: str = VISION_BACKEND, int8: bool = VISION_INT8):
+    """Load the requested backend for a weights file."""
+    path = artifact_path(model_path, backend, int8)
+    if not path.exists():
+        hint = "" if backend == "torch" else f" Run: python tools/vision/export.py --backend {backend}" + (" --int8" if int8 else "")
+        raise FileNotFoundError(f"Vision model not found: {path}.{hint}")
+    if backend == "onnx":
+        return OnnxBackend(path)
+    return UltralyticsBackend(path)
+
+
+class UltralyticsBackend:
+    """PyTorch weights or an OpenVINO export, run through ultralytics."""
+
+    def __init__(self, path: Path):
+        from ultralytics import YOLO
+
+        self.model = YOLO(str(path), task="detect", verbose=False)
+        self.names = self.model.names
+
+    def detect(self, frames: List[np.ndarray], conf: float, iou: float, classes: Optional[List[int]] = None) -> List[Detections]:
+        # A list source is preprocessed and run through the network as a single batch
+        results = self.model(list(frames), conf=conf, iou=iou, classes=classes, verbose=False)
+        return [Detections.from_ultralytics(r, self.names) for r in results]
+
+
+class OnnxBackend:
+    """
+    onnxruntime session with a preallocated input tensor bound once via IO binding.
+
+    Each instance owns its input buffer, so instances must not be shared across
+    threads; the model pool takes care of that.
+    """
+
+    def __init__(self, path: Path, imgsz: int = VISION_IMGSZ, threads: int = VISION_ONNX_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = {int(k): v for k, v in ast.literal_eval(metadata["names"]).items()}
+        shape = self.session.get_inputs()[0].shape
+        self.imgsz = shape[2] if isinstance(shape[2], int) else imgsz
+
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+
+        # Preprocessing writes straight into this buffer; the binding points at
+        # its memory, so no input tensor is allocated per call
+        self._input = np.zeros((1, 3, self.imgsz, self.imgsz), dtype=np.float32)
+        self._binding = self.session.io_binding()
+        self._binding.bind_ortvalue_input(self.input_name, ort.OrtValue.ortvalue_from_numpy(self._input))
+        self._binding.bind_output(self.output_name, "cpu")
+
+    def detect(self, frames: List[np.ndarray], conf: float, iou: float, classes: Optional[List[int]] = None) -> List[Detections]:
+        # The export has a static batch of 1, so frames run back to back
+        return [self._detect_one(frame, conf, iou, classes) for frame in frames]
+
+    def _detect_one(self, frame: np.ndarray, conf: float, iou: float, classes: Optional[List[int]]) -> Detections:
+        ratio, pad = self._preprocess(frame)
+        self.session.run_with_iobinding(self._binding)
+        output = self._binding.copy_outputs_to_cpu()[0]
+        return self._postprocess(output[0], frame.shape[:2], ratio, pad, conf, iou, classes)
+
+    def _preprocess(self, frame: np.ndarray):
+        """Letterbox like ultralytics (centered, grey padding) into the input buffer."""
+        h, w = frame.shape[:2]
+        ratio = min(self.imgsz / h, self.imgsz / w)
+        new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+        dw, dh = (self.imgsz - new_w) / 2, (self.imgsz - new_h) / 2
+
+        resized = frame if (new_w, new_h) == (w, h) else cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+        left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+        padded = cv2.copyMakeBorder(resized, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+        # BGR HWC uint8 -> RGB CHW float32 in [0, 1], written in place
+        np.divide(padded[:, :, ::-1].transpose(2, 0, 1), 255.0, out=self._input[0], casting="unsafe")
+        return ratio, (left, top)
+
+    def _postprocess(self, output: np.ndarray, shape, ratio: float, pad, conf: float, iou: float,
+                     classes: Optional[List[int]], max_det: int = 300) -> Detections:
+        """Decode (4 + nc, anchors) YOLO output, filter, run class-aware NMS, undo letterbox."""
+        predictions = output.T  # (anchors, 4 + nc)
+        scores = predictions[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+
+        keep = confidences > conf
+        if classes is not None:
+            keep &= np.isin(class_ids, classes)
+        if not keep.any():
+            return Detections.empty(self.names, tuple(shape))
+
+        boxes = predictions[keep, :4]
+        confidences = confidences[keep]
+        class_ids = class_ids[keep]
+
+        # cx, cy, w, h -> x1, y1, x2, y2
+        xyxy = np.empty_like(boxes)
+        xyxy[:, :2] = boxes[:, :2] - boxes[:, 2:] / 2
+        xyxy[:, 2:] = boxes[:, :2] + boxes[:, 2:] / 2
+
+        # Offset boxes per class so one NMS call never suppresses across classes
+        offset = class_ids[:, None].astype(np.float32) * 7680
+        shifted = xyxy + offset
+        indices = cv2.dnn.NMSBoxes(
+            np.column_stack([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]]).tolist(),
+            confidences.tolist(), conf, iou, top_k=max_det
+        )
+        indices = np.array(indices, dtype=np.int64).reshape(-1)[:max_det]
+
+        xyxy = xyxy[indices]
+        xyxy[:, [0, 2]] -= pad[0]
+        xyxy[:, [1, 3]] -= pad[1]
+        xyxy /= ratio
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, shape[1])
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, shape[0])
+
+        return Detections(
+            boxes=xyxy.astype(np.float32),
+            confidences=confidences[indices].astype(np.float32),
+            class_ids=class_ids[indices].astype(np.int32),
+            names=self.names,
+            image_size=tuple(int(d) for d in shape),
+        )
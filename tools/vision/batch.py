@@ -0,0 +1,72 @@
+"""Batched multi-frame YOLO detection with temporal label voting."""
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+from config.settings import VISION_BATCH_MAX, VISION_CONF, VISION_IOU, VISION_VOTE_RATIO
+from tools.vision.yolo import run_detection
+
+
+def detect_batch(frames: List[np.ndarray], vote_ratio: float = VISION_VOTE_RATIO,
+                 handles: Optional[List[str]] = None) -> Dict:
+    """
+    Run one batched forward pass over several frames and vote on labels.
+
+    Args:
+        frames: BGR frames, e.g. recent frames from the capture buffer or decoded uploads
+        vote_ratio: Fraction of frames a label must appear in to count as stable
+        handles: Shared-memory handles of the frames, if they were uploaded (see shared.frame_store)
+
+    Returns:
+        {"frames": [{label: best confidence}, ...], "aggregate": {label: stats}, "stable": [labels]}
+    """
+    frames = list(frames)[:VISION_BATCH_MAX]
+    handles = list(handles)[:VISION_BATCH_MAX] if handles else None
+    if not frames:
+        return {"frames": [], "aggregate": {}, "stable": []}
+
+    # Torch/OpenVINO run the list as one batch; ONNX (static batch 1) runs it back to back
+    detections = run_detection(frames, VISION_CONF, VISION_IOU, handles=handles)
+
+    per_frame = [d.best_confidences() for d in detections]
+
+    aggregate = temporal_vote(per_frame)
+    stable = stable_labels(aggregate, vote_ratio)
+    print(f"Batch of {len(frames)} frames, stable labels: {stable}", file=sys.stderr)
+    return {"frames": per_frame, "aggregate": aggregate, "stable": stable}
+
+
+def temporal_vote(per_frame: List[Dict[str, float]]) -> Dict[str, Dict]:
+    """Per-label frame count, vote ratio and confidence statistics across frames."""
+    total = len(per_frame)
+    aggregate = {}
+    for labels in per_frame:
+        for label, conf in labels.items():
+            stats = aggregate.setdefault(label, {"frames": 0, "confidences": []})
+            stats["frames"] += 1
+            stats["confidences"].append(conf)
+
+    for label, stats in aggregate.items():
+        confidences = stats.pop("confidences")
+        stats["ratio"] = round(stats["frames"] / total, 3) if total else 0.0
+        stats["max_conf"] = max(confidences)
+        stats["mean_conf"] = round(sum(confidences) / len(confidences), 3)
+    return aggregate
+
+
+def stable_labels(aggregate: Dict[str, Dict], vote_ratio: float = VISION_VOTE_RATIO) -> List[str]:
+    """Labels seen in at least vote_ratio of the frames, sorted."""
+    return sorted(label for label, stats in aggregate.items() if stats["ratio"] >= vote_ratio)
+
+
+def summarize_batch(result: Dict) -> str:
+    """One-line summary of the voted labels for the agent."""
+    if not result["frames"]:
+        return "No frames available for detection."
+    if not result["stable"]:
+        return f"No objects consistently detected across {len(result['frames'])} frames."
+    parts = [
+        f"{label} ({result['aggregate'][label]['frames']}/{len(result['frames'])} frames)"
+        for label in result["stable"]
+    ]
+    return "Detected: " + ", ".join(parts)
@@ -0,0 +1,300 @@
+"""Long-lived camera capture service with a ring buffer of recent frames."""
+import sys
+import time
+import threading
+from collections import deque
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+import cv2
+import numpy as np
+from config.settings import (
+    CAPTURE_SOURCE,
+    CAPTURE_BUFFER_SIZE,
+    CAPTURE_WIDTH,
+    CAPTURE_HEIGHT,
+    CAPTURE_FPS,
+)
+
+
+class CapturedFrame(NamedTuple):
+    """A frame from the ring buffer. `image` is read-only and shared, never copied."""
+    image: np.ndarray
+    timestamp: float
+    index: int
+
+
+# ================= FRAME SOURCES =================
+class FrameSource:
+    """Base class for anything the capture thread can pull frames from."""
+
+    def open(self) -> bool:
+        return True
+
+    def read(self) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    """Physical camera, probing a few indices until one delivers frames."""
+
+    def __init__(self, camera_ids=(0, 1, 2), width: int = CAPTURE_WIDTH, height: int = CAPTURE_HEIGHT):
+        self.camera_ids = camera_ids
+        self.width = width
+        self.height = height
+        self.cap = None
+        self.camera_id = None
+
+    def open(self) -> bool:
+        # DirectShow opens much faster on Windows; elsewhere use the default backend
+        backends = [cv2.CAP_DSHOW, cv2.CAP_ANY] if sys.platform == "win32" else [cv2.CAP_ANY]
+        for camera_id in self.camera_ids:
+            for backend in backends:
+                cap = cv2.VideoCapture(camera_id, backend)
+                if not cap.isOpened():
+                    cap.release()
+                    continue
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+                # Keep the driver queue short so buffered frames are never stale
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                ret, frame = cap.read()
+                if ret and frame is not None and frame.size > 0:
+                    self.cap = cap
+                    self.camera_id = camera_id
+                    print(f"Camera {camera_id} working, frame shape: {frame.shape}", file=sys.stderr)
+                    return True
+                cap.release()
+        return False
+
+    def read(self) -> Optional[np.ndarray]:
+        if self.cap is None:
+            return None
+        ret, frame = self.cap.read()
+        return frame if ret and frame is not None and frame.size > 0 else None
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class VideoFileSource(FrameSource):
+    """Video file played back at its native frame rate, optionally looping."""
+
+    def __init__(self, path, loop: bool = True):
+        self.path = str(path)
+        self.loop = loop
+        self.cap = None
+        self._interval = 0.0
+        self._next_at = 0.0
+
+    def open(self) -> bool:
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            return False
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or CAPTURE_FPS
+        self._interval = 1.0 / fps
+        self._next_at = time.monotonic()
+        return True
+
+    def read(self) -> Optional[np.ndarray]:
+        if self.cap is None:
+            return None
+        delay = self._next_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_at = max(self._next_at + self._interval, time.monotonic())
+
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class SyntheticSource(FrameSource):
+    """Deterministic generated frames (a square sliding over a gradient) for headless runs."""
+
+    def __init__(self, width: int = CAPTURE_WIDTH, height: int = CAPTURE_HEIGHT, fps: float = CAPTURE_FPS):
+        self.width = width
+        self.height = height
+        self.interval = 1.0 / fps if fps else 0.0
+        self.count = 0
+        self._background = np.tile(
+            np.linspace(0, 255, width, dtype=np.uint8)[None, :, None], (height, 1, 3)
+        )
+
+    def read(self) -> Optional[np.ndarray]:
+        if self.interval:
+            time.sleep(self.interval)
+        frame = self._background.copy()
+        size = self.height // 4
+        x = (self.count * 8) % max(1, self.width - size)
+        y = self.height // 2 - size // 2
+        frame[y:y + size, x:x + size] = (0, 0, 255)
+        self.count += 1
+        return frame
+
+
+# ================= CAPTURE SERVICE =================
+class CaptureService:
+    """
+    Background thread that owns one frame source for the whole process.
+
+    Frames are stored in a fixed-size ring buffer. Readers receive the buffered
+    array itself (marked read-only) rather than a copy, so handing a frame to
+    YOLO costs nothing beyond the inference.
+    """
+
+    def __init__(self, source: FrameSource, buffer_size: int = CAPTURE_BUFFER_SIZE, reopen_delay: float = 2.0):
+        """
+        Args:
+            source: Where frames come from
+            buffer_size: Number of recent frames to keep
+            reopen_delay: Seconds to wait before reopening a source that stopped delivering
+        """
+        self.source = source
+        self.reopen_delay = reopen_delay
+        self.error = None
+
+        self._buffer = deque(maxlen=max(1, int(buffer_size)))
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._count = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self):
+        """Start the capture thread (no-op if already running)."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the capture thread and release the source."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _capture_loop(self):
+        opened = False
+        failures = 0
+        try:
+            while self._running:
+                if not opened:
+                    opened = self.source.open()
+                    if not opened:
+                        self.error = "No working camera found"
+                        self._sleep(self.reopen_delay)
+                        continue
+                    self.error = None
+                    failures = 0
+
+                frame = self.source.read()
+                if frame is None:
+                    failures += 1
+                    if failures >= 10:
+                        # Device went away; release and try again later
+                        self.source.close()
+                        opened = False
+                        self.error = "Frame source stopped delivering frames"
+                    continue
+                failures = 0
+
+                frame.flags.writeable = False
+                with self._cond:
+                    self._count += 1
+                    self._buffer.append(CapturedFrame(frame, time.time(), self._count))
+                    self._cond.notify_all()
+        finally:
+            self.source.close()
+
+    def _sleep(self, seconds: float):
+        with self._cond:
+            self._cond.wait_for(lambda: not self._running, timeout=seconds)
+
+    def latest(self, timeout: float = 0.0, max_age: float = None) -> Optional[CapturedFrame]:
+        """
+        Most recent frame, waiting up to `timeout` seconds for one to arrive.
+
+        Args:
+            timeout: How long to wait if the buffer is empty (or only holds stale frames)
+            max_age: Ignore frames older than this many seconds
+        """
+        def fresh():
+            if not self._buffer:
+                return None
+            frame = self._buffer[-1]
+            if max_age is not None and time.time() - frame.timestamp > max_age:
+                return None
+            return frame
+
+        with self._cond:
+            self._cond.wait_for(lambda: fresh() is not None or not self._running, timeout=timeout)
+            return fresh()
+
+    def recent(self, count: int) -> List[CapturedFrame]:
+        """Up to `count` most recent frames, oldest first."""
+        with self._cond:
+            frames = list(self._buffer)
+        return frames[-count:] if count > 0 else []
+
+    def stats(self) -> dict:
+        with self._cond:
+            newest = self._buffer[-1].timestamp if self._buffer else None
+            return {
+                "running": self._running,
+                "frames_captured": self._count,
+                "buffered": len(self._buffer),
+                "last_frame_age": time.time() - newest if newest else None,
+                "error": self.error,
+            }
+
+
+def make_source(spec: str = CAPTURE_SOURCE) -> FrameSource:
+    """Build a frame source from a settings string: "camera", "synthetic" or a video file path."""
+    if spec == "camera":
+        return CameraSource()
+    if spec == "synthetic":
+        return SyntheticSource()
+    if Path(spec).exists():
+        return VideoFileSource(spec)
+    raise ValueError(f"Unknown capture source: {spec}")
+
+
+# Global capture service instance
+_capture_service = None
+_capture_lock = threading.Lock()
+
+
+def capture_stats() -> Optional[dict]:
+    """Stats of the capture service, or None if it was never started (does not start it)."""
+    return _capture_service.stats() if _capture_service is not None else None
+
+
+def get_capture_service() -> CaptureService:
+    """Get or start the process-wide capture service."""
+    global _capture_service
+    with _capture_lock:
+        if _capture_service is None:
+            _capture_service = CaptureService(make_source())
+        _capture_service.start()
+    return _capture_service
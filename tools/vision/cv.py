@@ -1,32 +1,26 @@
 """Computer vision utilities."""
-import cv2
-from ultralytics import YOLO
 from pathlib import Path
-from config.settings import SRC_DIR
+from config.settings import SRC_DIR, CAPTURE_TIMEOUT, CAPTURE_MAX_AGE, VISION_CONF, VISION_IOU
+from tools.vision.capture import get_capture_service
+from tools.vision.model_pool import get_model_pool
 
 # Model path
 MODEL_PATH = SRC_DIR / "mcp_server" / "tools" / "computer_vision" / "yolo11n.pt"
 
-# Load base model
-model = YOLO(str(MODEL_PATH))
+# Shared base model pool (loaded on first use)
+pool = get_model_pool(MODEL_PATH)
 
 
 def detect_objects() -> str:
     """Detect objects using the camera."""
-    cap = cv2.VideoCapture(0)
-    ret, frame = cap.read()
-    cap.release()
-
-    if not ret:
+    captured = get_capture_service().latest(timeout=CAPTURE_TIMEOUT, max_age=CAPTURE_MAX_AGE)
+    if captured is None:
         return "Camera capture failed"
 
-    results = model(frame)
-    names = model.names
+    with pool.acquire() as model:
+        detections = model.detect([captured.image], VISION_CONF, VISION_IOU)[0]
 
-    detected = set()
-    for r in results:
-        for c in r.boxes.cls:
-            detected.add(names[int(c)])
+    detected = set(detections.labels())
 
     if not detected:
         return "No objects detected"
@@ -0,0 +1,100 @@
+"""Scene-change-gated cache of YOLO detections.
+
+A frame is reduced to a small luma thumbnail. If a recent frame with the same
+detection parameters has a thumbnail within `threshold` (largest per-cell
+absolute luma difference, 0-1), the scene is considered unchanged and its
+detections are reused instead of running the model again. Comparing cells
+rather than the frame-wide mean keeps a small object entering a static scene
+from being averaged away; each cell still averages enough pixels to absorb
+sensor noise.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import cv2
+import numpy as np
+from config.settings import VISION_CACHE_SIZE, VISION_CACHE_THRESHOLD, VISION_CACHE_TTL
+from tools.vision.detections import Detections
+
+SIGNATURE_SIZE = 32  # cells per side: 20x15 pixels each on a 640x480 frame
+
+
+def frame_signature(frame: np.ndarray, size: int = SIGNATURE_SIZE) -> np.ndarray:
+    """Downscaled luma thumbnail (size x size, float32 in 0-1)."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    small = cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA)
+    return small.astype(np.float32) / 255.0
+
+
+def signature_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Largest per-cell absolute luma difference between two signatures."""
+    return float(np.abs(a - b).max())
+
+
+class DetectionCache:
+    """Small LRU of (signature, detections) entries with a TTL and hit/miss counters."""
+
+    def __init__(self, threshold: float = VISION_CACHE_THRESHOLD, ttl: float = VISION_CACHE_TTL,
+                 max_entries: int = VISION_CACHE_SIZE):
+        """
+        Args:
+            threshold: Largest signature distance still treated as the same scene
+            ttl: Seconds a cached result stays valid even if the scene is unchanged
+            max_entries: Number of recent scenes to remember
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # id -> (key, signature, detections, timestamp)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, signature: np.ndarray, key: Hashable) -> Optional[Detections]:
+        """Cached detections for a matching recent scene, or None."""
+        now = time.monotonic()
+        with self._lock:
+            best_id, best_distance = None, None
+            for entry_id, (entry_key, entry_signature, _, timestamp) in list(self._entries.items()):
+                if now - timestamp > self.ttl:
+                    del self._entries[entry_id]
+                    continue
+                if entry_key != key:
+                    continue
+                distance = signature_distance(signature, entry_signature)
+                if distance <= self.threshold and (best_distance is None or distance < best_distance):
+                    best_id, best_distance = entry_id, distance
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id][2]
+
+    def store(self, signature: np.ndarray, key: Hashable, detections: Detections):
+        with self._lock:
+            self._entries[self._next_id] = (key, signature, detections, time.monotonic())
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "ttl": self.ttl,
+            }
@@ -0,0 +1,100 @@
+"""Structured YOLO detection results."""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class Detections:
+    """
+    Detections for one frame as compact parallel arrays.
+
+    boxes are xyxy pixel coordinates in the original frame; row i of every
+    array describes the same object.
+    """
+    boxes: np.ndarray  # (N, 4) float32
+    confidences: np.ndarray  # (N,) float32
+    class_ids: np.ndarray  # (N,) int32
+    names: Dict[int, str]  # full class-name table of the model
+    image_size: Tuple[int, int] = (0, 0)  # (height, width)
+
+    @classmethod
+    def empty(cls, names: Dict[int, str], image_size: Tuple[int, int] = (0, 0)) -> "Detections":
+        return cls(
+            boxes=np.zeros((0, 4), dtype=np.float32),
+            confidences=np.zeros(0, dtype=np.float32),
+            class_ids=np.zeros(0, dtype=np.int32),
+            names=names,
+            image_size=image_size,
+        )
+
+    @classmethod
+    def from_ultralytics(cls, result, names: Dict[int, str]) -> "Detections":
+        """Convert one ultralytics `Results` object."""
+        image_size = tuple(int(d) for d in result.orig_shape[:2])
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls.empty(names, image_size)
+        return cls(
+            boxes=boxes.xyxy.cpu().numpy().astype(np.float32, copy=False),
+            confidences=boxes.conf.cpu().numpy().astype(np.float32, copy=False),
+            class_ids=boxes.cls.cpu().numpy().astype(np.int32),
+            names=names,
+            image_size=image_size,
+        )
+
+    def __len__(self) -> int:
+        return len(self.class_ids)
+
+    def labels(self) -> List[str]:
+        """Class name of every detection, in row order."""
+        return [self.names[int(c)] for c in self.class_ids]
+
+    def best_confidences(self) -> Dict[str, float]:
+        """Highest confidence per detected class name."""
+        best = {}
+        for label, conf in zip(self.labels(), self.confidences.tolist()):
+            best[label] = max(best.get(label, 0.0), round(conf, 3))
+        return best
+
+    def summary(self) -> str:
+        """Sorted, de-duplicated class names as the agent-facing string."""
+        if not len(self):
+            return "Image processed successfully, but no objects detected in the current frame."
+        return f"Detected: {', '.join(sorted(set(self.labels())))}"
+
+    def to_dict(self) -> dict:
+        """JSON-friendly form; the name table only lists classes that were detected."""
+        present = sorted(set(int(c) for c in self.class_ids))
+        return {
+            "boxes": np.round(self.boxes, 1).tolist(),
+            "confidences": np.round(self.confidences, 3).tolist(),
+            "class_ids": self.class_ids.tolist(),
+            "names": {str(c): self.names[c] for c in present},
+            "image_size": list(self.image_size),
+            "summary": self.summary(),
+        }
+
+
+def resolve_classes(names: Dict[int, str], classes: Optional[Iterable]) -> Optional[List[int]]:
+    """
+    Map class names (or ids) to the id list YOLO filters on during NMS.
+
+    Returns None when no filter is requested. Raises ValueError for unknown names.
+    """
+    if not classes:
+        return None
+    by_name = {name.lower(): class_id for class_id, name in names.items()}
+    ids = []
+    for c in classes:
+        if isinstance(c, int) or (isinstance(c, str) and c.isdigit()):
+            class_id = int(c)
+            if class_id not in names:
+                raise ValueError(f"Unknown class id: {c}")
+        else:
+            class_id = by_name.get(str(c).strip().lower())
+            if class_id is None:
+                raise ValueError(f"Unknown class: {c}. Known classes: {', '.join(sorted(by_name))}")
+        ids.append(class_id)
+    return sorted(set(ids))
@@ -0,0 +1,79 @@
+"""
+Export the YOLO weights for the CPU inference backends.
+
+Usage:
+    python tools/vision/export.py --backend onnx [--int8]
+    python tools/vision/export.py --backend openvino [--int8]
+
+Exports are written next to the .pt file under the names the backends look
+for (see tools.vision.backends.artifact_path), so switching VISION_BACKEND in
+config/settings.py is all that is needed afterwards.
+"""
+import argparse
+import shutil
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import VISION_IMGSZ
+from tools.vision.backends import artifact_path
+from tools.vision.yolo import MODEL_PATH
+
+# Calibration data for OpenVINO INT8 (the coco8 sample set shipped with ultralytics)
+CALIBRATION_DATA = "coco8.yaml"
+
+
+def export_onnx(model_path: Path = MODEL_PATH, int8: bool = False, imgsz: int = VISION_IMGSZ) -> Path:
+    """Export to ONNX (static batch 1, simplified graph), optionally INT8-quantizing the weights."""
+    from ultralytics import YOLO
+
+    exported = Path(YOLO(str(model_path)).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True))
+    target = artifact_path(model_path, "onnx", int8=False)
+    if exported != target:
+        shutil.move(str(exported), target)
+
+    if not int8:
+        return target
+
+    # Dynamic quantization needs no calibration set and keeps the ultralytics
+    # metadata (class names) that the ONNX backend reads back
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized = artifact_path(model_path, "onnx", int8=True)
+    quantize_dynamic(str(target), str(quantized), weight_type=QuantType.QUInt8)
+    return quantized
+
+
+def export_openvino(model_path: Path = MODEL_PATH, int8: bool = False, imgsz: int = VISION_IMGSZ) -> Path:
+    """Export to an OpenVINO model directory; INT8 uses post-training calibration on coco8."""
+    from ultralytics import YOLO
+
+    kwargs = {"int8": True, "data": CALIBRATION_DATA} if int8 else {}
+    exported = Path(YOLO(str(model_path)).export(format="openvino", imgsz=imgsz, **kwargs))
+    target = artifact_path(model_path, "openvino", int8=int8)
+    if exported != target:
+        if target.exists():
+            shutil.rmtree(target)
+        shutil.move(str(exported), target)
+    return target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export YOLO weights for CPU inference backends")
+    parser.add_argument("--backend", choices=["onnx", "openvino"], default="onnx")
+    parser.add_argument("--int8", action="store_true", help="Also produce an INT8-quantized model")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="Source .pt weights")
+    args = parser.parse_args()
+
+    if not args.model.exists():
+        print(f"Model not found: {args.model}")
+        sys.exit(1)
+
+    export = export_onnx if args.backend == "onnx" else export_openvino
+    path = export(args.model, int8=args.int8)
+    print(f"Exported {args.backend} model: {path}")
+    print(f"Enable it with VISION_BACKEND={args.backend}" + (" VISION_INT8=true" if args.int8 else ""))
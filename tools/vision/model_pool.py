@@ -0,0 +1,107 @@
+"""Process-wide registry of preloaded, warmed-up YOLO models (any backend)."""
+import sys
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+from config.settings import VISION_BACKEND, VISION_CONF, VISION_IOU, VISION_POOL_SIZE, VISION_WARMUP_SIZE
+from tools.vision.backends import artifact_path, load_backend
+
+
+class YoloModelPool:
+    """
+    Small pool of identical YOLO instances loaded once per process.
+
+    Ultralytics predictors and ONNX input buffers keep per-call state, so one
+    instance must not be shared by concurrent callers. The pool hands out one
+    instance per caller and blocks the rest until an instance is returned.
+    """
+
+    def __init__(self, model_path: Path, backend: str = VISION_BACKEND, size: int = VISION_POOL_SIZE,
+                 warmup_size: int = VISION_WARMUP_SIZE):
+        """
+        Args:
+            model_path: Path to the YOLO .pt weights file
+            backend: "torch", "onnx" or "openvino" (see tools.vision.backends)
+            size: Number of model instances to keep loaded
+            warmup_size: Side length of the dummy frame used for warm-up (0 disables warm-up)
+        """
+        self.model_path = Path(model_path)
+        self.backend = backend
+        self.size = max(1, int(size))
+        self.warmup_size = warmup_size
+        self.names = {}
+        self.load_seconds = None
+
+        self._available = queue.Queue()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self):
+        """Load and warm every instance. Safe to call more than once."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            start = time.perf_counter()
+            for _ in range(self.size):
+                model = load_backend(self.model_path, self.backend)
+                self._warm(model)
+                self._available.put(model)
+                self.names = model.names
+            self.load_seconds = time.perf_counter() - start
+            self._loaded = True
+            print(
+                f"Loaded {self.size} YOLO instance(s) ({self.backend}) from "
+                f"{artifact_path(self.model_path, self.backend)} in {self.load_seconds:.2f}s",
+                file=sys.stderr
+            )
+
+    def _warm(self, model):
+        """Run one dummy inference so the first real call skips lazy initialization."""
+        if not self.warmup_size:
+            return
+        dummy = np.zeros((self.warmup_size, self.warmup_size, 3), dtype=np.uint8)
+        model.detect([dummy], VISION_CONF, VISION_IOU)
+
+    @contextmanager
+    def acquire(self, timeout: float = None):
+        """
+        Borrow a model instance for the duration of the block.
+
+        Loads the pool on first use if startup warm-up has not run yet.
+        """
+        self.load()
+        try:
+            model = self._available.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No vision model available: all instances are busy")
+        try:
+            yield model
+        finally:
+            self._available.put(model)
+
+
+# Global registry, one pool per weights file
+_pools: Dict[str, YoloModelPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_model_pool(model_path: Path, backend: str = VISION_BACKEND, size: int = VISION_POOL_SIZE) -> YoloModelPool:
+    """Get or create the process-wide pool for a weights file and backend (`size` applies on creation)."""
+    key = f"{Path(model_path).resolve()}:{backend}"
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = YoloModelPool(model_path, backend, size)
+            _pools[key] = pool
+    return pool
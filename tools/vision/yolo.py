@@ -7,85 +7,191 @@ project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from ultralytics import YOLO
-import cv2
-from config.settings import SRC_DIR
+from contextlib import ExitStack
+from typing import List, Optional
+from config.settings import (
+    SRC_DIR, CAPTURE_TIMEOUT, CAPTURE_MAX_AGE, VISION_CONF, VISION_IOU, VISION_CACHE_ENABLED, VISION_POOL_SIZE
+)
+from tools.vision.capture import capture_stats, get_capture_service
+from tools.vision.detection_cache import DetectionCache, frame_signature
+from tools.vision.detections import Detections, resolve_classes
+from tools.vision.model_pool import get_model_pool
+from shared.frame_store import open_frame, publish_frame, release_frame
+from shared.executors import cpu_call, cpu_executor, executor_stats, in_cpu_worker, on_cpu_worker_start, warm_cpu_pool
 
 # Model path
 MODEL_PATH = SRC_DIR / "mcp_server" / "tools" / "computer_vision" / "yolo11n_coco8_trained.pt"
 
+# Scene-change-gated cache shared by every VisionDetect call in this process
+detection_cache = DetectionCache() if VISION_CACHE_ENABLED else None
 
-def infer():
-    """Run inference on camera frame and return detected objects."""
-    import sys
 
-    # Try different camera indices
-    camera_ids = [0, 1, 2]
-    frame = None
-    working_camera = None
+def model_pool():
+    """This process's YOLO instances; a CPU pool worker runs one detection at a time and keeps one."""
+    return get_model_pool(MODEL_PATH, size=1 if in_cpu_worker() else VISION_POOL_SIZE)
 
-    for camera_id in camera_ids:
-        cap = None
-        try:
-            # Try DirectShow backend first (Windows), then fallback to default
-            try:
-                cap = cv2.VideoCapture(camera_id, cv2.CAP_DSHOW)
-            except:
-                cap = cv2.VideoCapture(camera_id)
-
-            if not cap.isOpened():
-                continue
-
-            # Set camera properties for better capture
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-
-            # Try to read a frame
-            ret, frame = cap.read()
-
-            if ret and frame is not None and frame.size > 0:
-                working_camera = camera_id
-                print(f"Camera {camera_id} working, frame shape: {frame.shape}", file=sys.stderr)
-                break
-        except Exception as e:
-            print(f"Error with camera {camera_id}: {e}", file=sys.stderr)
-        finally:
-            if cap is not None:
-                cap.release()
-
-    if frame is None or working_camera is None:
-        return "Camera not available: No working camera found. Please ensure your camera is connected and permissions are granted."
-
-    # Check if model file exists
-    if not MODEL_PATH.exists():
-        return f"Vision model not found: {MODEL_PATH}. Please ensure the YOLO model is installed."
 
+def warm_up():
+    """Load and warm the models where detection runs: in each CPU pool worker, or in this process."""
     try:
-        # Load model
-        model = YOLO(str(MODEL_PATH), verbose=False)
-        print(f"Model loaded successfully from {MODEL_PATH}", file=sys.stderr)
+        if cpu_executor() is not None:
+            warm_cpu_pool()
+        else:
+            model_pool().load()
     except Exception as e:
-        return f"Failed to load vision model: {e}"
+        print(f"Vision model warm-up failed: {e}", file=sys.stderr)
+
+
+# CPU pool workers load the weights when they start, not on their first detection
+on_cpu_worker_start("tools.vision.yolo:warm_up")
+
+
+class VisionError(RuntimeError):
+    """Camera, model or inference failure with an agent-readable message."""
+
+
+def infer(frame_handle: str = None) -> str:
+    """
+    Run inference and return detected objects.
+
+    Args:
+        frame_handle: Shared-memory handle of a client-supplied frame (see shared.frame_store).
+            When omitted, the latest camera frame is used.
+    """
+    try:
+        return infer_structured(frame_handle).summary()
+    except VisionError as e:
+        return str(e)
+
+
+def infer_structured(frame_handle: str = None, conf: float = None, iou: float = None, classes=None) -> Detections:
+    """
+    Like infer(), but return boxes, confidences and class ids.
+
+    Args:
+        frame_handle: Shared-memory frame handle, or None for the camera
+        conf: Minimum confidence (default VISION_CONF)
+        iou: NMS IoU threshold (default VISION_IOU)
+        classes: Class names or ids to keep; other classes are dropped before NMS
+
+    Raises:
+        VisionError: If no frame is available or inference fails
+    """
+    if frame_handle:
+        try:
+            with open_frame(frame_handle) as frame:
+                return detect_structured(frame, conf, iou, classes, frame_handle=frame_handle)
+        except (ValueError, FileNotFoundError) as e:
+            raise VisionError(f"Image not available: {e}")
 
+    # Latest frame from the long-lived capture thread (shared, not copied)
+    captured = get_capture_service().latest(timeout=CAPTURE_TIMEOUT, max_age=CAPTURE_MAX_AGE)
+    if captured is None:
+        raise VisionError("Camera not available: No working camera found. Please ensure your camera is connected and permissions are granted.")
+    return detect_structured(captured.image, conf, iou, classes)
+
+
+def detect(frame) -> str:
+    """Run YOLO on one BGR frame and summarize the detected classes."""
     try:
-        # Run inference
-        print("Running YOLO inference...", file=sys.stderr)
-        results = model(frame, verbose=False)
-        names = model.names
+        return detect_structured(frame).summary()
+    except VisionError as e:
+        return str(e)
 
-        detected = set()
-        for r in results:
-            if r.boxes is not None:
-                for c in r.boxes.cls:
-                    detected.add(names[int(c)])
 
-        if not detected:
-            return "Camera capture successful, but no objects detected in the current frame."
+def detect_frames(frames: List, conf: float, iou: float, classes=None) -> List[Detections]:
+    """
+    The forward pass alone: run YOLO on BGR frames with a pooled model of this process.
 
-        detected_list = sorted(list(detected))
-        print(f"Detected objects: {detected_list}", file=sys.stderr)
-        return f"Detected: {', '.join(detected_list)}"
+    Called through run_detection(), so it runs in a CPU pool worker when there is one.
+    """
+    try:
+        # Load the pool (no-op once warmed at startup)
+        pool = model_pool()
+        pool.load()
+    except FileNotFoundError as e:
+        raise VisionError(f"{e} Please ensure the YOLO model is installed.")
+    except Exception as e:
+        raise VisionError(f"Failed to load vision model: {e}")
 
+    try:
+        class_ids = resolve_classes(pool.names, classes)
+    except ValueError as e:
+        raise VisionError(str(e))
+
+    try:
+        with pool.acquire() as model:
+            return model.detect(list(frames), conf=conf, iou=iou, classes=class_ids)
     except Exception as e:
-        return f"Vision processing failed: {e}"
+        raise VisionError(f"Vision processing failed: {e}")
 
+
+def detect_handles(handles: List[str], conf: float, iou: float, classes=None) -> List[Detections]:
+    """detect_frames() on frames in shared memory, mapped in the CPU pool worker that runs it."""
+    with ExitStack() as stack:
+        frames = [stack.enter_context(open_frame(handle)) for handle in handles]
+        return detect_frames(frames, conf, iou, classes)
+
+
+def run_detection(frames: List, conf: float, iou: float, classes=None,
+                  handles: Optional[List[str]] = None) -> List[Detections]:
+    """
+    The forward pass over `frames`, in a CPU pool worker when there is one.
+
+    Workers get shared-memory handles, not pickled pixels: `handles` of frames
+    that already have one, otherwise the frames are published for the call.
+    """
+    if cpu_executor() is None:
+        return cpu_call(detect_frames, frames, conf, iou, classes)  # runs in this thread: nothing copied
+    published = [] if handles else [publish_frame(frame) for frame in frames]
+    try:
+        return cpu_call(detect_handles, handles or published, conf, iou, classes)
+    finally:
+        for handle in published:
+            release_frame(handle)
+
+
+def detect_structured(frame, conf: float = None, iou: float = None, classes=None,
+                      frame_handle: Optional[str] = None) -> Detections:
+    """Run YOLO on one BGR frame with optional confidence, IoU and class filters."""
+    conf = VISION_CONF if conf is None else conf
+    iou = VISION_IOU if iou is None else iou
+
+    # Reuse the last result if the scene hasn't changed since
+    signature = key = None
+    if detection_cache is not None:
+        signature = frame_signature(frame)
+        key = (frame.shape, conf, iou, tuple(classes) if classes else None)
+        cached = detection_cache.lookup(signature, key)
+        if cached is not None:
+            print("Scene unchanged, reusing cached detections", file=sys.stderr)
+            return cached
+
+    print("Running YOLO inference...", file=sys.stderr)
+    try:
+        detections = run_detection([frame], conf, iou, classes, [frame_handle] if frame_handle else None)[0]
+    except VisionError:
+        raise
+    except Exception as e:
+        raise VisionError(f"Vision processing failed: {e}")
+    print(f"Detected objects: {sorted(set(detections.labels()))}", file=sys.stderr)
+
+    if detection_cache is not None:
+        detection_cache.store(signature, key, detections)
+    return detections
+
+
+def vision_stats() -> dict:
+    """Detection cache counters plus model pool, CPU pool and capture state."""
+    pool = model_pool()
+    return {
+        "cache": detection_cache.stats() if detection_cache is not None else None,
+        "model_pool": {
+            "backend": pool.backend,
+            "size": pool.size,
+            "loaded": pool.loaded,
+            "load_seconds": pool.load_seconds,
+        },
+        "capture": capture_stats(),
+        "executors": executor_stats(),
+    }
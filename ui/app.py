@@ -3,9 +3,13 @@ import streamlit as st
 import requests
 import numpy as np
 import base64
+import time
+import queue
+import asyncio
+import threading
 from streamlit_webrtc import webrtc_streamer, VideoProcessorBase, AudioProcessorBase
 from config.settings import API_URL
-from shared.utils import image_to_base64
+from shared.utils import image_to_base64, iter_sse_events
 
 # Page config
 st.set_page_config(page_title="Smart Glasses Interface", layout="wide")
@@ -21,6 +25,8 @@ if "is_recording_audio" not in st.session_state:
     st.session_state.is_recording_audio = False
 if "recording_start_frame" not in st.session_state:
     st.session_state.recording_start_frame = 0
+if "session_id" not in st.session_state:
+    st.session_state.session_id = None  # assigned by the gateway on the first answer
 
 
 # ==================== VIDEO PROCESSOR ====================
@@ -68,6 +74,20 @@ class AudioProcessor(AudioProcessorBase):
         self.frame_count = 0
 
 
+# ==================== SPEECH ====================
+def start_speech() -> queue.Queue:
+    """Speak text put on the returned queue sentence by sentence (None ends it), on a background thread."""
+    from tools.speech.tts import speak_stream
+    chunks = queue.Queue()
+
+    async def read_chunks():
+        while (chunk := await asyncio.to_thread(chunks.get)) is not None:
+            yield chunk
+
+    threading.Thread(target=lambda: asyncio.run(speak_stream(read_chunks())), daemon=True).start()
+    return chunks
+
+
 # ==================== UI ====================
 st.title("🤖 Smart Glasses Interface")
 
@@ -169,6 +189,7 @@ with col2:
     
     # Send button
     st.divider()
+    speak_answer = st.checkbox("🔊 Speak answer", help="Read the answer aloud as it streams in")
     if st.button("🚀 Send Request", type="primary", use_container_width=True):
         # Prepare multimodal request
         has_text = bool(text_input.strip())
@@ -184,11 +205,13 @@ with col2:
                     request_data = {
                         "mode": mode,
                         "text": text_input if has_text else None,
+                        "session_id": st.session_state.session_id,
                     }
                     
                     # Add image if captured
                     if has_image:
-                        img_base64 = image_to_base64(st.session_state.captured_frame)
+                        # Frames are BGR (OpenCV order); encode as RGB so the gateway decodes them correctly
+                        img_base64 = image_to_base64(np.ascontiguousarray(st.session_state.captured_frame[:, :, ::-1]))
                         request_data["image"] = img_base64
                     
                     # Add audio if captured
@@ -234,18 +257,43 @@ with col2:
                             st.warning(f"⚠️ Error processing audio: {audio_error}. Skipping audio input.")
                             has_audio = False
                     
-                    # Send request
+                    # Send request; the answer streams back as server-sent events
+                    start = time.perf_counter()
                     response = requests.post(
-                        f"{API_URL}/process",
+                        f"{API_URL}/process/stream",
                         json=request_data,
-                        timeout=300
+                        timeout=300,
+                        stream=True
                     )
                     
                     if response.status_code == 200:
-                        result = response.json()["response"]
-                        st.success("✅ Response received!")
+                        response.encoding = "utf-8"
                         st.write("**Agent Response:**")
-                        st.write(result)
+                        placeholder = st.empty()
+                        speech = start_speech() if speak_answer else None
+                        result, first_token = "", None
+                        try:
+                            for event, data in iter_sse_events(response.iter_lines(decode_unicode=True)):
+                                if event == "delta":
+                                    if first_token is None:
+                                        first_token = time.perf_counter() - start
+                                    result += data["text"]
+                                    placeholder.write(result + "▌")
+                                    if speech:
+                                        speech.put(data["text"])
+                                elif event == "done":
+                                    result = data["response"]
+                                    st.session_state.session_id = data.get("session_id") or st.session_state.session_id
+                                elif event == "error":
+                                    raise RuntimeError(data["message"])
+                        finally:
+                            if speech:
+                                speech.put(None)
+                        placeholder.write(result)
+                        if first_token is not None:
+                            st.success(f"✅ Response received! (first words after {first_token:.2f}s)")
+                        else:
+                            st.success("✅ Response received!")
                     else:
                         st.error(f"Error: {response.status_code} - {response.text}")
                         